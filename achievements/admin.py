@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Achievement, UserAchievement, PersonalRecord, ExerciseStatistics, UserStatistics
+from .models import Achievement, UserAchievement, PersonalRecord, ExerciseStatistics, UserStatistics, OutboxEvent
 
 
 @admin.register(Achievement)
@@ -41,3 +41,12 @@ class UserStatisticsAdmin(admin.ModelAdmin):
     search_fields = ['user__email']
     ordering = ['-total_workouts']
     raw_id_fields = ['user']
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['idempotency_key', 'event_type', 'user', 'status', 'attempts', 'available_at', 'processed_at']
+    list_filter = ['status', 'event_type']
+    search_fields = ['user__email', 'idempotency_key']
+    ordering = ['-created_at']
+    raw_id_fields = ['user']
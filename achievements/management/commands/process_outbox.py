@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand
+from achievements.models import OutboxEvent
+from achievements.outbox import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETENTION_DAYS,
+    process_outbox,
+    purge_done_events,
+    retry_dead_events
+)
+
+# Seconds between purges of applied events while looping
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply queued achievement and statistics events from the outbox, and delete applied events '
+        'older than --purge-done-older-than days'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events instead of exiting when the outbox is empty'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep between polls when the outbox is empty'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Events processed per batch'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=OUTBOX_MAX_ATTEMPTS,
+            help='Attempts before an event is dead-lettered'
+        )
+        parser.add_argument(
+            '--retry-dead',
+            action='store_true',
+            help='Move dead-lettered events back to pending before processing'
+        )
+        parser.add_argument(
+            '--purge-done-older-than',
+            type=float,
+            default=OUTBOX_RETENTION_DAYS,
+            help='Delete applied events processed more than this many days ago (hourly while looping; 0 disables)'
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            requeued = retry_dead_events()
+            self.stdout.write(self.style.SUCCESS(f'Requeued {requeued} dead-lettered events'))
+
+        totals = {'done': 0, 'pending': 0, 'dead': 0}
+        purged = 0
+        last_purge = None
+        while True:
+            counts = process_outbox(batch_size=options['batch_size'], max_attempts=options['max_attempts'])
+            for key, value in counts.items():
+                totals[key] += value
+
+            if counts['done'] or counts['dead']:
+                self.stdout.write(
+                    f"Processed {counts['done']} events, {counts['pending']} retrying, {counts['dead']} dead-lettered"
+                )
+
+            if not any(counts.values()):
+                if options['purge_done_older_than'] and (
+                    last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS
+                ):
+                    purged += purge_done_events(options['purge_done_older_than'])
+                    last_purge = time.monotonic()
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        dead = OutboxEvent.objects.filter(status='dead').count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCompleted! {totals['done']} events applied, {totals['dead']} dead-lettered "
+                f"({dead} dead-lettered events in total), {purged} applied events purged"
+            )
+        )
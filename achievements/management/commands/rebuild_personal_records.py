@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from user.models import CustomUser
+from achievements.utils import rebuild_personal_records
+from core.conditional import unshared_versions_warning
+
+
+class Command(BaseCommand):
+    help = 'Rebuild personal records from raw set history for one user or all users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            default=None,
+            help='Email of the user (omit to rebuild every user)'
+        )
+
+    def handle(self, *args, **options):
+        email = options['email']
+        user = None
+
+        if email:
+            try:
+                user = CustomUser.objects.get(email=email)
+                self.stdout.write(self.style.SUCCESS(f'Found user: {user.email}'))
+            except CustomUser.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f'User with email {email} not found'))
+                return
+
+        warning = unshared_versions_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+
+        written = rebuild_personal_records(user=user)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Completed! Rebuilt {written} personal records')
+        )
@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Models are imported inside functions: spawned workers import this module
+# to unpickle their tasks before django.setup() has run.
+SUMMARY_KEYS = ('calories', 'personal_records', 'achievements', 'statistics')
+
+
+def _init_worker():
+    """Set up Django in a freshly spawned worker process."""
+    django.setup()
+    connections.close_all()
+
+
+def _recalculate_chunk(user_ids, dry_run):
+    """Worker entry point: recalculate one chunk of users and close the connection afterwards."""
+    from achievements.utils import recalculate_users
+
+    try:
+        return recalculate_users(user_ids, dry_run=dry_run)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Recalculate calories, personal records, achievements and statistics for all users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (1 runs in-process)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Users recalculated per task'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=os.path.join(settings.BASE_DIR, 'logs', 'recalculate_all_users.checkpoint.json'),
+            help='Checkpoint file recording the last fully processed user'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue after the user recorded in the checkpoint file'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would change without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        from user.models import CustomUser
+        from achievements.utils import recalculate_users
+        from core.conditional import unshared_versions_warning
+
+        workers = max(options['workers'], 1)
+        chunk_size = max(options['chunk_size'], 1)
+        checkpoint_path = options['checkpoint']
+        dry_run = options['dry_run']
+
+        warning = unshared_versions_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+
+        users = CustomUser.objects.order_by('pk')
+        processed = 0
+        checkpointed = 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            users = users.filter(pk__gt=checkpoint['last_user_id'])
+            processed = checkpointed = checkpoint['processed']
+            self.stdout.write(f"Resuming after user {checkpoint['last_user_id']} ({processed} users already done)")
+
+        total_users = processed + users.count()
+        self.stdout.write(
+            f'Recalculating {total_users} users with {workers} worker(s), {chunk_size} users per chunk'
+            + (' (dry run)' if dry_run else '')
+        )
+
+        totals = dict.fromkeys(SUMMARY_KEYS, 0)
+        started = time.monotonic()
+        # Chunks finish out of order; the checkpoint only advances past a chunk
+        # once every chunk before it has finished, so a resume never skips users.
+        pending_chunks = []
+        finished_chunks = set()
+        chunk_index = 0
+
+        def chunks():
+            chunk = []
+            for user_id in users.values_list('pk', flat=True).iterator(chunk_size=2000):
+                chunk.append(user_id)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        def record(index, summary):
+            nonlocal processed, checkpointed
+            finished_chunks.add(index)
+            processed += summary['users']
+            for key in SUMMARY_KEYS:
+                totals[key] += summary[key]
+            if dry_run:
+                for change in summary['changes']:
+                    self.stdout.write(f'  {change}')
+
+            last_user_id = None
+            while pending_chunks and pending_chunks[0][0] in finished_chunks:
+                done_index, last_user_id, size = pending_chunks.pop(0)
+                finished_chunks.discard(done_index)
+                checkpointed += size
+            if last_user_id is not None and not dry_run:
+                self._write_checkpoint(checkpoint_path, last_user_id, checkpointed)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Processed {processed}/{total_users} users ({processed / elapsed if elapsed else 0:.1f} users/s)'
+            )
+
+        if workers == 1:
+            for chunk in chunks():
+                pending_chunks.append((chunk_index, str(chunk[-1]), len(chunk)))
+                record(chunk_index, recalculate_users(chunk, dry_run=dry_run))
+                chunk_index += 1
+        else:
+            # Close inherited connections and spawn clean workers: forked
+            # processes must never share the parent's database socket.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            ) as executor:
+                in_flight = {}
+                for chunk in chunks():
+                    pending_chunks.append((chunk_index, str(chunk[-1]), len(chunk)))
+                    in_flight[executor.submit(_recalculate_chunk, chunk, dry_run)] = chunk_index
+                    chunk_index += 1
+                    # Keep a bounded number of chunks queued so memory stays flat
+                    if len(in_flight) >= workers * 2:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record(in_flight.pop(future), future.result())
+                for future in as_completed(list(in_flight)):
+                    record(in_flight.pop(future), future.result())
+
+        elapsed = time.monotonic() - started
+        if not dry_run and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCompleted! {'Would update' if dry_run else 'Updated'} "
+                f"{totals['calories']} workout calories, {totals['personal_records']} personal records, "
+                f"{totals['achievements']} achievements and {totals['statistics']} statistics "
+                f"for {processed} users in {elapsed:.1f}s "
+                f"({processed / elapsed if elapsed else 0:.1f} users/s)"
+            )
+        )
+
+    def _write_checkpoint(self, path, last_user_id, processed):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as checkpoint_file:
+            json.dump({'last_user_id': last_user_id, 'processed': processed}, checkpoint_file)
+        os.replace(tmp_path, path)
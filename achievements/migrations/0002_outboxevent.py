@@ -0,0 +1,41 @@
+# Generated by Django 5.2.9 on 2026-10-18 21:31
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('event_type', models.CharField(choices=[('set_logged', 'Set Logged'), ('workout_completed', 'Workout Completed')], max_length=30)),
+                ('idempotency_key', models.CharField(help_text='One event per source change, e.g. set:<id> or workout_completed:<id>', max_length=100, unique=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('dead', 'Dead Letter')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Not processed before this time (retry backoff)')),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Outbox Event',
+                'verbose_name_plural': 'Outbox Events',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='achievement_status_2ff9f8_idx')],
+            },
+        ),
+    ]
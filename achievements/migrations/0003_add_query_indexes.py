@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('achievements', '0002_outboxevent'),
+        ('exercise', '0002_alter_exercise_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='personalrecord',
+            index=models.Index(fields=['exercise', '-best_one_rep_max'], name='achievement_exercis_88680e_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='personalrecord',
+            index=models.Index(fields=['exercise', '-best_weight'], name='achievement_exercis_c17710_idx'),
+        ),
+    ]
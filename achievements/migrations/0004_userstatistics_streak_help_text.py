@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0003_add_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userstatistics',
+            name='current_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Current workout streak in weeks'),
+        ),
+        migrations.AlterField(
+            model_name='userstatistics',
+            name='longest_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Longest workout streak ever (in weeks)'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from core.models import TimestampedModel
 from exercise.models import Exercise
 
@@ -181,6 +182,11 @@ class PersonalRecord(TimestampedModel):
     class Meta:
         unique_together = ('user', 'exercise')
         ordering = ['exercise__name']
+        indexes = [
+            # Leaderboards rank one exercise by either value
+            models.Index(fields=['exercise', '-best_one_rep_max']),
+            models.Index(fields=['exercise', '-best_weight']),
+        ]
         verbose_name = 'Personal Record'
         verbose_name_plural = 'Personal Records'
 
@@ -310,3 +316,53 @@ class UserStatistics(TimestampedModel):
 
     def __str__(self):
         return f"{self.user.email} Stats"
+
+
+class OutboxEvent(TimestampedModel):
+    """
+    Achievement and statistics side-effects queued by signals.
+    Written in the same transaction as the set or workout that caused them,
+    then applied by the process_outbox command.
+    """
+
+    EVENT_TYPE_CHOICES = [
+        ('set_logged', 'Set Logged'),
+        ('workout_completed', 'Workout Completed'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='outbox_events'
+    )
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPE_CHOICES)
+    idempotency_key = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text="One event per source change, e.g. set:<id> or workout_completed:<id>"
+    )
+    payload = models.JSONField(default=dict)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not processed before this time (retry backoff)")
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+
+    def __str__(self):
+        return f"{self.event_type} ({self.status}) - {self.idempotency_key}"
@@ -0,0 +1,194 @@
+"""
+Transactional outbox for achievement and statistics side-effects.
+
+Signals only record an OutboxEvent next to the set or workout that caused it;
+process_outbox applies the events later with retries and dead-lettering.
+"""
+from datetime import timedelta
+from decimal import Decimal
+import logging
+import traceback
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from exercise.models import Exercise
+from workout.models import Workout
+from .models import OutboxEvent, UserStatistics
+from .views import (
+    update_personal_record,
+    check_achievements_for_workout,
+    check_achievements_for_pr,
+    calculate_workout_streak
+)
+
+logger = logging.getLogger('achievements')
+
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BATCH_SIZE = 100
+# Retry backoff: 2, 4, 8, ... seconds, capped at 10 minutes
+OUTBOX_MAX_BACKOFF_SECONDS = 600
+# Applied events are kept this long, so replays of recent changes stay no-ops
+OUTBOX_RETENTION_DAYS = 7
+OUTBOX_PURGE_BATCH_SIZE = 1000
+
+
+def enqueue_event(user_id, event_type, idempotency_key, payload):
+    """
+    Record a side-effect for the outbox worker.
+    Re-enqueueing an existing idempotency key is a no-op.
+    """
+    event, _ = OutboxEvent.objects.get_or_create(
+        idempotency_key=idempotency_key,
+        defaults={'user_id': user_id, 'event_type': event_type, 'payload': payload},
+    )
+    return event
+
+
+def handle_set_logged(event):
+    """Update the personal record for a logged set and check PR achievements."""
+    payload = event.payload
+    user = event.user
+    exercise = Exercise.objects.get(id=payload['exercise_id'])
+    weight = Decimal(payload['weight'])
+
+    pr, is_new_pr, pr_type, old_value, new_value = update_personal_record(
+        user=user,
+        exercise=exercise,
+        weight=weight,
+        reps=payload['reps'],
+        set_date=parse_datetime(payload['set_date'])
+    )
+
+    if is_new_pr:
+        logger.info(
+            f"New PR for {user.email} on {exercise.name}: "
+            f"{pr_type} - {old_value} -> {new_value}"
+        )
+
+        # Check for PR-based achievements
+        if pr_type == 'weight':
+            check_achievements_for_pr(user, exercise, weight, 'weight')
+        elif pr_type == 'one_rm':
+            check_achievements_for_pr(user, exercise, pr.best_one_rep_max, 'one_rm')
+
+
+def handle_workout_completed(event):
+    """Update user statistics and streak for a completed workout and check achievements."""
+    payload = event.payload
+    user = event.user
+
+    stats, _ = UserStatistics.objects.get_or_create(user=user)
+    stats.total_workouts += 1
+
+    if payload.get('duration'):
+        stats.total_workout_duration += payload['duration']
+
+    # Update streak
+    stats.current_streak = calculate_workout_streak(user)
+    if stats.current_streak > stats.longest_streak:
+        stats.longest_streak = stats.current_streak
+
+    workout_datetime = parse_datetime(payload['datetime']) if payload.get('datetime') else None
+    stats.last_workout_date = workout_datetime.date() if workout_datetime else timezone.now().date()
+    stats.save()
+
+    # Check for achievements
+    workout = Workout.objects.filter(id=payload['workout_id']).first()
+    new_achievements = check_achievements_for_workout(user, workout)
+
+    if new_achievements:
+        logger.info(
+            f"User {user.email} earned {len(new_achievements)} new achievements: "
+            f"{[ua.achievement.name for ua in new_achievements]}"
+        )
+
+
+EVENT_HANDLERS = {
+    'set_logged': handle_set_logged,
+    'workout_completed': handle_workout_completed,
+}
+
+
+def _process_event(event_id, max_attempts):
+    """
+    Apply one event. The handler and the status change commit together,
+    so an event is never applied twice even if the worker dies mid-batch.
+    Returns the resulting status, or None if another worker holds the event.
+    """
+    try:
+        with transaction.atomic():
+            event = OutboxEvent.objects.select_for_update(skip_locked=True).select_related('user').filter(
+                id=event_id, status='pending'
+            ).first()
+            if event is None:
+                return None
+            EVENT_HANDLERS[event.event_type](event)
+            event.status = 'done'
+            event.attempts += 1
+            event.processed_at = timezone.now()
+            event.last_error = ''
+            event.save(update_fields=['status', 'attempts', 'processed_at', 'last_error', 'updated_at'])
+            return 'done'
+    except Exception as e:
+        # The handler's writes were rolled back with the transaction above
+        event = OutboxEvent.objects.get(id=event_id)
+        event.attempts += 1
+        event.last_error = traceback.format_exc()
+        if event.attempts >= max_attempts:
+            event.status = 'dead'
+            logger.error(f"Outbox event {event.idempotency_key} dead-lettered after {event.attempts} attempts: {e}")
+        else:
+            backoff = min(2 ** event.attempts, OUTBOX_MAX_BACKOFF_SECONDS)
+            event.available_at = timezone.now() + timedelta(seconds=backoff)
+            logger.warning(f"Outbox event {event.idempotency_key} failed (attempt {event.attempts}), retrying in {backoff}s: {e}")
+        event.save(update_fields=['status', 'attempts', 'available_at', 'last_error', 'updated_at'])
+        return event.status
+
+
+def process_outbox(batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS):
+    """
+    Process one batch of due events in creation order.
+    Returns a dict of counts per resulting status.
+    """
+    event_ids = list(
+        OutboxEvent.objects.filter(
+            status='pending',
+            available_at__lte=timezone.now()
+        ).order_by('created_at').values_list('id', flat=True)[:batch_size]
+    )
+
+    counts = {'done': 0, 'pending': 0, 'dead': 0}
+    for event_id in event_ids:
+        result = _process_event(event_id, max_attempts)
+        if result is not None:
+            counts[result] += 1
+    return counts
+
+
+def retry_dead_events(user=None):
+    """Move dead-lettered events back to pending so the worker replays them."""
+    events = OutboxEvent.objects.filter(status='dead')
+    if user is not None:
+        events = events.filter(user=user)
+    return events.update(status='pending', attempts=0, available_at=timezone.now(), updated_at=timezone.now())
+
+
+def purge_done_events(older_than_days=OUTBOX_RETENTION_DAYS, batch_size=OUTBOX_PURGE_BATCH_SIZE):
+    """
+    Delete applied events processed more than older_than_days ago, in batches
+    so a large backlog never holds one long lock. Pending and dead-lettered
+    events are kept. Once an event is purged its idempotency key can be
+    enqueued again, e.g. by a workout completed, reopened and completed again.
+    Returns the number of events deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    purged = 0
+    while True:
+        event_ids = list(
+            OutboxEvent.objects.filter(status='done', processed_at__lt=cutoff).values_list('id', flat=True)[:batch_size]
+        )
+        if not event_ids:
+            return purged
+        purged += OutboxEvent.objects.filter(id__in=event_ids).delete()[0]
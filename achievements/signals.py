@@ -1,17 +1,13 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.conf import settings
 import logging
 
+from core.conditional import touch_data, touch_user_data
 from workout.models import Workout, ExerciseSet
-from .models import PersonalRecord, UserStatistics, UserAchievement
-from .views import (
-    update_personal_record,
-    check_achievements_for_workout,
-    check_achievements_for_pr,
-    calculate_workout_streak
-)
+from .models import Achievement, PersonalRecord, UserAchievement, UserStatistics
+from .outbox import enqueue_event
 
 logger = logging.getLogger('achievements')
 
@@ -26,8 +22,8 @@ def create_user_statistics(sender, instance, created, **kwargs):
 @receiver(post_save, sender=ExerciseSet)
 def track_set_for_pr(sender, instance, created, **kwargs):
     """
-    Track personal records when a new set is added.
-    Updates PR if the set beats previous records.
+    Queue personal record tracking when a new set is added.
+    The PR is updated if the set beats previous records.
     """
     if not created:
         return
@@ -40,46 +36,37 @@ def track_set_for_pr(sender, instance, created, **kwargs):
     if not workout_exercise:
         return
 
-    user = workout_exercise.workout.user
-    exercise = workout_exercise.exercise
     weight = instance.weight
     reps = instance.reps
 
     if weight <= 0 or reps <= 0:
         return
 
-    try:
-        # Update personal record
-        pr, is_new_pr, pr_type, old_value, new_value = update_personal_record(
-            user=user,
-            exercise=exercise,
-            weight=weight,
-            reps=reps,
-            set_date=timezone.now()
-        )
-
-        if is_new_pr:
-            logger.info(
-                f"New PR for {user.email} on {exercise.name}: "
-                f"{pr_type} - {old_value} -> {new_value}"
-            )
-
-            # Check for PR-based achievements
-            if pr_type == 'weight':
-                check_achievements_for_pr(user, exercise, weight, 'weight')
-            elif pr_type == 'one_rm':
-                check_achievements_for_pr(user, exercise, pr.best_one_rep_max, 'one_rm')
-
-    except Exception as e:
-        logger.error(f"Error tracking PR for set {instance.id}: {e}")
+    # Applied later by process_outbox; this row commits with the set itself
+    enqueue_event(
+        user_id=workout_exercise.workout.user_id,
+        event_type='set_logged',
+        idempotency_key=f'set_logged:{instance.id}',
+        payload={
+            'set_id': instance.id,
+            'exercise_id': workout_exercise.exercise_id,
+            'weight': str(weight),
+            'reps': reps,
+            'set_date': timezone.now().isoformat(),
+        }
+    )
 
 
 @receiver(pre_save, sender=Workout)
 def track_workout_completion(sender, instance, **kwargs):
     """
     Store the previous is_done state before save to detect completion.
+    Uses the value snapshotted when the workout was loaded; only falls back
+    to a SELECT for instances that were not loaded from the database.
     """
-    if instance.pk:
+    if instance.pk and instance.is_tracked('is_done'):
+        instance._was_done = instance.previous_value('is_done')
+    elif instance.pk:
         try:
             old_instance = Workout.objects.get(pk=instance.pk)
             instance._was_done = old_instance.is_done
@@ -92,7 +79,7 @@ def track_workout_completion(sender, instance, **kwargs):
 @receiver(post_save, sender=Workout)
 def check_workout_achievements(sender, instance, created, **kwargs):
     """
-    Check for achievements when a workout is completed.
+    Queue statistics and achievement checks when a workout is completed.
     Triggered when is_done changes from False to True.
     """
     # Skip rest days
@@ -102,32 +89,30 @@ def check_workout_achievements(sender, instance, created, **kwargs):
     # Check if workout was just completed
     was_done = getattr(instance, '_was_done', False)
     if not was_done and instance.is_done:
-        user = instance.user
-
-        try:
-            # Update user statistics
-            stats, _ = UserStatistics.objects.get_or_create(user=user)
-            stats.total_workouts += 1
-
-            if instance.duration:
-                stats.total_workout_duration += instance.duration
-
-            # Update streak
-            stats.current_streak = calculate_workout_streak(user)
-            if stats.current_streak > stats.longest_streak:
-                stats.longest_streak = stats.current_streak
+        # Applied later by process_outbox; this row commits with the workout itself
+        enqueue_event(
+            user_id=instance.user_id,
+            event_type='workout_completed',
+            idempotency_key=f'workout_completed:{instance.id}',
+            payload={
+                'workout_id': instance.id,
+                'duration': instance.duration,
+                'datetime': instance.datetime.isoformat() if instance.datetime else None,
+            }
+        )
 
-            stats.last_workout_date = instance.datetime.date() if instance.datetime else timezone.now().date()
-            stats.save()
 
-            # Check for achievements
-            new_achievements = check_achievements_for_workout(user, instance)
+@receiver(post_save, sender=PersonalRecord)
+@receiver(post_delete, sender=PersonalRecord)
+@receiver(post_save, sender=UserAchievement)
+@receiver(post_delete, sender=UserAchievement)
+@receiver(post_save, sender=UserStatistics)
+def user_progress_changed(sender, instance, **kwargs):
+    """Achievement progress is part of the user's data version (see core/conditional.py)."""
+    touch_user_data(instance.user_id)
 
-            if new_achievements:
-                logger.info(
-                    f"User {user.email} earned {len(new_achievements)} new achievements: "
-                    f"{[ua.achievement.name for ua in new_achievements]}"
-                )
 
-        except Exception as e:
-            logger.error(f"Error checking achievements for workout {instance.id}: {e}")
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def achievement_catalog_changed(sender, **kwargs):
+    touch_data('achievements')
@@ -55,3 +55,212 @@ class AchievementTestCase(TestCase):
         )
         response = self.client.get('/api/achievements/prs/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_rebuild_personal_records(self):
+        """Test rebuilding personal records from set history"""
+        from workout.models import WorkoutExercise, ExerciseSet
+        from .utils import rebuild_personal_records
+
+        workout = Workout.objects.create(user=self.user, title='Test Workout', is_done=True)
+        workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise)
+        ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=1, weight=60, reps=10, is_warmup=True)
+        ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=2, weight=100, reps=5)
+        ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=3, weight=90, reps=8)
+        PersonalRecord.objects.all().delete()
+
+        self.assertEqual(rebuild_personal_records(user=self.user), 1)
+        pr = PersonalRecord.objects.get(user=self.user, exercise=self.exercise)
+        self.assertEqual(float(pr.best_weight), 100.0)
+        self.assertEqual(pr.best_weight_reps, 5)
+        self.assertAlmostEqual(float(pr.best_one_rep_max), PersonalRecord.calculate_one_rep_max(100, 5), places=2)
+        self.assertEqual(pr.best_one_rep_max_reps, 5)
+        self.assertEqual(float(pr.best_set_volume), 720.0)
+        self.assertEqual(float(pr.total_volume), 1220.0)
+        self.assertEqual(pr.total_sets, 2)
+        self.assertEqual(pr.total_reps, 13)
+
+        # Rebuilding again updates the existing row instead of duplicating it
+        rebuild_personal_records()
+        self.assertEqual(PersonalRecord.objects.filter(user=self.user).count(), 1)
+
+        # Records of exercises whose sets are all gone are removed
+        ExerciseSet.objects.filter(workout_exercise=workout_exercise).delete()
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        PersonalRecord.objects.create(user=other, exercise=self.exercise, best_weight=50)
+        self.assertEqual(rebuild_personal_records(user=self.user), 0)
+        self.assertFalse(PersonalRecord.objects.filter(user=self.user).exists())
+        self.assertTrue(PersonalRecord.objects.filter(user=other).exists())
+        rebuild_personal_records()
+        self.assertFalse(PersonalRecord.objects.exists())
+
+    def test_recalculate_all_users_command(self):
+        """Test the all-users recalculation command in dry-run and write mode"""
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from workout.models import WorkoutExercise, ExerciseSet
+        from .models import UserStatistics
+
+        workout = Workout.objects.create(user=self.user, title='Test Workout', is_done=True)
+        workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise)
+        ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=1, weight=100, reps=5)
+        PersonalRecord.objects.all().delete()
+        UserAchievement.objects.all().delete()
+        UserStatistics.objects.all().delete()
+        Workout.objects.update(calories_burned=None)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint = os.path.join(tmp_dir, 'checkpoint.json')
+            out = StringIO()
+            call_command('recalculate_all_users', workers=1, dry_run=True, checkpoint=checkpoint, stdout=out, stderr=StringIO())
+            self.assertIn('achievement earned: First Workout', out.getvalue())
+            self.assertFalse(PersonalRecord.objects.exists())
+            self.assertFalse(UserAchievement.objects.exists())
+
+            call_command('recalculate_all_users', workers=1, checkpoint=checkpoint, stdout=StringIO(), stderr=StringIO())
+            self.assertFalse(os.path.exists(checkpoint))
+
+        self.assertEqual(float(PersonalRecord.objects.get(user=self.user).best_weight), 100.0)
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement=self.achievement).exists())
+        stats = UserStatistics.objects.get(user=self.user)
+        self.assertEqual(stats.total_workouts, 1)
+        self.assertEqual(stats.total_prs, 1)
+        self.assertEqual(stats.total_achievements, 1)
+        workout.refresh_from_db()
+        self.assertEqual(float(workout.calories_burned), Workout.calories_from_volume(500, 0, 1))
+
+    def test_outbox_applies_set_and_workout_events(self):
+        """Test that set and completion side-effects are queued and applied by the worker"""
+        from workout.models import WorkoutExercise, ExerciseSet
+        from .models import OutboxEvent, UserStatistics
+        from .outbox import process_outbox
+
+        workout = Workout.objects.create(user=self.user, title='Test Workout')
+        workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise)
+        exercise_set = ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=1, weight=100, reps=5)
+        workout.is_done = True
+        workout.save()
+
+        self.assertEqual(OutboxEvent.objects.filter(status='pending').count(), 2)
+        self.assertFalse(PersonalRecord.objects.filter(user=self.user).exists())
+
+        counts = process_outbox()
+        self.assertEqual(counts['done'], 2)
+        self.assertEqual(float(PersonalRecord.objects.get(user=self.user).best_weight), 100.0)
+        self.assertEqual(UserStatistics.objects.get(user=self.user).total_workouts, 1)
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement=self.achievement).exists())
+
+        # Saving the same set again does not queue a second event
+        exercise_set.save()
+        self.assertEqual(process_outbox()['done'], 0)
+
+    def test_outbox_worker_rotates_achievement_list_etag(self):
+        """Test that progress applied by the outbox worker, outside any request, invalidates the list's ETag"""
+        from workout.models import WorkoutExercise, ExerciseSet
+        from .outbox import process_outbox
+
+        with self.captureOnCommitCallbacks(execute=True):
+            workout = Workout.objects.create(user=self.user, title='Test Workout')
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise)
+            ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=1, weight=100, reps=5)
+            workout.is_done = True
+            workout.save()
+
+        response = self.client.get('/api/achievements/list/')
+        etag = response['ETag']
+        self.assertFalse(response.data['results'][0]['is_earned'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(process_outbox()['done'], 2)
+
+        response = self.client.get('/api/achievements/list/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['results'][0]['is_earned'])
+
+    def test_outbox_dead_letters_failing_events(self):
+        """Test that a failing event is retried with backoff and then dead-lettered"""
+        from .models import OutboxEvent
+        from .outbox import enqueue_event, process_outbox, retry_dead_events
+
+        event = enqueue_event(
+            user_id=self.user.id,
+            event_type='set_logged',
+            idempotency_key='set_logged:missing',
+            payload={'set_id': 0, 'exercise_id': 0, 'weight': '100', 'reps': 5, 'set_date': '2024-01-01T00:00:00Z'}
+        )
+
+        self.assertEqual(process_outbox(max_attempts=2)['pending'], 1)
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.available_at, event.created_at)
+
+        OutboxEvent.objects.filter(id=event.id).update(available_at=event.created_at)
+        self.assertEqual(process_outbox(max_attempts=2)['dead'], 1)
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'dead')
+        self.assertIn('DoesNotExist', event.last_error)
+
+        self.assertEqual(retry_dead_events(), 1)
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'pending')
+
+    def test_process_outbox_purges_old_applied_events(self):
+        """Test the worker deletes applied events past retention and keeps recent, pending and dead ones"""
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from .models import OutboxEvent
+        from .outbox import enqueue_event
+
+        def event(key, status, processed_days_ago=None):
+            created = enqueue_event(self.user.id, 'set_logged', key, {})
+            processed_at = timezone.now() - timedelta(days=processed_days_ago) if processed_days_ago is not None else None
+            OutboxEvent.objects.filter(id=created.id).update(status=status, processed_at=processed_at)
+
+        event('set_logged:old', 'done', processed_days_ago=30)
+        event('set_logged:recent', 'done', processed_days_ago=1)
+        event('set_logged:dead', 'dead')
+        event('set_logged:later', 'pending')
+        OutboxEvent.objects.filter(idempotency_key='set_logged:later').update(
+            available_at=timezone.now() + timedelta(hours=1)
+        )
+
+        out = StringIO()
+        call_command('process_outbox', '--purge-done-older-than', '7', stdout=out)
+        self.assertIn('1 applied events purged', out.getvalue())
+        self.assertEqual(
+            set(OutboxEvent.objects.values_list('idempotency_key', flat=True)),
+            {'set_logged:recent', 'set_logged:dead', 'set_logged:later'}
+        )
+
+    def test_list_achievements_is_page_scoped(self):
+        """Test that achievement list cost depends on page size, not catalog size"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from exercise.registry import get_registry
+
+        for i in range(30):
+            Achievement.objects.create(
+                name=f'Bench {i}', category='pr_weight', exercise=self.exercise,
+                requirement_value=50 + i, order=i, is_active=True
+            )
+        UserAchievement.objects.create(
+            user=self.user, achievement=self.achievement, current_progress=1, earned_value=1
+        )
+        # The exercise registry is built once per process, not per request
+        get_registry()
+
+        with CaptureQueriesContext(connection) as small_page:
+            response = self.client.get('/api/achievements/list/?page_size=5')
+        self.assertEqual(response.data['count'], 31)
+        self.assertEqual(len(response.data['results']), 5)
+
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get('/api/achievements/list/?page_size=31')
+        self.assertEqual(len(large_page), len(small_page))
+
+        earned = next(r for r in response.data['results'] if r['is_earned'])
+        self.assertEqual(float(earned['current_progress']), 1.0)
+        self.assertEqual(earned['progress_percentage'], 100.0)
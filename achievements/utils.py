@@ -0,0 +1,514 @@
+"""
+Utility functions for achievement and personal record operations.
+"""
+from datetime import timedelta
+from decimal import Decimal
+import logging
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Sum
+from django.utils import timezone
+
+from core.conditional import touch_user_data
+from workout.models import Workout, WorkoutExercise, ExerciseSet
+from .models import Achievement, UserAchievement, PersonalRecord, UserStatistics
+
+logger = logging.getLogger('achievements')
+
+# Rows buffered before a batch of users is flushed to the database.
+# A batch is only flushed on a user boundary, so one user is never split.
+PR_REBUILD_BATCH_ROWS = 50000
+
+PR_REBUILD_UPDATE_FIELDS = [
+    'best_weight', 'best_weight_reps', 'best_weight_date',
+    'best_one_rep_max', 'best_one_rep_max_weight',
+    'best_one_rep_max_reps', 'best_one_rep_max_date',
+    'best_set_volume', 'best_set_volume_date',
+    'total_volume', 'total_sets', 'total_reps',
+    'updated_at',
+]
+
+USER_STATISTICS_RECALC_FIELDS = [
+    'total_workouts', 'total_workout_duration',
+    'total_volume', 'total_sets', 'total_reps',
+    'current_streak', 'longest_streak', 'last_workout_date',
+    'total_achievements', 'total_points', 'total_prs',
+]
+
+
+def _to_decimal(value):
+    """Convert a float to a 2 decimal place Decimal for DecimalField storage."""
+    return Decimal(str(round(float(value), 2)))
+
+
+def _first_index_of_group_max(values, starts, counts):
+    """
+    Return, for every group, the index of the first row holding the group maximum.
+    Rows are in chronological order inside each group, so on ties the earliest set
+    wins - the same result as replaying sets through update_personal_record.
+    """
+    group_max = np.maximum.reduceat(values, starts)
+    is_max = values == np.repeat(group_max, counts)
+    max_positions = np.flatnonzero(is_max)
+    return max_positions[np.searchsorted(max_positions, starts)]
+
+
+def compute_personal_records(user_ids, exercise_ids, weights, reps, dates):
+    """
+    Compute personal records for rows already ordered by (user, exercise, datetime).
+
+    Uses a NumPy group-by over the (user, exercise) runs and returns a list of
+    unsaved PersonalRecord instances, one per group.
+    """
+    if not len(weights):
+        return []
+
+    weights = np.asarray(weights, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.int64)
+
+    # Group boundaries: every row where the (user, exercise) pair changes
+    user_ids_arr = np.asarray(user_ids, dtype=object)
+    exercise_ids_arr = np.asarray(exercise_ids, dtype=np.int64)
+    changed = np.empty(len(weights), dtype=bool)
+    changed[0] = True
+    changed[1:] = (user_ids_arr[1:] != user_ids_arr[:-1]) | (exercise_ids_arr[1:] != exercise_ids_arr[:-1])
+    starts = np.flatnonzero(changed)
+    counts = np.diff(np.append(starts, len(weights)))
+
+    # Brzycki 1RM, with the same 12 rep cap as PersonalRecord.calculate_one_rep_max
+    capped_reps = np.minimum(reps, 12)
+    one_rms = np.where(reps == 1, weights, weights / (1.0278 - 0.0278 * capped_reps))
+    volumes = weights * reps
+
+    best_weight_idx = _first_index_of_group_max(weights, starts, counts)
+    best_one_rm_idx = _first_index_of_group_max(one_rms, starts, counts)
+    best_volume_idx = _first_index_of_group_max(volumes, starts, counts)
+
+    total_volumes = np.add.reduceat(volumes, starts)
+    total_reps = np.add.reduceat(reps, starts)
+
+    records = []
+    for group, start in enumerate(starts):
+        w_idx = best_weight_idx[group]
+        rm_idx = best_one_rm_idx[group]
+        v_idx = best_volume_idx[group]
+        records.append(PersonalRecord(
+            user_id=user_ids[start],
+            exercise_id=int(exercise_ids_arr[start]),
+            best_weight=_to_decimal(weights[w_idx]),
+            best_weight_reps=int(reps[w_idx]),
+            best_weight_date=dates[w_idx],
+            best_one_rep_max=_to_decimal(one_rms[rm_idx]),
+            best_one_rep_max_weight=_to_decimal(weights[rm_idx]),
+            best_one_rep_max_reps=int(reps[rm_idx]),
+            best_one_rep_max_date=dates[rm_idx],
+            best_set_volume=_to_decimal(volumes[v_idx]),
+            best_set_volume_date=dates[v_idx],
+            total_volume=_to_decimal(total_volumes[group]),
+            total_sets=int(counts[group]),
+            total_reps=int(total_reps[group]),
+        ))
+    return records
+
+
+def _save_personal_records(records):
+    """Bulk upsert PersonalRecord rows on the (user, exercise) unique constraint."""
+    if not records:
+        return 0
+    PersonalRecord.objects.bulk_create(
+        records,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['user', 'exercise'],
+        update_fields=PR_REBUILD_UPDATE_FIELDS,
+    )
+    # bulk_create sends no post_save
+    for user_id in {record.user_id for record in records}:
+        touch_user_data(user_id)
+    return len(records)
+
+
+def rebuild_personal_records(user=None, batch_rows=PR_REBUILD_BATCH_ROWS):
+    """
+    Rebuild personal records from raw set history.
+
+    Streams every non-warmup set of completed workouts in a single ordered query,
+    computes best weight, best 1RM, best set volume and lifetime totals per
+    exercise and bulk upserts the PersonalRecord rows. Records of exercises
+    left without a qualifying set (all deleted, or now warmups) are deleted.
+    Pass a user to rebuild one account, or None for the whole user base.
+    Returns the number of PersonalRecord rows written.
+    """
+    sets = ExerciseSet.objects.filter(
+        workout_exercise__workout__is_done=True,
+        is_warmup=False,
+        weight__gt=0,
+        reps__gt=0,
+    )
+    if user is not None:
+        sets = sets.filter(workout_exercise__workout__user=user)
+
+    rows = sets.order_by(
+        'workout_exercise__workout__user_id',
+        'workout_exercise__exercise_id',
+        'workout_exercise__workout__datetime',
+        'id',
+    ).values_list(
+        'workout_exercise__workout__user_id',
+        'workout_exercise__exercise_id',
+        'weight',
+        'reps',
+        'workout_exercise__workout__datetime',
+    )
+
+    columns = ([], [], [], [], [])
+    written = 0
+    last_user_id = None
+
+    def flush():
+        records = compute_personal_records(*columns)
+        for column in columns:
+            column.clear()
+        return _save_personal_records(records)
+
+    with transaction.atomic():
+        for user_id, exercise_id, weight, rep_count, set_date in rows.iterator(chunk_size=2000):
+            if user_id != last_user_id and len(columns[0]) >= batch_rows:
+                written += flush()
+            last_user_id = user_id
+            columns[0].append(user_id)
+            columns[1].append(exercise_id)
+            columns[2].append(float(weight))
+            columns[3].append(rep_count)
+            columns[4].append(set_date)
+        written += flush()
+
+        stale = PersonalRecord.objects.exclude(Exists(sets.filter(
+            workout_exercise__workout__user_id=OuterRef('user_id'),
+            workout_exercise__exercise_id=OuterRef('exercise_id'),
+        )))
+        if user is not None:
+            stale = stale.filter(user=user)
+        deleted, _ = stale.delete()
+
+    logger.info(
+        f"Rebuilt {written} personal records and deleted {deleted} stale ones for "
+        f"{user.email if user is not None else 'all users'}"
+    )
+    return written
+
+
+def workout_streak_from_datetimes(datetimes):
+    """
+    Calculate a workout streak in weeks from completed workout datetimes.
+
+    A week counts toward the streak if the user worked out at least once that week.
+    Streak is broken if more than 1 week passes without any workout.
+    """
+    # Get all workout dates and convert to week identifiers (year, ISO week)
+    workout_weeks = set()
+    for workout_datetime in datetimes:
+        workout_date = workout_datetime.date()
+        year, week, _ = workout_date.isocalendar()
+        workout_weeks.add((year, week))
+
+    if not workout_weeks:
+        return 0
+
+    # Get current week
+    today = timezone.now().date()
+    current_year, current_week, _ = today.isocalendar()
+    current_week_key = (current_year, current_week)
+
+    # Check if there's a workout in current week or last week
+    last_week_date = today - timedelta(days=7)
+    last_year, last_week, _ = last_week_date.isocalendar()
+    last_week_key = (last_year, last_week)
+
+    # If no workout in current or last week, streak is broken
+    if current_week_key not in workout_weeks and last_week_key not in workout_weeks:
+        return 0
+
+    # Start from current week or last week (whichever has a workout)
+    if current_week_key in workout_weeks:
+        check_date = today
+    else:
+        check_date = last_week_date
+
+    # Count consecutive weeks going backward
+    streak = 0
+    week_date = check_date
+
+    # Go back week by week and check if that week has workouts
+    while True:
+        year, week, _ = week_date.isocalendar()
+        week_key = (year, week)
+
+        if week_key in workout_weeks:
+            streak += 1
+            # Go back 7 days to check previous week
+            week_date = week_date - timedelta(days=7)
+            # Safety check to prevent infinite loop (go back max 5 years)
+            if (today - week_date).days > 365 * 5:
+                break
+        else:
+            # No workout in this week, streak ends
+            break
+
+    return streak
+
+
+def achievement_earned_value(achievement, metrics):
+    """
+    In-memory counterpart of views.check_single_achievement.
+
+    metrics holds one user's precomputed numbers (see recalculate_users).
+    Returns the earned value, or None if the achievement is not earned.
+    """
+    category = achievement.category
+    required = float(achievement.requirement_value)
+
+    if category == 'workout_count':
+        value = metrics['workout_count']
+    elif category == 'workout_streak':
+        value = metrics['streak']
+    elif category == 'total_volume':
+        value = metrics['total_volume']
+    elif category == 'exercise_count':
+        value = metrics['exercise_count']
+    elif category in ('pr_weight', 'pr_one_rep_max'):
+        pr = metrics['prs'].get(achievement.exercise_id) if achievement.exercise_id else None
+        if pr is None:
+            return None
+        value = pr[0] if category == 'pr_weight' else pr[1]
+    else:
+        return None
+
+    if float(value) >= required:
+        return value if isinstance(value, Decimal) else Decimal(value)
+    return None
+
+
+def _pr_values(record):
+    return tuple(getattr(record, field) for field in PR_REBUILD_UPDATE_FIELDS if field != 'updated_at')
+
+
+def _recalculate_calories(user_ids, changes):
+    """Recompute calories for every workout of the given users without per-workout saves."""
+    exercise_counts = {}
+    for workout_id, category in WorkoutExercise.objects.filter(
+        workout__user_id__in=user_ids
+    ).values_list('workout_id', 'exercise__category'):
+        counts = exercise_counts.setdefault(workout_id, [0, 0])
+        counts[0 if category == 'compound' else 1] += 1
+
+    volumes = dict(
+        ExerciseSet.objects.filter(
+            workout_exercise__workout__user_id__in=user_ids,
+            is_warmup=False,
+            weight__gt=0,
+            reps__gt=0,
+        ).values('workout_exercise__workout_id').annotate(
+            volume=Sum(F('weight') * F('reps'))
+        ).values_list('workout_exercise__workout_id', 'volume')
+    )
+
+    updated = []
+    for workout in Workout.objects.filter(user_id__in=user_ids).only('id', 'user_id', 'calories_burned'):
+        if workout.id in exercise_counts:
+            compound_count, isolation_count = exercise_counts[workout.id]
+            calories = Workout.calories_from_volume(
+                float(volumes.get(workout.id) or 0), compound_count, isolation_count
+            )
+        else:
+            calories = 0
+        calories = _to_decimal(calories)
+        if workout.calories_burned != calories:
+            changes.append(f"user {workout.user_id} workout {workout.id} calories: {workout.calories_burned} -> {calories}")
+            workout.calories_burned = calories
+            updated.append(workout)
+    return updated
+
+
+def recalculate_users(user_ids, dry_run=False):
+    """
+    Recalculate calories, personal records, achievements and statistics for a chunk of users.
+
+    Every table is read with a fixed number of queries per chunk and written back in bulk.
+    With dry_run nothing is written; the returned summary lists every value that would change.
+    """
+    user_ids = list(user_ids)
+    changes = []
+    summary = {'users': len(user_ids)}
+
+    with transaction.atomic():
+        # Calories
+        workouts_to_update = _recalculate_calories(user_ids, changes)
+        summary['calories'] = len(workouts_to_update)
+
+        # Personal records
+        rows = ExerciseSet.objects.filter(
+            workout_exercise__workout__user_id__in=user_ids,
+            workout_exercise__workout__is_done=True,
+            is_warmup=False,
+            weight__gt=0,
+            reps__gt=0,
+        ).order_by(
+            'workout_exercise__workout__user_id',
+            'workout_exercise__exercise_id',
+            'workout_exercise__workout__datetime',
+            'id',
+        ).values_list(
+            'workout_exercise__workout__user_id',
+            'workout_exercise__exercise_id',
+            'weight',
+            'reps',
+            'workout_exercise__workout__datetime',
+        )
+        columns = ([], [], [], [], [])
+        for user_id, exercise_id, weight, rep_count, set_date in rows.iterator(chunk_size=2000):
+            columns[0].append(user_id)
+            columns[1].append(exercise_id)
+            columns[2].append(float(weight))
+            columns[3].append(rep_count)
+            columns[4].append(set_date)
+        new_records = compute_personal_records(*columns)
+
+        existing_records = {
+            (pr.user_id, pr.exercise_id): pr
+            for pr in PersonalRecord.objects.filter(user_id__in=user_ids)
+        }
+        changed_records = []
+        for record in new_records:
+            existing = existing_records.get((record.user_id, record.exercise_id))
+            if existing is None or _pr_values(existing) != _pr_values(record):
+                changes.append(
+                    f"user {record.user_id} exercise {record.exercise_id} personal record: "
+                    f"{existing.best_weight if existing else None} -> {record.best_weight} kg, "
+                    f"1RM {existing.best_one_rep_max if existing else None} -> {record.best_one_rep_max}"
+                )
+                changed_records.append(record)
+            existing_records[(record.user_id, record.exercise_id)] = record
+        summary['personal_records'] = len(changed_records)
+
+        # Per-user metrics shared by achievements and statistics
+        metrics = {
+            user_id: {
+                'workout_count': 0, 'duration': 0, 'datetimes': [], 'prs': {},
+                'exercise_count': 0, 'total_volume': Decimal('0'),
+                'total_sets': 0, 'total_reps': 0,
+            }
+            for user_id in user_ids
+        }
+        for user_id, workout_datetime, duration in Workout.objects.filter(
+            user_id__in=user_ids, is_done=True, is_rest_day=False
+        ).values_list('user_id', 'datetime', 'duration'):
+            user_metrics = metrics[user_id]
+            user_metrics['workout_count'] += 1
+            user_metrics['duration'] += duration
+            user_metrics['datetimes'].append(workout_datetime)
+        for user_metrics in metrics.values():
+            user_metrics['streak'] = workout_streak_from_datetimes(user_metrics['datetimes'])
+
+        for user_id, total_sets, total_reps, total_volume in ExerciseSet.objects.filter(
+            workout_exercise__workout__user_id__in=user_ids,
+            workout_exercise__workout__is_done=True,
+            is_warmup=False,
+        ).values('workout_exercise__workout__user_id').annotate(
+            total_sets=Count('id'),
+            total_reps=Sum('reps'),
+            total_volume=Sum(F('weight') * F('reps')),
+        ).values_list('workout_exercise__workout__user_id', 'total_sets', 'total_reps', 'total_volume'):
+            metrics[user_id]['total_sets'] = total_sets
+            metrics[user_id]['total_reps'] = total_reps or 0
+            metrics[user_id]['total_volume'] = _to_decimal(total_volume or 0)
+
+        for user_id, exercise_count in WorkoutExercise.objects.filter(
+            workout__user_id__in=user_ids, workout__is_done=True
+        ).values('workout__user_id').annotate(
+            exercise_count=Count('exercise', distinct=True)
+        ).values_list('workout__user_id', 'exercise_count'):
+            metrics[user_id]['exercise_count'] = exercise_count
+
+        for (user_id, exercise_id), record in existing_records.items():
+            metrics[user_id]['prs'][exercise_id] = (record.best_weight, record.best_one_rep_max)
+
+        # Achievements
+        earned = {user_id: [] for user_id in user_ids}
+        earned_ids = set()
+        for user_id, achievement_id, points in UserAchievement.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', 'achievement_id', 'achievement__points'):
+            earned[user_id].append(points)
+            earned_ids.add((user_id, achievement_id))
+        new_achievements = []
+        for achievement in Achievement.objects.filter(is_active=True):
+            for user_id in user_ids:
+                if (user_id, achievement.id) in earned_ids:
+                    continue
+                value = achievement_earned_value(achievement, metrics[user_id])
+                if value is not None:
+                    changes.append(f"user {user_id} achievement earned: {achievement.name}")
+                    new_achievements.append(UserAchievement(
+                        user_id=user_id,
+                        achievement=achievement,
+                        current_progress=achievement.requirement_value,
+                        earned_value=value,
+                    ))
+                    earned[user_id].append(achievement.points)
+        summary['achievements'] = len(new_achievements)
+
+        # Statistics
+        existing_stats = {
+            stats.user_id: stats for stats in UserStatistics.objects.filter(user_id__in=user_ids)
+        }
+        stats_to_create = []
+        stats_to_update = []
+        now = timezone.now()
+        for user_id in user_ids:
+            user_metrics = metrics[user_id]
+            stats = existing_stats.get(user_id) or UserStatistics(user_id=user_id)
+            before = {field: getattr(stats, field) for field in USER_STATISTICS_RECALC_FIELDS}
+
+            stats.total_workouts = user_metrics['workout_count']
+            stats.total_workout_duration = user_metrics['duration']
+            stats.total_volume = user_metrics['total_volume']
+            stats.total_sets = user_metrics['total_sets']
+            stats.total_reps = user_metrics['total_reps']
+            stats.current_streak = user_metrics['streak']
+            stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+            stats.last_workout_date = (
+                max(user_metrics['datetimes']).date() if user_metrics['datetimes'] else stats.last_workout_date
+            )
+            stats.total_achievements = len(earned[user_id])
+            stats.total_points = sum(earned[user_id])
+            stats.total_prs = len(user_metrics['prs'])
+
+            diff = [
+                f"{field}: {before[field]} -> {getattr(stats, field)}"
+                for field in USER_STATISTICS_RECALC_FIELDS
+                if before[field] != getattr(stats, field)
+            ]
+            if user_id not in existing_stats:
+                stats_to_create.append(stats)
+            elif diff:
+                stats.updated_at = now
+                stats_to_update.append(stats)
+            if diff:
+                changes.append(f"user {user_id} statistics: " + ', '.join(diff))
+        summary['statistics'] = len(stats_to_create) + len(stats_to_update)
+
+        if not dry_run:
+            Workout.objects.bulk_update(workouts_to_update, ['calories_burned'], batch_size=1000)
+            _save_personal_records(changed_records)
+            UserAchievement.objects.bulk_create(new_achievements, batch_size=1000, ignore_conflicts=True)
+            UserStatistics.objects.bulk_create(stats_to_create, batch_size=1000)
+            UserStatistics.objects.bulk_update(
+                stats_to_update, USER_STATISTICS_RECALC_FIELDS + ['updated_at'], batch_size=1000
+            )
+            for user_id in user_ids:
+                touch_user_data(user_id)
+
+    summary['changes'] = changes
+    return summary
@@ -21,17 +21,19 @@ from .models import (
 )
 from .serializers import (
     AchievementSerializer, UserAchievementSerializer,
-    PersonalRecordSummarySerializer,  UserStatisticsSerializer,
- 
+    PersonalRecordSerializer, PersonalRecordSummarySerializer, UserStatisticsSerializer,
 )
+from core.conditional import ConditionalGetMixin, data_version, user_data_version
 from exercise.models import Exercise
+from exercise.registry import get_registry
 from workout.models import Workout, WorkoutExercise, ExerciseSet
 from workout.permissions import is_pro_user, get_pro_response
+from .utils import rebuild_personal_records, workout_streak_from_datetimes
 
 logger = logging.getLogger('achievements')
 
 
-class AchievementListView(APIView):
+class AchievementListView(ConditionalGetMixin, APIView):
     """
     GET /api/achievements/list/
     List all available achievements with user's progress.
@@ -39,31 +41,49 @@ class AchievementListView(APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = AchievementPagination
 
+    def get_etag_parts(self, request):
+        # Progress comes from the user's workouts, PRs and statistics
+        return (
+            data_version('achievements'),
+            get_registry().digest,
+            user_data_version(request.user.id),
+        )
+
     def get(self, request):
         user = request.user
         category = request.query_params.get('category', None)
 
         # Get all active achievements
-        achievements = Achievement.objects.filter(is_active=True)
+        achievements = Achievement.objects.filter(is_active=True).select_related('exercise').order_by(
+            'category', 'order', 'requirement_value', 'id'
+        )
         if category:
             achievements = achievements.filter(category=category)
 
-        # Get user's earned achievements
-        user_achievements = UserAchievement.objects.filter(
-            user=user,
-            achievement__in=achievements
-        ).select_related('achievement')
+        # Paginate the queryset first so only the requested page is evaluated
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(achievements, request)
 
-        earned_map = {ua.achievement_id: ua for ua in user_achievements}
+        # Get user's earned achievements on this page
+        earned_map = {
+            ua.achievement_id: ua
+            for ua in UserAchievement.objects.filter(user=user, achievement__in=page)
+        }
+
+        # Progress values shared by achievements on this page, computed on first use
+        progress_cache = {}
 
         # Build progress data for each achievement
         result = []
-        for achievement in achievements:
+        for achievement in page:
             user_achievement = earned_map.get(achievement.id)
             is_earned = user_achievement is not None
 
-            # Calculate current progress
-            current_progress = self._get_achievement_progress(user, achievement)
+            # Earned achievements keep the progress stored when they were awarded
+            if is_earned:
+                current_progress = user_achievement.current_progress
+            else:
+                current_progress = self._get_achievement_progress(user, achievement, page, progress_cache)
 
             # Calculate percentage
             if achievement.requirement_value > 0:
@@ -80,47 +100,48 @@ class AchievementListView(APIView):
                 'earned_value': user_achievement.earned_value if user_achievement else None
             })
 
-        # Paginate the result list
-        paginator = self.pagination_class()
-        paginated_result = paginator.paginate_queryset(result, request)
-        return paginator.get_paginated_response(paginated_result)
+        return paginator.get_paginated_response(result)
 
-    def _get_achievement_progress(self, user, achievement):
-        """Calculate current progress for an achievement."""
+    def _get_achievement_progress(self, user, achievement, page, cache):
+        """
+        Calculate current progress for an achievement.
+        Each underlying value is queried at most once per page and kept in cache.
+        """
         category = achievement.category
 
         if category == 'workout_count':
-            return Workout.objects.filter(user=user, is_done=True, is_rest_day=False).count()
-
-        elif category == 'workout_streak':
-            stats, _ = UserStatistics.objects.get_or_create(user=user)
-            return stats.current_streak
-
-        elif category == 'pr_weight':
-            if achievement.exercise:
-                pr = PersonalRecord.objects.filter(
-                    user=user, exercise=achievement.exercise
-                ).first()
-                return pr.best_weight if pr else 0
-            return 0
-
-        elif category == 'pr_one_rep_max':
-            if achievement.exercise:
-                pr = PersonalRecord.objects.filter(
-                    user=user, exercise=achievement.exercise
-                ).first()
-                return pr.best_one_rep_max if pr else 0
-            return 0
-
-        elif category == 'total_volume':
-            stats, _ = UserStatistics.objects.get_or_create(user=user)
-            return stats.total_volume
+            if 'workout_count' not in cache:
+                cache['workout_count'] = Workout.objects.filter(user=user, is_done=True, is_rest_day=False).count()
+            return cache['workout_count']
+
+        elif category in ('workout_streak', 'total_volume'):
+            if 'stats' not in cache:
+                cache['stats'], _ = UserStatistics.objects.get_or_create(user=user)
+            stats = cache['stats']
+            return stats.current_streak if category == 'workout_streak' else stats.total_volume
+
+        elif category in ('pr_weight', 'pr_one_rep_max'):
+            if not achievement.exercise_id:
+                return 0
+            if 'prs' not in cache:
+                # One query for the PRs of every exercise referenced on this page
+                exercise_ids = {a.exercise_id for a in page if a.exercise_id}
+                cache['prs'] = {
+                    pr.exercise_id: pr
+                    for pr in PersonalRecord.objects.filter(user=user, exercise_id__in=exercise_ids)
+                }
+            pr = cache['prs'].get(achievement.exercise_id)
+            if not pr:
+                return 0
+            return pr.best_weight if category == 'pr_weight' else pr.best_one_rep_max
 
         elif category == 'exercise_count':
-            return WorkoutExercise.objects.filter(
-                workout__user=user,
-                workout__is_done=True
-            ).values('exercise').distinct().count()
+            if 'exercise_count' not in cache:
+                cache['exercise_count'] = WorkoutExercise.objects.filter(
+                    workout__user=user,
+                    workout__is_done=True
+                ).values('exercise').distinct().count()
+            return cache['exercise_count']
 
         return 0
 
@@ -152,13 +173,19 @@ class AchievementCategoriesView(APIView):
     def get(self, request):
         user = request.user
 
+        # Two grouped counts instead of two queries per category
+        totals = dict(
+            Achievement.objects.filter(is_active=True).values_list('category').annotate(n=Count('id')).order_by()
+        )
+        earned_counts = dict(
+            UserAchievement.objects.filter(user=user).values_list('achievement__category')
+            .annotate(n=Count('id')).order_by()
+        )
+
         categories = []
         for code, name in Achievement.CATEGORY_CHOICES:
-            total = Achievement.objects.filter(category=code, is_active=True).count()
-            earned = UserAchievement.objects.filter(
-                user=user,
-                achievement__category=code
-            ).count()
+            total = totals.get(code, 0)
+            earned = earned_counts.get(code, 0)
 
             categories.append({
                 'code': code,
@@ -452,9 +479,21 @@ class AllExerciseRankingsView(APIView):
             best_weight__gt=0
         ).select_related('exercise')
 
+        prs = list(prs)
+        statistics = {
+            stats.exercise_id: stats
+            for stats in ExerciseStatistics.objects.filter(exercise_id__in=[pr.exercise_id for pr in prs])
+        }
+        missing = [
+            ExerciseStatistics(exercise=pr.exercise) for pr in prs if pr.exercise_id not in statistics
+        ]
+        if missing:
+            ExerciseStatistics.objects.bulk_create(missing, ignore_conflicts=True)
+            statistics.update((stats.exercise_id, stats) for stats in missing)
+
         results = []
         for pr in prs:
-            stats, _ = ExerciseStatistics.objects.get_or_create(exercise=pr.exercise)
+            stats = statistics[pr.exercise_id]
 
             weight_pct = stats.get_user_percentile(float(pr.best_weight), 'weight')
             one_rm_pct = stats.get_user_percentile(float(pr.best_one_rep_max), 'one_rm')
@@ -574,13 +613,13 @@ class RecalculateStatisticsView(APIView):
         user = request.user
 
         with transaction.atomic():
+            # Recalculate all PRs (first, so total_prs below counts rebuilt records)
+            self._recalculate_prs(user)
+
             # Recalculate user statistics
             stats, _ = UserStatistics.objects.get_or_create(user=user)
             self._recalculate_user_stats(user, stats)
 
-            # Recalculate all PRs
-            self._recalculate_prs(user)
-
             # Check for new achievements
             new_achievements = check_all_achievements(user)
 
@@ -634,14 +673,8 @@ class RecalculateStatisticsView(APIView):
         stats.save()
 
     def _recalculate_prs(self, user):
-        """Recalculate all personal records from set data."""
-        exercises = Exercise.objects.filter(
-            workout_exercises__workout__user=user,
-            workout_exercises__workout__is_done=True
-        ).distinct()
-
-        for exercise in exercises:
-            update_personal_record(user, exercise)
+        """Recalculate all personal records from set data in a single pass."""
+        rebuild_personal_records(user=user)
 
 
 # ============== Helper Functions ==============
@@ -652,68 +685,13 @@ def calculate_workout_streak(user):
     A week counts toward the streak if the user worked out at least once that week.
     Streak is broken if more than 1 week passes without any workout.
     """
-    from datetime import timedelta
-
     workouts = Workout.objects.filter(
         user=user,
         is_done=True,
         is_rest_day=False
     ).order_by('-datetime').values_list('datetime', flat=True)
 
-    if not workouts:
-        return 0
-
-    # Get all workout dates and convert to week identifiers (year, ISO week)
-    workout_weeks = set()
-    for workout_datetime in workouts:
-        workout_date = workout_datetime.date()
-        year, week, _ = workout_date.isocalendar()
-        workout_weeks.add((year, week))
-
-    if not workout_weeks:
-        return 0
-
-    # Get current week
-    today = timezone.now().date()
-    current_year, current_week, _ = today.isocalendar()
-    current_week_key = (current_year, current_week)
-
-    # Check if there's a workout in current week or last week
-    last_week_date = today - timedelta(days=7)
-    last_year, last_week, _ = last_week_date.isocalendar()
-    last_week_key = (last_year, last_week)
-
-    # If no workout in current or last week, streak is broken
-    if current_week_key not in workout_weeks and last_week_key not in workout_weeks:
-        return 0
-
-    # Start from current week or last week (whichever has a workout)
-    if current_week_key in workout_weeks:
-        check_date = today
-    else:
-        check_date = last_week_date
-
-    # Count consecutive weeks going backward
-    streak = 0
-    week_date = check_date
-
-    # Go back week by week and check if that week has workouts
-    while True:
-        year, week, _ = week_date.isocalendar()
-        week_key = (year, week)
-
-        if week_key in workout_weeks:
-            streak += 1
-            # Go back 7 days to check previous week
-            week_date = week_date - timedelta(days=7)
-            # Safety check to prevent infinite loop (go back max 5 years)
-            if (today - week_date).days > 365 * 5:
-                break
-        else:
-            # No workout in this week, streak ends
-            break
-
-    return streak
+    return workout_streak_from_datetimes(workouts)
 
 
 def update_personal_record(user, exercise, weight=None, reps=None, set_date=None):
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('body_measurements', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='bodymeasurement',
+            index=models.Index(fields=['user', '-created_at'], name='body_measur_user_id_d783fb_idx'),
+        ),
+    ]
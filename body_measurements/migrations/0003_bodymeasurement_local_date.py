@@ -0,0 +1,48 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_local_date(apps, schema_editor):
+    BodyMeasurement = apps.get_model('body_measurements', 'BodyMeasurement')
+    Preferences = apps.get_model('user', 'Preferences')
+
+    zones = {}
+    for user_id, name in Preferences.objects.values_list('user_id', 'timezone'):
+        try:
+            zones[user_id] = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    default = ZoneInfo(settings.TIME_ZONE)
+
+    # Batches by primary key; SQLite cannot update a table it is still iterating
+    last_id = 0
+    while True:
+        batch = list(BodyMeasurement.objects.filter(id__gt=last_id).order_by('id').only('id', 'user_id', 'created_at')[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        for measurement in batch:
+            measurement.local_date = timezone.localtime(measurement.created_at, zones.get(measurement.user_id, default)).date()
+        BodyMeasurement.objects.bulk_update(batch, ['local_date'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('body_measurements', '0002_add_query_indexes'),
+        ('user', '0011_preferences_timezone_weighthistory_local_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bodymeasurement',
+            name='local_date',
+            field=models.DateField(null=True, help_text="created_at's date in the user's timezone when the measurement was written"),
+        ),
+        migrations.RunPython(backfill_local_date, migrations.RunPython.noop),
+    ]
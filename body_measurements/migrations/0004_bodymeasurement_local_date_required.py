@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('body_measurements', '0003_bodymeasurement_local_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bodymeasurement',
+            name='local_date',
+            field=models.DateField(help_text="created_at's date in the user's timezone when the measurement was written"),
+        ),
+        AddIndexConcurrently(
+            model_name='bodymeasurement',
+            index=models.Index(fields=['user', 'local_date'], name='body_measur_user_id_a5725c_idx'),
+        ),
+    ]
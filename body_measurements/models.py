@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from core.models import TimestampedModel
 from user.models import CustomUser
+from user.timezones import local_date as to_local_date
 import math
 
 class BodyMeasurement(TimestampedModel):
@@ -21,9 +22,14 @@ class BodyMeasurement(TimestampedModel):
     
     # Optional notes
     notes = models.TextField(blank=True, null=True)
+    local_date = models.DateField(help_text="created_at's date in the user's timezone when the measurement was written")
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'local_date']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.created_at.date()} - {self.body_fat_percentage}% BF"
@@ -95,4 +101,6 @@ class BodyMeasurement(TimestampedModel):
                 self.body_fat_percentage = None
             else:
                 self.body_fat_percentage = self.calculate_body_fat_navy_method()
+        if self.local_date is None:
+            self.local_date = to_local_date(self.user, self.created_at or timezone.now())
         super().save(*args, **kwargs)
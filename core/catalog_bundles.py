@@ -0,0 +1,161 @@
+"""
+Pre-rendered catalog bundles served by nginx.
+
+build_bundles renders each catalog with the serializer its API endpoint uses
+to STATIC_ROOT/catalog/<name>.<hash>.json, next to a gzip variant for nginx's
+gzip_static, and writes manifest.json last so it only names files that exist.
+The hash is of the JSON bytes, so a URL never changes content and nginx can
+send it with a year-long immutable Cache-Control. Clients fetch the manifest
+from /api/catalog/manifest/ and download a bundle again when its hash moves.
+
+TrainingResearch is a PRO feature, so its bundle goes to catalog/pro/, which
+nginx does not serve publicly; /api/catalog/<name>/<hash>/ checks the subscription
+and hands the file to nginx with X-Accel-Redirect.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+BUNDLE_DIR = 'catalog'
+PRO_DIR = 'pro'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 16
+
+_manifest_cache = {'stamp': None, 'manifest': None}
+
+
+def _exercises():
+    from exercise.registry import get_registry
+
+    registry = get_registry()
+    return [registry.serialized[record.id] for record in registry.records.values() if record.is_active]
+
+
+def _supplements():
+    from supplements.models import Supplement
+    from supplements.serializers import SupplementSerializer
+
+    return SupplementSerializer(Supplement.objects.filter(is_active=True).order_by('id'), many=True).data
+
+
+def _achievements():
+    from achievements.models import Achievement
+    from achievements.serializers import AchievementSerializer
+
+    achievements = Achievement.objects.filter(is_active=True).select_related('exercise').order_by(
+        'category', 'order', 'requirement_value', 'id'
+    )
+    return AchievementSerializer(achievements, many=True).data
+
+
+def _research():
+    from workout.models import TrainingResearch
+    from workout.serializers import TrainingResearchSerializer
+
+    research = TrainingResearch.objects.filter(is_active=True).order_by('-priority', '-confidence_score', 'id')
+    return TrainingResearchSerializer(research, many=True).data
+
+
+# name: (items, PRO only)
+BUNDLES = {
+    'exercises': (_exercises, False),
+    'supplements': (_supplements, False),
+    'achievements': (_achievements, False),
+    'research': (_research, True),
+}
+
+
+def bundle_root():
+    return os.path.join(settings.STATIC_ROOT, BUNDLE_DIR)
+
+
+def manifest_path():
+    return os.path.join(bundle_root(), MANIFEST_NAME)
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.part', delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+def render_bundle(name):
+    """The bundle's JSON bytes, encoded the way the API renders them."""
+    items, _ = BUNDLES[name]
+    return JSONRenderer().render(items())
+
+
+def build_bundles(names=None):
+    """
+    Render the bundles and write the manifest. Returns (manifest, written):
+    written lists the files that did not already exist with the same hash.
+    """
+    root = bundle_root()
+    manifest = read_manifest() or {}
+    written = []
+    for name in names or BUNDLES:
+        _, pro_only = BUNDLES[name]
+        payload = render_bundle(name)
+        digest = hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+        file_name = f'{name}.{digest}.json'
+        if pro_only:
+            file_name = f'{PRO_DIR}/{file_name}'
+        path = os.path.join(root, file_name)
+        if not os.path.exists(path):
+            # Fixed mtime keeps the gzip bytes reproducible
+            _write_atomic(path + '.gz', gzip.compress(payload, compresslevel=9, mtime=0))
+            _write_atomic(path, payload)
+            written.append(file_name)
+        manifest[name] = {
+            'hash': digest,
+            'file': file_name,
+            'bytes': len(payload),
+            'pro_only': pro_only,
+        }
+    _write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest, written
+
+
+def prune_bundles(manifest):
+    """Delete bundle files the manifest no longer names. Returns the removed paths."""
+    keep = set()
+    for entry in manifest.values():
+        keep.update((entry['file'], entry['file'] + '.gz'))
+    removed = []
+    root = bundle_root()
+    for directory in (root, os.path.join(root, PRO_DIR)):
+        if not os.path.isdir(directory):
+            continue
+        for file_name in os.listdir(directory):
+            relative = os.path.relpath(os.path.join(directory, file_name), root)
+            if relative.endswith(('.json', '.json.gz')) and relative != MANIFEST_NAME and relative not in keep:
+                os.unlink(os.path.join(root, relative))
+                removed.append(relative)
+    return sorted(removed)
+
+
+def read_manifest():
+    """The current manifest, re-read only when the file changes; None before the first build."""
+    path = manifest_path()
+    try:
+        stamp = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if _manifest_cache['stamp'] != stamp:
+        with open(path, 'rb') as f:
+            _manifest_cache['manifest'] = json.load(f)
+        _manifest_cache['stamp'] = stamp
+    return dict(_manifest_cache['manifest'])
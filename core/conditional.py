@@ -0,0 +1,153 @@
+"""
+Conditional GET (ETag / If-None-Match) for APIViews, driven by version stamps.
+
+A view using ConditionalGetMixin returns the values its response depends on
+from get_etag_parts: catalog digests or versions, the user's data version, ids
+from the URL. Their hash, together with the path and query string, is the
+ETag. The check runs after authentication, permissions and throttling, and
+before the handler. A matching If-None-Match is answered with 304 without
+running the view's queries or serializers.
+
+Data versions are random tokens in the shared cache, one per catalog
+(data_version('supplements')) and one per user (user_data_version). Saves
+replace the token once their transaction commits; a token that was evicted
+is simply regenerated, so an old ETag can never match it again.
+"""
+import hashlib
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _version_key(scope):
+    return f'data_version:{scope}'
+
+
+def data_version(scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _rotate(scope):
+    cache.set(_version_key(scope), uuid.uuid4().hex, None)
+
+
+def touch_data(scope):
+    """New data version for scope once the current transaction commits."""
+    transaction.on_commit(lambda: _rotate(scope))
+
+
+def user_data_version(user_id):
+    """Version of everything a user's workouts, PRs and achievement progress are built from."""
+    return data_version(f'user:{user_id}')
+
+
+def touch_user_data(user_id):
+    if user_id is not None:
+        touch_data(f'user:{user_id}')
+
+
+_owner_lookups = threading.local()
+
+
+def _touch_owners(lookups):
+    # Runs after the writes committed
+    for (model, user_field), pks in lookups.items():
+        for user_id in model.objects.filter(pk__in=pks).values_list(user_field, flat=True).distinct():
+            _rotate(f'user:{user_id}')
+
+
+def _flush_owner_lookups():
+    lookups, _owner_lookups.pending = getattr(_owner_lookups, 'pending', {}), None
+    _touch_owners(lookups)
+
+
+def touch_user_data_of(model, pk, user_field):
+    """
+    New data version for the user owning the model row pk (found through
+    user_field) once the current transaction commits. For receivers on rows
+    that only reach their user through a parent, like sets and workout
+    exercises: rows are collected per transaction and their owners looked up
+    with one query per model at commit, not one per saved row. Rows deleted
+    by then resolve to no one; the deleted parent's own receiver covers them.
+    """
+    if pk is None:
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _touch_owners({(model, user_field): {pk}})
+        return
+    pending = getattr(_owner_lookups, 'pending', None)
+    # A rolled back transaction drops the flush with its other callbacks
+    if pending is None or not any(func is _flush_owner_lookups for _, func, _ in connection.run_on_commit):
+        pending = _owner_lookups.pending = defaultdict(set, pending or {})
+        transaction.on_commit(_flush_owner_lookups)
+    pending[(model, user_field)].add(pk)
+
+
+def unshared_versions_warning():
+    """
+    Warning for commands that change user data outside the web processes when
+    their cache is process-private, so the versions they rotate never reach
+    the web tier; None when the cache is shared.
+    """
+    if settings.REDIS_URL:
+        return None
+    return (
+        'REDIS_URL is not set: data versions rotated here stay in this process and clients may keep '
+        'getting 304 for stale data. Run the command where the web processes\' cache is configured.'
+    )
+
+
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin:
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        """
+        Values the GET response depends on besides path and query string.
+        Return None to skip conditional handling for this request.
+        """
+        raise NotImplementedError('.get_etag_parts() must be overridden')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        parts = self.get_etag_parts(request, *args, **kwargs)
+        if parts is None:
+            return
+        key = repr((request.path, sorted(request.query_params.lists()), parts))
+        self.etag = f'"{hashlib.sha1(key.encode()).hexdigest()[:24]}"'
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if '*' in etags or self.etag in (etag.removeprefix('W/') for etag in etags):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Cache-Control'] = CACHE_CONTROL
+        return response
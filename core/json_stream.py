@@ -0,0 +1,136 @@
+"""
+Incremental JSON reader for documents too large to json.load at once.
+
+The document is read in fixed-size chunks and only the value currently being
+parsed is kept in memory: top-level object members and array elements are
+decoded one at a time with json.JSONDecoder.raw_decode.
+
+    for name, value in iter_json_object(fp):
+        # value is a lazy iterator for arrays, a decoded value otherwise
+"""
+import codecs
+import json
+import re
+
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+NUMBER_TAIL = re.compile(r'[0-9+\-.eE]*')
+
+
+class JSONStreamReader:
+    def __init__(self, fp, chunk_size=JSON_STREAM_CHUNK_SIZE, progress=None):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._progress = progress
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    def _fill(self):
+        data = self._fp.read(self._chunk_size)
+        if isinstance(data, bytes):
+            self.bytes_read += len(data)
+            text = self._utf8.decode(data, final=not data)
+        else:
+            self.bytes_read += len(data.encode('utf-8'))
+            text = data
+        if not data:
+            self._eof = True
+        # Drop everything already parsed so the buffer only holds the current value
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        if self._progress is not None and data:
+            self._progress(self.bytes_read)
+
+    def _peek(self):
+        """Next non-whitespace character, or '' at the end of the document."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos:self._pos + 1]
+            self._fill()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f'Expecting {char!r}', self._buffer, self._pos)
+        self._pos += 1
+
+    def read_value(self):
+        """Decode the next complete value, reading more input until it is available."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+            # A number cut off by the chunk boundary ("12" of "125.5") decodes
+            # fine, so read on until something other than number characters follows
+            if (
+                type(value) in (int, float) and not self._eof
+                and NUMBER_TAIL.match(self._buffer, end).end() == len(self._buffer)
+            ):
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self):
+        """Yield the elements of the array at the current position one at a time."""
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos - 1)
+
+    def iter_object(self):
+        """
+        Yield (name, value) for the members of the object at the current position.
+        Array values are lazy iterators; whatever the caller leaves unread is
+        skipped before the next member is parsed.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            name = self.read_value()
+            if not isinstance(name, str):
+                raise json.JSONDecodeError('Expecting property name', self._buffer, self._pos)
+            self._expect(':')
+            if self._peek() == '[':
+                elements = self.iter_array()
+                yield name, elements
+                for _ in elements:
+                    pass
+            else:
+                yield name, self.read_value()
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos - 1)
+
+
+def iter_json_object(fp, chunk_size=JSON_STREAM_CHUNK_SIZE, progress=None):
+    """Stream the members of a top-level JSON object; progress(bytes_read) is called after every read."""
+    return JSONStreamReader(fp, chunk_size, progress).iter_object()
+
+
+def iter_json_array(fp, chunk_size=JSON_STREAM_CHUNK_SIZE, progress=None):
+    """Stream the elements of a top-level JSON array; progress(bytes_read) is called after every read."""
+    return JSONStreamReader(fp, chunk_size, progress).iter_array()
@@ -0,0 +1,213 @@
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework.views import APIView
+
+from achievements.models import PersonalRecord
+from core.metrics import QueryTimer
+from core.reports import run_metadata
+from user.models import CustomUser
+from user.tokens import EntitlementRefreshToken
+from workout.models import ExerciseSet, Workout
+
+# name, path, query params; {workout_id}, {exercise_id} and {year} are filled in per user
+ENDPOINTS = [
+    ('workout_list', '/api/workout/list/', {}),
+    ('workout_list_page_5', '/api/workout/list/', {'page': 5}),
+    ('workout_detail', '/api/workout/list/{workout_id}/', {}),
+    ('workout_summary', '/api/workout/{workout_id}/summary/', {}),
+    ('calendar_year', '/api/workout/calendar/', {'year': '{year}'}),
+    ('calendar_stats', '/api/workout/calendar/stats/', {'year': '{year}'}),
+    ('available_years', '/api/workout/years/', {}),
+    ('exercise_1rm_history', '/api/workout/exercise/{exercise_id}/1rm-history/', {}),
+    ('exercise_set_history', '/api/workout/exercise/{exercise_id}/set-history/', {}),
+    ('exercise_last_workout', '/api/workout/exercise/{exercise_id}/last-workout/', {}),
+    ('recovery_status', '/api/workout/recovery/status/', {}),
+    ('recovery_recommendations', '/api/workout/recommendations/recovery/', {}),
+    ('frequency_recommendations', '/api/workout/recommendations/frequency/', {}),
+    ('volume_analysis', '/api/workout/volume-analysis/', {}),
+    ('template_list', '/api/workout/template/list/', {}),
+    ('achievement_list', '/api/achievements/list/', {}),
+    ('earned_achievements', '/api/achievements/earned/', {}),
+    ('achievement_categories', '/api/achievements/categories/', {}),
+    ('personal_records', '/api/achievements/prs/', {}),
+    ('user_statistics', '/api/achievements/stats/', {}),
+    ('exercise_rankings', '/api/achievements/rankings/', {}),
+    ('leaderboard', '/api/achievements/leaderboard/{exercise_id}/', {}),
+    ('profile', '/api/user/me/', {}),
+    ('weight_history', '/api/user/weight/history/', {}),
+    ('weight_trend', '/api/user/weight/trend/', {}),
+    ('body_measurements', '/api/measurements/', {}),
+    ('user_supplements', '/api/supplements/user/list/', {}),
+    ('supplement_logs_today', '/api/supplements/user/log/today/', {}),
+    ('data_export', '/api/user/data/export/', {}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the major GET endpoints through the Django test client against users created by '
+        'generate_synthetic_data. Reports p50/p95 latency, queries and peak memory per endpoint as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Seed the users were generated with'
+        )
+        parser.add_argument(
+            '--email-prefix',
+            type=str,
+            default='synthetic',
+            help='Email prefix the users were generated with'
+        )
+        parser.add_argument(
+            '--sample-users',
+            type=int,
+            default=5,
+            help='Users the requests are spread over (PRO users first, so PRO-only endpoints are measured)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Timed requests per endpoint'
+        )
+        parser.add_argument(
+            '--endpoints',
+            type=str,
+            default='',
+            help='Comma separated endpoint names to run (default: all)'
+        )
+        parser.add_argument(
+            '--cold-cache',
+            action='store_true',
+            help='Clear the cache before every request'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='',
+            help='Write the JSON report to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        users = list(
+            CustomUser.objects.filter(email__startswith=f"{options['email_prefix']}-{options['seed']}-")
+            .order_by('-is_pro', 'email')[:options['sample_users']]
+        )
+        if not users:
+            raise CommandError('No synthetic users found; run generate_synthetic_data first')
+
+        endpoints = ENDPOINTS
+        if options['endpoints']:
+            names = set(options['endpoints'].split(','))
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in names]
+
+        hosts = [host for host in settings.ALLOWED_HOSTS if host != '*']
+        client = Client(SERVER_NAME=hosts[0].lstrip('.') if hosts else 'testserver')
+        contexts = [self._context(user) for user in users]
+
+        # Repeated requests would otherwise measure the 429 path
+        throttle_classes = APIView.throttle_classes
+        APIView.throttle_classes = ()
+        try:
+            results = {
+                name: self._benchmark(client, contexts, path, params, options)
+                for name, path, params in endpoints
+            }
+        finally:
+            APIView.throttle_classes = throttle_classes
+
+        report = {
+            **run_metadata(),
+            'dataset': {
+                'users': CustomUser.objects.count(),
+                'workouts': Workout.objects.count(),
+                'sets': ExerciseSet.objects.count(),
+                'sample_users': len(users),
+                'sample_user_workouts': Workout.objects.filter(user__in=users).count(),
+            },
+            'iterations': options['iterations'],
+            'cold_cache': options['cold_cache'],
+            'endpoints': results,
+        }
+
+        for name, result in results.items():
+            self.stderr.write(
+                f"{name:>26}: p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  "
+                f"queries {result['queries_max']:4}  peak {result['peak_memory_kb']:9.0f}KB  {result['status']}"
+            )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"\nCompleted! Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _context(self, user):
+        workout = Workout.objects.filter(user=user, is_done=True).order_by('-datetime').first()
+        record = PersonalRecord.objects.filter(user=user).order_by('-best_one_rep_max').first()
+        return {
+            'headers': {'HTTP_AUTHORIZATION': f'Bearer {EntitlementRefreshToken.for_user(user).access_token}'},
+            'values': {
+                'workout_id': workout.id if workout else 0,
+                'exercise_id': record.exercise_id if record else 0,
+                'year': timezone.now().year,
+            },
+        }
+
+    def _request(self, client, context, path, params):
+        values = context['values']
+        url = path.format(**values)
+        data = {key: str(value).format(**values) for key, value in params.items()}
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = client.get(url, data, **context['headers'])
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        return time.perf_counter() - started, timer.queries, response.status_code
+
+    def _benchmark(self, client, contexts, path, params, options):
+        durations, queries, statuses = [], [], set()
+        for i in range(options['iterations']):
+            if options['cold_cache']:
+                cache.clear()
+            duration, query_count, status_code = self._request(client, contexts[i % len(contexts)], path, params)
+            durations.append(duration * 1000)
+            queries.append(query_count)
+            statuses.add(status_code)
+
+        # Peak memory from one extra request; tracing slows requests down too much to time them
+        if options['cold_cache']:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            self._request(client, contexts[0], path, params)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'path': path,
+            'status': sorted(statuses),
+            'p50_ms': round(float(np.percentile(durations, 50)), 2),
+            'p95_ms': round(float(np.percentile(durations, 95)), 2),
+            'max_ms': round(max(durations), 2),
+            'queries_mean': round(sum(queries) / len(queries), 1),
+            'queries_max': max(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from utrack.logging_handlers import (
+    JSONFormatter, ProcessRotatingFileHandler, RoutingQueueHandler, RoutingQueueListener
+)
+from utrack.middleware import RequestResponseLogMiddleware
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark RequestResponseLogMiddleware overhead per request, writing through '
+        'the background logging queue and directly to a file handler. Logs go to a temporary file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20000,
+            help='Requests per run'
+        )
+        parser.add_argument(
+            '--sample-rate',
+            type=float,
+            default=0.01,
+            help='REQUEST_BODY_LOG_SAMPLE_RATE used for the run'
+        )
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        factory = RequestFactory()
+        body = json.dumps({'reps': 8, 'weight': 100, 'is_warmup': False})
+        requests = [
+            factory.get('/api/workout/active/') if i % 2 else
+            factory.post('/api/workout/exercise/1/add_set/', body, content_type='application/json')
+            for i in range(count)
+        ]
+
+        def view(request):
+            return JsonResponse({'ok': True})
+
+        request_logger = logging.getLogger('utrack.requests')
+        saved_handlers = request_logger.handlers
+
+        with tempfile.TemporaryDirectory() as log_dir, \
+                override_settings(REQUEST_BODY_LOG_SAMPLE_RATE=options['sample_rate']):
+            handler = ProcessRotatingFileHandler(os.path.join(log_dir, 'requests.log'), maxBytes=50 * 1024 * 1024)
+            handler.setFormatter(JSONFormatter())
+            try:
+                baseline = self._run(view, requests)
+
+                request_logger.handlers = [handler]
+                direct = self._run(RequestResponseLogMiddleware(view), requests)
+
+                log_queue = queue.SimpleQueue()
+                listener = RoutingQueueListener(log_queue)
+                request_logger.handlers = [RoutingQueueHandler(log_queue, [handler])]
+                listener.start()
+                queued = self._run(RequestResponseLogMiddleware(view), requests)
+                drain_started = time.perf_counter()
+                listener.stop()
+                drained = time.perf_counter() - drain_started
+            finally:
+                request_logger.handlers = saved_handlers
+                handler.close()
+
+        for label, elapsed in (('no logging', baseline), ('direct file', direct), ('queued', queued)):
+            self.stdout.write(
+                f'{label:>11}: {elapsed / count * 1e6:7.1f} us/request, '
+                f'overhead {(elapsed - baseline) / count * 1e6:6.1f} us/request'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCompleted! {count} requests; the listener thread needed another {drained:.2f}s to drain the queue'
+            )
+        )
+
+    def _run(self, handler, requests):
+        started = time.perf_counter()
+        for request in requests:
+            # Fresh attribute state per request, as Django would give it
+            request.__dict__.pop('log_body', None)
+            handler(request)
+        return time.perf_counter() - started
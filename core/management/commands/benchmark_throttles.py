@@ -0,0 +1,91 @@
+import pickle
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.settings import api_settings
+from rest_framework.throttling import UserRateThrottle
+
+from user.models import CustomUser
+from utrack.throttles import GCRARateThrottle
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark allow_request for DRF's request-history throttle against the GCRA throttles in "
+        'utrack/throttles.py, per configured scope, on the configured cache. Each key is driven at --load '
+        'times its rate on a simulated clock, so the history list holds about one period of requests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Timed allow_request calls per scope and implementation'
+        )
+        parser.add_argument(
+            '--load',
+            type=float,
+            default=1.0,
+            help='Request rate as a multiple of the scope rate (above 1 some requests are throttled)'
+        )
+        parser.add_argument(
+            '--scopes',
+            type=str,
+            default='',
+            help='Comma separated scopes to run (default: all in DEFAULT_THROTTLE_RATES)'
+        )
+
+    def handle(self, *args, **options):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        scopes = options['scopes'].split(',') if options['scopes'] else list(rates)
+        unknown = [scope for scope in scopes if scope not in rates]
+        if unknown:
+            raise CommandError(f"Unknown scopes: {', '.join(unknown)}")
+
+        request = RequestFactory().get('/')
+        request.user = CustomUser(id=0, email='throttle-benchmark@example.com')
+        self.stdout.write(f"{'scope':>16} {'rate':>10} {'impl':>7} {'p50 us':>8} {'mean us':>8} {'entry B':>8} {'allowed':>8}")
+        for scope in scopes:
+            for name, base in (('history', UserRateThrottle), ('gcra', GCRARateThrottle)):
+                result = self._benchmark(scope, base, request, options)
+                self.stdout.write(
+                    f"{scope:>16} {rates[scope]:>10} {name:>7} {result['p50_us']:8.1f} {result['mean_us']:8.1f} "
+                    f"{result['entry_bytes']:8} {result['allowed']:8.0%}"
+                )
+        self.stdout.write(self.style.SUCCESS(f'\nCompleted! {len(scopes)} scopes on {settings.CACHES["default"]["BACKEND"]}'))
+
+    def _benchmark(self, scope, base, request, options):
+        clock = [time.time()]
+        bases = (base,) if base is UserRateThrottle else (base, UserRateThrottle)
+        throttle_class = type('BenchmarkThrottle', bases, {'scope': scope, 'timer': staticmethod(lambda: clock[0])})
+        throttle = throttle_class()
+        step = throttle.duration / throttle.num_requests / options['load']
+
+        cache.delete(throttle.get_cache_key(request, None))
+        # Fill one period of history before timing
+        for _ in range(throttle.num_requests):
+            throttle_class().allow_request(request, None)
+            clock[0] += step
+
+        durations, allowed = [], 0
+        for _ in range(options['iterations']):
+            throttle = throttle_class()
+            started = time.perf_counter()
+            allowed += throttle.allow_request(request, None)
+            durations.append((time.perf_counter() - started) * 1_000_000)
+            clock[0] += step
+
+        key = throttle.get_cache_key(request, None)
+        entry = cache.get(key)
+        cache.delete(key)
+        return {
+            'p50_us': float(np.percentile(durations, 50)),
+            'mean_us': sum(durations) / len(durations),
+            'entry_bytes': len(pickle.dumps(entry)),
+            'allowed': allowed / options['iterations'],
+        }
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_bundles import BUNDLES, build_bundles, manifest_path, prune_bundles
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the exercise, supplement, achievement and training research catalogs to content-hashed JSON '
+        'files with gzip variants under STATIC_ROOT/catalog/, and update the manifest served by '
+        '/api/catalog/manifest/. Unchanged catalogs keep their files; run after deploys and catalog edits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bundles',
+            type=str,
+            default='',
+            help=f'Comma separated bundles to build (default: all of {", ".join(BUNDLES)})'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete bundle files the new manifest no longer names (clients holding an older manifest get 404s)'
+        )
+
+    def handle(self, *args, **options):
+        names = None
+        if options['bundles']:
+            names = options['bundles'].split(',')
+            unknown = [name for name in names if name not in BUNDLES]
+            if unknown:
+                raise CommandError(f'Unknown bundles: {", ".join(unknown)}')
+
+        started = time.perf_counter()
+        manifest, written = build_bundles(names)
+        for name in names or BUNDLES:
+            entry = manifest[name]
+            self.stdout.write(f"{name:>12}: {entry['file']} ({entry['bytes']} bytes)")
+
+        removed = prune_bundles(manifest) if options['prune'] else []
+        for file_name in removed:
+            self.stdout.write(f'Removed {file_name}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\nCompleted! {len(written)} new bundles, {len(removed)} files pruned in {elapsed:.2f}s; '
+            f'manifest at {manifest_path()}'
+        ))
@@ -0,0 +1,110 @@
+from datetime import timedelta
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.synthetic import catalogs, seed_user_data
+from user.models import CustomUser
+
+SYNTHETIC_PASSWORD = 'synthetic-password'
+
+
+def synthetic_email(prefix, seed, index):
+    return f'{prefix}-{seed}-{index}@example.com'
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate N synthetic users with M years of workouts, sets, personal records, weight history, '
+        'measurements and supplement logs ending today, written with bulk inserts. The same --seed always produces '
+        'the same data; users that already exist are left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10,
+            help='Number of users to generate'
+        )
+        parser.add_argument(
+            '--years',
+            type=float,
+            default=1.0,
+            help='Years of history per user'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Seed for the random generator (also part of the generated emails)'
+        )
+        parser.add_argument(
+            '--workouts-per-week',
+            type=float,
+            default=4.0,
+            help='Average workouts per week'
+        )
+        parser.add_argument(
+            '--pro-fraction',
+            type=float,
+            default=0.3,
+            help='Fraction of users with an active PRO subscription'
+        )
+        parser.add_argument(
+            '--email-prefix',
+            type=str,
+            default='synthetic',
+            help='Users are named <prefix>-<seed>-<n>@example.com'
+        )
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        prefix = options['email_prefix']
+        days = int(options['years'] * 365)
+
+        catalog = catalogs()
+        if not catalog[0]:
+            raise CommandError('No exercises found; run populate_exercises (and populate_supplements) first')
+
+        emails = [synthetic_email(prefix, seed, index) for index in range(options['users'])]
+        existing = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+        password = make_password(SYNTHETIC_PASSWORD)
+        pro_rng = random.Random(f'{seed}-pro')
+        pro_until = timezone.now() + timedelta(days=365)
+        # bulk_create skips the post_save receivers; the importer creates the profile,
+        # preferences and statistics rows itself
+        users = []
+        for email in emails:
+            is_pro = pro_rng.random() < options['pro_fraction']
+            if email not in existing:
+                users.append(CustomUser(
+                    email=email, password=password, is_verified=True,
+                    is_pro=is_pro, pro_until=pro_until if is_pro else None,
+                ))
+        CustomUser.objects.bulk_create(users)
+        self.stdout.write(f'{len(existing)} users already exist, generating {len(users)}')
+
+        by_email = {user.email: user for user in users}
+        totals = {}
+        started = time.perf_counter()
+        for index, email in enumerate(emails):
+            user = by_email.get(email)
+            if user is None:
+                continue
+            summary = seed_user_data(
+                user,
+                seed=f'{seed}-{index}',
+                days=days,
+                workouts_per_week=options['workouts_per_week'],
+                catalog=catalog,
+            )
+            for key, value in summary.items():
+                totals[key] = totals.get(key, 0) + value
+            self.stdout.write(f'{email}: {summary}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\nCompleted! {len(users)} users in {elapsed:.1f}s: {totals}'))
@@ -0,0 +1,474 @@
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import Resolver404, resolve
+
+from core.reports import run_metadata
+from core.synthetic import catalogs, seed_user_data
+from exercise.models import Exercise
+from user.models import CustomUser
+from user.tokens import EntitlementRefreshToken
+from workout.models import Workout
+
+SIMULATION_PASSWORD = 'simulation-password'
+
+# Substrings of a server traceback -> error class; the first match wins
+ERROR_CLASSES = (
+    ('deadlock', ('deadlock detected',)),
+    ('serialization_failure', ('could not serialize access',)),
+    ('lock_timeout', ('database is locked', 'lock timeout', 'canceling statement due to lock timeout')),
+    ('integrity_error', ('IntegrityError',)),
+)
+_SERVER_ERROR = re.compile(r'Internal Server Error: (\S+)')
+
+# Statements waiting on a lock, sampled while the simulation runs
+LOCK_WAITS_SQL = """
+    SELECT left(regexp_replace(query, '\\s+', ' ', 'g'), 160)
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND wait_event_type = 'Lock'
+"""
+DEADLOCKS_SQL = 'SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()'
+
+
+def endpoint_name(path):
+    try:
+        return resolve(path).url_name or path
+    except Resolver404:
+        return path
+
+
+def classify_server_errors(log):
+    """{endpoint name: Counter(error class)} for every 500 logged by django.request."""
+    errors = defaultdict(Counter)
+    path, block = None, []
+
+    def close():
+        if path is None:
+            return
+        text = '\n'.join(block)
+        for error_class, markers in ERROR_CLASSES:
+            if any(marker in text for marker in markers):
+                break
+        else:
+            error_class = 'other'
+        errors[endpoint_name(path)][error_class] += 1
+
+    for line in log.splitlines():
+        match = _SERVER_ERROR.search(line)
+        if match:
+            close()
+            path, block = match.group(1), []
+        elif path is not None:
+            block.append(line)
+    close()
+    return errors
+
+
+class VirtualUser:
+    """One user working through scripted workout sessions against the server."""
+
+    def __init__(self, base_url, token, exercise_ids, seed, options, record):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        self.rng = random.Random(seed)
+        self.exercise_ids = exercise_ids
+        self.options = options
+        self.record = record
+
+    def request(self, method, path, data=None):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, json=data, timeout=self.options['timeout'])
+            status_code = response.status_code
+        except requests.RequestException as e:
+            response, status_code = None, type(e).__name__
+        self.record(endpoint_name(path), status_code, time.perf_counter() - started)
+        if response is not None and response.ok and response.content:
+            try:
+                return response.json()
+            except ValueError:
+                return None
+        return None
+
+    def think(self):
+        think_time = self.options['think_time']
+        if think_time:
+            time.sleep(self.rng.uniform(0.5, 1.5) * think_time)
+
+    def run_session(self):
+        """True if the session got as far as completing its workout."""
+        self.request('GET', '/api/workout/active/')
+        workout = self.request('POST', '/api/workout/create/', {'title': 'Live session'})
+        if not workout:
+            return False
+        started = time.monotonic()
+
+        exercise_ids = self.rng.sample(self.exercise_ids, min(self.options['exercises'], len(self.exercise_ids)))
+        for exercise_id in exercise_ids:
+            workout_exercise = self.request(
+                'POST', f"/api/workout/{workout['id']}/add_exercise/", {'exercise_id': exercise_id}
+            )
+            if not workout_exercise:
+                continue
+            weight = self.rng.choice((20, 40, 60, 80, 100))
+            for set_index in range(self.options['sets']):
+                self.think()
+                self.request('POST', f"/api/workout/exercise/{workout_exercise['id']}/add_set/", {
+                    'reps': self.rng.randint(5, 12),
+                    'weight': weight,
+                    'rest_time_before_set': self.rng.randint(60, 180) if set_index else 0,
+                    'reps_in_reserve': self.rng.randint(0, 3),
+                    'is_warmup': False,
+                })
+                self.request('GET', '/api/workout/active/rest-timer/')
+            self.request('GET', '/api/workout/active/')
+
+        completed = self.request('POST', f"/api/workout/{workout['id']}/complete/", {
+            'duration': int(time.monotonic() - started) + 1,
+            'intensity': 'medium',
+        })
+        return completed is not None
+
+    def run(self, sessions, results):
+        for _ in range(sessions):
+            results.append(self.run_session())
+
+
+class LockWaitSampler(threading.Thread):
+    """Samples Postgres backends waiting on a lock until stopped."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.samples = 0
+        self.waiting = []
+        self.statements = Counter()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                with connection.cursor() as cursor:
+                    cursor.execute(LOCK_WAITS_SQL)
+                    rows = cursor.fetchall()
+                self.samples += 1
+                self.waiting.append(len(rows))
+                self.statements.update(row[0] for row in rows)
+                self.stopped.wait(self.interval)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate concurrent live workout sessions: start a local gunicorn server (WSGI, or ASGI with --asgi) '
+        'against the configured database, drive virtual users through create/add_exercise/add_set/rest-timer/'
+        'active/complete with think time, and report throughput, tail latency, lock waits and '
+        'deadlock/integrity errors per endpoint as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='Concurrent virtual users'
+        )
+        parser.add_argument(
+            '--sessions',
+            type=int,
+            default=1,
+            help='Workout sessions per virtual user'
+        )
+        parser.add_argument(
+            '--exercises',
+            type=int,
+            default=4,
+            help='Exercises per session'
+        )
+        parser.add_argument(
+            '--sets',
+            type=int,
+            default=3,
+            help='Sets logged per exercise'
+        )
+        parser.add_argument(
+            '--think-time',
+            type=float,
+            default=5.0,
+            help='Mean seconds between sets (uniform 0.5x-1.5x); keep it above ~2s or the burst throttle answers 429'
+        )
+        parser.add_argument(
+            '--ramp-up',
+            type=float,
+            default=10.0,
+            help='Seconds over which the virtual users start'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Seed for the virtual users\' choices'
+        )
+        parser.add_argument(
+            '--email-prefix',
+            type=str,
+            default='loadtest',
+            help='Virtual users are <prefix>-<n>@example.com, created if missing'
+        )
+        parser.add_argument(
+            '--history-days',
+            type=int,
+            default=0,
+            help='Days of synthetic history to give newly created virtual users'
+        )
+        parser.add_argument(
+            '--url',
+            type=str,
+            default='',
+            help='Run against an already running server instead of starting one (server errors are not classified)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=3,
+            help='gunicorn workers'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='gunicorn threads per worker (WSGI only)'
+        )
+        parser.add_argument(
+            '--asgi',
+            action='store_true',
+            help='Serve utrack.asgi through uvicorn workers instead of utrack.wsgi'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30.0,
+            help='Client timeout per request in seconds'
+        )
+        parser.add_argument(
+            '--sample-interval',
+            type=float,
+            default=0.1,
+            help='Seconds between lock wait samples (Postgres only)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='',
+            help='Write the JSON report to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        exercise_ids = list(Exercise.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+        if not exercise_ids:
+            raise CommandError('No exercises found; run populate_exercises first')
+
+        users = self._users(options)
+        # Leftovers from an interrupted run would make every create answer ACTIVE_WORKOUT_EXISTS
+        Workout.objects.filter(user__in=users, is_done=False).delete()
+        tokens = [str(EntitlementRefreshToken.for_user(user).access_token) for user in users]
+
+        server, log_file = None, None
+        base_url = options['url']
+        if not base_url:
+            server, log_file, base_url = self._start_server(options)
+        try:
+            report = self._simulate(base_url, tokens, exercise_ids, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+        if log_file is not None:
+            log_file.seek(0)
+            server_errors = classify_server_errors(log_file.read())
+            log_file.close()
+            for name, result in report['endpoints'].items():
+                result['server_errors'] = dict(server_errors.pop(name, {}))
+            for name, errors in server_errors.items():
+                report['endpoints'].setdefault(name, {})['server_errors'] = dict(errors)
+
+        report['server'] = {
+            'url': base_url,
+            'started': server is not None,
+            'interface': 'asgi' if options['asgi'] else 'wsgi',
+            'workers': options['workers'] if server is not None else None,
+            'threads': options['threads'] if server is not None else None,
+        }
+
+        for name, result in report['endpoints'].items():
+            if 'count' not in result:
+                continue
+            errors = sum(result.get('server_errors', {}).values())
+            self.stderr.write(
+                f"{name:>20}: {result['count']:6} req  {result['throughput_rps']:7.1f}/s  "
+                f"p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  "
+                f"{result['status']}  {errors} server errors"
+            )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"\nCompleted! Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _users(self, options):
+        emails = [f"{options['email_prefix']}-{index}@example.com" for index in range(options['users'])]
+        existing = {user.email: user for user in CustomUser.objects.filter(email__in=emails)}
+        password = make_password(SIMULATION_PASSWORD)
+        catalog = catalogs() if options['history_days'] else None
+        users = []
+        for index, email in enumerate(emails):
+            user = existing.get(email)
+            if user is None:
+                # create() rather than bulk_create so the profile/preferences receivers run
+                user = CustomUser.objects.create(email=email, password=password, is_verified=True)
+                if catalog:
+                    seed_user_data(user, seed=f"{options['seed']}-{index}", days=options['history_days'], catalog=catalog)
+            users.append(user)
+        return users
+
+    def _start_server(self, options):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        command = [
+            sys.executable, '-m', 'gunicorn',
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(options['workers']),
+            '--timeout', '120',
+        ]
+        if options['asgi']:
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError('--asgi needs uvicorn installed')
+            command += ['--worker-class', 'uvicorn.workers.UvicornWorker', 'utrack.asgi:application']
+        else:
+            command += ['--threads', str(options['threads']), 'utrack.wsgi:application']
+
+        log_file = tempfile.TemporaryFile(mode='w+')
+        server = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=os.environ.copy(), stdout=log_file, stderr=subprocess.STDOUT, text=True
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log_file.seek(0)
+                raise CommandError(f'gunicorn exited with {server.returncode}:\n{log_file.read()[-2000:]}')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            server.kill()
+            raise CommandError('gunicorn did not start listening within 30s')
+        return server, log_file, f'http://127.0.0.1:{port}'
+
+    def _simulate(self, base_url, tokens, exercise_ids, options):
+        samples = defaultdict(list)
+        lock = threading.Lock()
+
+        def record(name, status_code, duration):
+            with lock:
+                samples[name].append((status_code, duration))
+
+        sampler = None
+        deadlocks_before = None
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(DEADLOCKS_SQL)
+                deadlocks_before = cursor.fetchone()[0]
+            sampler = LockWaitSampler(options['sample_interval'])
+            sampler.start()
+
+        sessions = []
+        threads = []
+        for index, token in enumerate(tokens):
+            user = VirtualUser(base_url, token, exercise_ids, f"{options['seed']}-{index}", options, record)
+            threads.append(threading.Thread(target=user.run, args=(options['sessions'], sessions), daemon=True))
+
+        started = time.perf_counter()
+        delay = options['ramp_up'] / len(threads) if threads else 0
+        for thread in threads:
+            thread.start()
+            time.sleep(delay)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        contention = None
+        if sampler is not None:
+            sampler.stop()
+            # pg_stat_database is updated asynchronously by the backends
+            time.sleep(1)
+            with connection.cursor() as cursor:
+                cursor.execute(DEADLOCKS_SQL)
+                deadlocks = cursor.fetchone()[0] - deadlocks_before
+            contention = {
+                'samples': sampler.samples,
+                'max_waiting': max(sampler.waiting, default=0),
+                'mean_waiting': round(sum(sampler.waiting) / len(sampler.waiting), 3) if sampler.waiting else 0,
+                'deadlocks': deadlocks,
+                'waiting_statements': [
+                    {'statement': statement, 'samples': n} for statement, n in sampler.statements.most_common(10)
+                ],
+            }
+
+        endpoints = {}
+        for name, results in sorted(samples.items()):
+            durations = [duration * 1000 for _, duration in results]
+            endpoints[name] = {
+                'count': len(results),
+                'throughput_rps': round(len(results) / elapsed, 2),
+                'p50_ms': round(float(np.percentile(durations, 50)), 2),
+                'p95_ms': round(float(np.percentile(durations, 95)), 2),
+                'p99_ms': round(float(np.percentile(durations, 99)), 2),
+                'max_ms': round(max(durations), 2),
+                'status': dict(Counter(str(status_code) for status_code, _ in results)),
+            }
+
+        total = sum(result['count'] for result in endpoints.values())
+        return {
+            **run_metadata(),
+            'virtual_users': len(tokens),
+            'sessions': {'run': len(sessions), 'completed': sum(sessions)},
+            'think_time': options['think_time'],
+            'elapsed_s': round(elapsed, 2),
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            # Lock waits are only observable on Postgres; on SQLite they surface as lock_timeout server errors
+            'lock_waits': contention,
+            'endpoints': endpoints,
+        }
@@ -0,0 +1,266 @@
+"""
+Process-local request metrics exposed in Prometheus text format.
+
+Each gunicorn worker keeps its counters and histograms in memory and, when
+METRICS_DIR is set, writes a snapshot of them to its own file in that
+directory at most every METRICS_FLUSH_SECONDS (and on exit). MetricsView
+sums the snapshots of every worker, so a scrape sees the whole server no
+matter which worker answers it. Without METRICS_DIR only the answering
+process is reported.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'utrack_http_requests_total': (
+        'counter', 'Requests by URL name, method and status code.', None),
+    'utrack_http_request_duration_seconds': (
+        'histogram', 'Request latency by URL name.', LATENCY_BUCKETS),
+    'utrack_db_queries_per_request': (
+        'histogram', 'Database queries executed per request by URL name.', QUERY_COUNT_BUCKETS),
+    'utrack_db_queries_total': (
+        'counter', 'Database queries executed by URL name.', None),
+    'utrack_db_query_duration_seconds_total': (
+        'counter', 'Time spent executing database queries by URL name.', None),
+    'utrack_cache_requests_total': (
+        'counter', 'Cache lookups by cache and result.', None),
+    'utrack_cache_lookups_total': (
+        'counter', 'Keys looked up in the default cache by URL name and result.', None),
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_state = {'file': None, 'flushed_at': 0.0}
+
+
+def _reset():
+    _counters.clear()
+    _histograms.clear()
+    # A fresh file name per process, so a reused pid never overwrites a dead worker's totals
+    _state['file'] = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+    _state['flushed_at'] = time.monotonic()
+
+
+def _observe(name, labels, value):
+    buckets = METRICS[name][2]
+    histogram = _histograms.get((name, labels))
+    if histogram is None:
+        # One count per bucket plus +Inf, then sum and count
+        histogram = _histograms[(name, labels)] = [0] * (len(buckets) + 1) + [0.0, 0]
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            break
+    else:
+        i = len(buckets)
+    histogram[i] += 1
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def record_request(view, method, status, duration, queries, query_seconds, cache_hits=0, cache_misses=0):
+    view_label = (('view', view),)
+    with _lock:
+        _counters[('utrack_http_requests_total', view_label + (('method', method), ('status', str(status))))] += 1
+        _counters[('utrack_db_queries_total', view_label)] += queries
+        _counters[('utrack_db_query_duration_seconds_total', view_label)] += query_seconds
+        _counters[('utrack_cache_lookups_total', view_label + (('result', 'hit'),))] += cache_hits
+        _counters[('utrack_cache_lookups_total', view_label + (('result', 'miss'),))] += cache_misses
+        _observe('utrack_http_request_duration_seconds', view_label, duration)
+        _observe('utrack_db_queries_per_request', view_label, queries)
+
+
+def record_cache(cache_name, hit):
+    key = ('utrack_cache_requests_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+    with _lock:
+        _counters[key] += 1
+
+
+def snapshot():
+    """This process's metrics in the JSON form written to METRICS_DIR."""
+    with _lock:
+        return {
+            'counters': [[name, list(map(list, labels)), value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, list(map(list, labels)), list(values)] for (name, labels), values in _histograms.items()],
+        }
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR (atomically, via rename)."""
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, _state['file'])
+    data = snapshot()
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+    _state['flushed_at'] = time.monotonic()
+
+
+def maybe_flush():
+    if settings.METRICS_DIR and time.monotonic() - _state['flushed_at'] >= settings.METRICS_FLUSH_SECONDS:
+        flush()
+
+
+def collect():
+    """Metrics summed over every process that has written to METRICS_DIR (or just this one)."""
+    if not settings.METRICS_DIR:
+        snapshots = [snapshot()]
+    else:
+        flush()
+        snapshots = []
+        for file_name in os.listdir(settings.METRICS_DIR):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, file_name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+    counters = defaultdict(float)
+    histograms = {}
+    for data in snapshots:
+        for name, labels, value in data['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, values in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = list(values)
+    return counters, histograms
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(counters, histograms):
+    """Prometheus text exposition format (version 0.0.4)."""
+    series = defaultdict(list)
+    for (name, labels), value in counters.items():
+        series[name].append((labels, value))
+    for (name, labels), values in histograms.items():
+        series[name].append((labels, values))
+
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(series.get(name, ())):
+            if metric_type == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), value[:-2]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryTimer:
+    """connection.execute_wrapper callback counting queries and their time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+
+class CacheCounter:
+    """Hits and misses of the default cache's get/get_many while counting (see count_cache_lookups)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+_cache_counting = threading.local()
+
+
+def _count_lookups(hits, misses):
+    counter = getattr(_cache_counting, 'counter', None)
+    if counter is not None:
+        counter.hits += hits
+        counter.misses += misses
+
+
+def _wrap_cache(cache):
+    """Count get/get_many on this thread's cache instance; done once per instance."""
+    if getattr(cache, '_lookups_counted', False):
+        return
+    get, get_many = cache.get, cache.get_many
+
+    def counted_get(key, default=None, version=None):
+        value = get(key, default, version)
+        hit = value is not default
+        _count_lookups(int(hit), int(not hit))
+        return value
+
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        # BaseCache.get_many (LocMemCache) calls get per key; count the keys once
+        counter, _cache_counting.counter = getattr(_cache_counting, 'counter', None), None
+        try:
+            values = get_many(keys, version)
+        finally:
+            _cache_counting.counter = counter
+        _count_lookups(len(values), len(keys) - len(values))
+        return values
+
+    cache.get = counted_get
+    cache.get_many = counted_get_many
+    cache._lookups_counted = True
+
+
+@contextmanager
+def count_cache_lookups(counter):
+    """Count this thread's default cache lookups into counter, like execute_wrapper does for queries."""
+    _wrap_cache(caches['default'])
+    previous = getattr(_cache_counting, 'counter', None)
+    _cache_counting.counter = counter
+    try:
+        yield counter
+    finally:
+        _cache_counting.counter = previous
+
+
+_reset()
+os.register_at_fork(after_in_child=_reset)
+atexit.register(flush)
@@ -0,0 +1,26 @@
+"""
+Migration operations shared by the apps.
+
+AddIndexConcurrently builds indexes on tables that are written while the
+migration runs (workouts, sets, weight history, supplement logs) with
+CREATE INDEX CONCURRENTLY, so deploys do not block writes for the length of
+the build. Migrations using it must set atomic = False. Other backends (the
+SQLite test and development databases) have no concurrent builds and get a
+plain AddIndex.
+"""
+from django.contrib.postgres import operations
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """CREATE INDEX CONCURRENTLY on PostgreSQL, AddIndex elsewhere."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+        return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+        return super().database_backwards(app_label, schema_editor, from_state, to_state)
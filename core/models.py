@@ -7,3 +7,62 @@ class TimestampedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+# Opt-in dirty-field tracking for TimestampedModel subclasses:
+#   class Workout(DirtyFieldsMixin, TimestampedModel)
+# Field values are snapshotted when a row is loaded and after every save, so
+# signals and views can ask what changed without re-reading the row.
+class DirtyFieldsMixin:
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        snapshot = getattr(self, '_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if update_fields is None or field.name in update_fields or field.attname in update_fields:
+                snapshot[field.attname] = getattr(self, field.attname)
+        self._loaded_values = snapshot
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get('fields')
+        snapshot = getattr(self, '_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                snapshot[field.attname] = getattr(self, field.attname)
+        self._loaded_values = snapshot
+
+    def is_tracked(self, field_name):
+        """True if the value of field_name as stored in the database is known."""
+        return self._meta.get_field(field_name).attname in getattr(self, '_loaded_values', {})
+
+    def previous_value(self, field_name):
+        """Value of field_name as last loaded or saved, or None if it is not tracked."""
+        return getattr(self, '_loaded_values', {}).get(self._meta.get_field(field_name).attname)
+
+    def has_changed(self, field_name):
+        """True if field_name differs from the stored value (always True for untracked fields)."""
+        if not self.is_tracked(field_name):
+            return True
+        attname = self._meta.get_field(field_name).attname
+        return getattr(self, attname) != self._loaded_values[attname]
+
+    def changed_fields(self):
+        """Names of tracked fields that differ from the stored values."""
+        return [
+            field.name for field in self._meta.concrete_fields
+            if self.is_tracked(field.name) and self.has_changed(field.name)
+        ]
@@ -0,0 +1,95 @@
+"""
+Query and row budgets for endpoint tests.
+
+QueryBudgetMixin.assertQueryBudget requests a URL with the test client while
+recording every statement through connection.execute_wrapper, then fails
+with a report of the offending queries if the request ran more queries, or
+fetched more rows, than its budget allows. Rows are counted after the request
+by running each SELECT again as SELECT COUNT(*) FROM (<query>), so the budget
+reflects what the database had to return, not what the view happened to read.
+"""
+from dataclasses import dataclass, field
+import re
+import time
+from collections import Counter
+
+from django.db import connection
+
+# "IN (%s, %s, ...)" differs only in length between otherwise identical queries
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+@dataclass
+class RecordedQuery:
+    sql: str
+    params: tuple
+    many: bool
+    duration: float
+    rows: int = None
+
+    @property
+    def shape(self):
+        return _PLACEHOLDER_LIST.sub('(...)', self.sql)
+
+    @property
+    def is_select(self):
+        return not self.many and self.sql.lstrip().upper().startswith('SELECT') and 'FOR UPDATE' not in self.sql.upper()
+
+
+@dataclass
+class QueryRecorder:
+    """connection.execute_wrapper callback keeping every statement with its parameters."""
+    queries: list = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(RecordedQuery(sql, params, many, time.perf_counter() - started))
+
+    def count_rows(self):
+        """Fill in rows for every SELECT; returns the total."""
+        with connection.cursor() as cursor:
+            for query in self.queries:
+                if query.is_select:
+                    cursor.execute(f'SELECT COUNT(*) FROM ({query.sql}) budget_rows', query.params)
+                    query.rows = cursor.fetchone()[0]
+        return sum(query.rows or 0 for query in self.queries)
+
+    def report(self, title, max_queries, max_rows, rows, limit=25):
+        lines = [
+            f'{title}: {len(self.queries)} queries (budget {max_queries}), '
+            f'{rows} rows fetched (budget {max_rows})'
+        ]
+        repeated = [(shape, n) for shape, n in Counter(q.shape for q in self.queries).most_common() if n > 1]
+        if repeated:
+            lines.append('Repeated statements (likely N+1):')
+            lines.extend(f'  x{n:<4} {shape[:300]}' for shape, n in repeated[:10])
+        lines.append('Largest queries by rows:')
+        by_rows = sorted(self.queries, key=lambda q: q.rows or 0, reverse=True)[:limit]
+        lines.extend(
+            f'  {q.rows if q.rows is not None else "-":>7} rows {q.duration * 1000:7.1f}ms  {q.sql[:300]}'
+            for q in by_rows
+        )
+        return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    """For TestCases with an APIClient in self.client."""
+
+    def assertQueryBudget(self, path, max_queries, max_rows, expected_status=200, data=None):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get(path, data)
+            if response.streaming:
+                # Streamed responses query while they are consumed
+                response.streaming_content = [b''.join(response.streaming_content)]
+        self.assertEqual(
+            response.status_code, expected_status,
+            f'GET {path} returned {response.status_code}: {getattr(response, "data", None)!r:.500}'
+        )
+        rows = recorder.count_rows()
+        if len(recorder.queries) > max_queries or rows > max_rows:
+            self.fail(recorder.report(f'GET {path}', max_queries, max_rows, rows))
+        return response
@@ -0,0 +1,57 @@
+"""
+Query-plan assertions for the indexes the hot queries depend on.
+
+QueryPlanMixin.assertUsesIndex runs EXPLAIN on a queryset and fails if the
+plan reads one of the given tables with a full scan, or (with ordered=True)
+sorts the result instead of reading it in index order. Test tables are tiny,
+so on Postgres the plan is taken with enable_seqscan off: a Seq Scan that
+survives that setting means no usable index exists. SQLite's planner picks
+indexes from the schema alone, so its plans need no such nudge.
+"""
+import re
+
+from django.db import connections, transaction
+
+# SQLite: "SCAN workout_workout" is a full table scan; "SEARCH ..." uses an index
+_SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)')
+_SQLITE_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+_POSTGRES_SORT = re.compile(r'^\s*(?:->\s*)?(?:Incremental )?Sort\b', re.MULTILINE)
+
+
+def explain(queryset):
+    connection = connections[queryset.db]
+    with transaction.atomic(using=queryset.db):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return connection.vendor, queryset.explain()
+
+
+def full_scans(vendor, plan, tables):
+    pattern = _POSTGRES_SCAN if vendor == 'postgresql' else _SQLITE_SCAN
+    return sorted({table for table in pattern.findall(plan) if table in tables})
+
+
+def sorts(vendor, plan):
+    if vendor == 'postgresql':
+        return bool(_POSTGRES_SORT.search(plan))
+    return _SQLITE_SORT in plan
+
+
+class QueryPlanMixin:
+
+    def assertUsesIndex(self, queryset, tables, ordered=False):
+        """
+        tables: db_table names that must not be scanned in full.
+        ordered: the queryset's ORDER BY must come from an index, not a sort.
+        """
+        vendor, plan = explain(queryset)
+        if vendor not in ('postgresql', 'sqlite'):
+            self.skipTest(f'No plan parser for {vendor}')
+        scanned = full_scans(vendor, plan, tables)
+        if scanned:
+            self.fail(f'Full scan of {", ".join(scanned)}:\n{plan}\n{queryset.query}')
+        if ordered and sorts(vendor, plan):
+            self.fail(f'Sorted instead of reading in index order:\n{plan}\n{queryset.query}')
+        return plan
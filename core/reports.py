@@ -0,0 +1,32 @@
+"""
+Fields shared by the JSON reports of benchmark_endpoints and
+simulate_live_sessions, so reports from different runs can be compared and
+traced back to the code that produced them.
+"""
+import platform
+import subprocess
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+
+def git_commit():
+    """The checked out commit, or None outside a git checkout."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_metadata():
+    """Commit, Python version, database vendor and time of a report."""
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'created_at': timezone.now().isoformat(),
+    }
@@ -0,0 +1,194 @@
+"""
+Seeded synthetic training histories in the data export format.
+
+The sections are generated lazily and written through the bulk importer
+(user.data_import.import_sections), so a user with years of workouts costs a
+fixed number of queries per chunk and constant memory. The same seed always
+produces the same data for the same exercise and supplement catalogs.
+
+    seed_user_data(user, seed=1, days=365)
+"""
+from datetime import time, timedelta
+import random
+
+from django.utils import timezone
+
+SPLITS = {
+    'Push': ('chest', 'shoulders', 'triceps'),
+    'Pull': ('lats', 'traps', 'back', 'biceps', 'forearms'),
+    'Legs': ('quads', 'hamstrings', 'glutes', 'calves', 'abs'),
+}
+EXERCISES_PER_WORKOUT = 5
+# Starting working weight (kg) per category; scaled per user and exercise
+BASE_WEIGHT = {'compound': 60.0, 'isolation': 15.0}
+WEEKLY_PROGRESSION = 0.004
+
+
+def _round_plate(weight):
+    return round(weight / 2.5) * 2.5
+
+
+class SyntheticUser:
+    """Generates one user's export sections from a random.Random seeded per user."""
+
+    def __init__(self, seed, exercises, supplements, end, days, workouts_per_week=4.0):
+        """
+        exercises: dicts with name, primary_muscle and category.
+        supplements: (name, default_dosage) pairs.
+        """
+        self.rng = random.Random(seed)
+        self.end = end
+        self.start = end - timedelta(days=days)
+        self.days = days
+        self.workouts_per_week = workouts_per_week
+        self.gender = self.rng.choice(('male', 'female'))
+        self.height = round(self.rng.gauss(178 if self.gender == 'male' else 165, 7), 1)
+        self.body_weight = round(self.rng.gauss(82 if self.gender == 'male' else 64, 8), 1)
+        self.strength = self.rng.uniform(0.6, 1.6) * (1.0 if self.gender == 'male' else 0.65)
+
+        strength_exercises = [e for e in exercises if e['category'] in BASE_WEIGHT]
+        self.program = {}
+        for title, muscles in SPLITS.items():
+            pool = [e for e in strength_exercises if e['primary_muscle'] in muscles]
+            picked = self.rng.sample(pool, min(EXERCISES_PER_WORKOUT, len(pool)))
+            self.program[title] = [
+                (e['name'], BASE_WEIGHT[e['category']] * self.strength * self.rng.uniform(0.7, 1.3))
+                for e in picked
+            ]
+        self.supplements = [
+            (name, dosage or 1.0)
+            for name, dosage in self.rng.sample(supplements, min(self.rng.randint(1, 3), len(supplements)))
+        ]
+
+    def _days(self, every_min, every_max, hour):
+        """Timestamps from start to end, every_min..every_max days apart, around hour."""
+        day = self.start + timedelta(days=self.rng.uniform(0, every_max))
+        while day < self.end:
+            yield day.replace(hour=hour, minute=0, second=0, microsecond=0) + timedelta(
+                minutes=self.rng.randint(0, 120)
+            )
+            day += timedelta(days=self.rng.uniform(every_min, every_max))
+
+    def profile(self):
+        return {'gender': self.gender, 'height': self.height, 'weight': self.body_weight}
+
+    def preferences(self):
+        return {'auto_warmup_set': self.rng.random() < 0.3, 'rest_time': self.rng.choice((60, 90, 120, 180))}
+
+    def weight_history(self):
+        weight = self.body_weight
+        for moment in self._days(1, 4, 7):
+            weight += self.rng.gauss(-0.01, 0.35)
+            yield {'weight': round(weight, 1), 'created_at': moment.isoformat()}
+
+    def body_measurements(self):
+        for moment in self._days(25, 35, 8):
+            waist = self.rng.gauss(84 if self.gender == 'male' else 72, 4)
+            yield {
+                'created_at': moment.isoformat(),
+                'height': self.height,
+                'weight': round(self.rng.gauss(self.body_weight, 1.5), 1),
+                'neck': round(self.rng.gauss(38 if self.gender == 'male' else 32, 1), 1),
+                'waist': round(waist, 1),
+                'hip': round(self.rng.gauss(98, 3), 1) if self.gender == 'female' else None,
+                'body_fat_percentage': round(self.rng.gauss(18 if self.gender == 'male' else 26, 3), 1),
+            }
+
+    def workouts(self):
+        gap = 7.0 / self.workouts_per_week
+        titles = list(self.program)
+        for i, moment in enumerate(self._days(gap * 0.5, gap * 1.5, 17)):
+            title = titles[i % len(titles)]
+            progression = 1 + WEEKLY_PROGRESSION * (moment - self.start).days / 7
+            exercises = []
+            volume = 0.0
+            for order, (name, base_weight) in enumerate(self.program[title]):
+                working_weight = _round_plate(base_weight * progression * self.rng.uniform(0.95, 1.05))
+                sets = []
+                if self.rng.random() < 0.4:
+                    sets.append({
+                        'set_number': 1, 'reps': 10, 'weight': _round_plate(working_weight * 0.5),
+                        'is_warmup': True, 'rest_time_before_set': 0, 'reps_in_reserve': 5,
+                    })
+                for _ in range(self.rng.randint(3, 4)):
+                    reps = self.rng.randint(5, 12)
+                    volume += working_weight * reps
+                    sets.append({
+                        'set_number': len(sets) + 1,
+                        'reps': reps,
+                        'weight': working_weight,
+                        'is_warmup': False,
+                        'rest_time_before_set': self.rng.randint(60, 180) if sets else 0,
+                        'reps_in_reserve': self.rng.randint(0, 3),
+                    })
+                exercises.append({'exercise_name': name, 'order': order, 'sets': sets})
+            yield {
+                'title': title,
+                'datetime': moment.isoformat(),
+                'duration': self.rng.randint(40, 90) * 60,
+                'intensity': self.rng.choice(('medium', 'high')),
+                'is_done': True,
+                'calories_burned': round(min(max(volume * 0.006, 30), 1500), 2),
+                'exercises': exercises,
+            }
+
+    def template_workouts(self):
+        return [
+            {
+                'title': title,
+                'exercises': [{'exercise_name': name, 'order': order} for order, (name, _) in enumerate(exercises)],
+            }
+            for title, exercises in self.program.items()
+        ]
+
+    def user_supplements(self):
+        return [
+            {'supplement_name': name, 'dosage': dosage, 'frequency': 'daily', 'time_of_day': 'Morning'}
+            for name, dosage in self.supplements
+        ]
+
+    def supplement_logs(self):
+        day = self.start.date()
+        while day <= self.end.date():
+            for name, dosage in self.supplements:
+                if self.rng.random() < 0.85:
+                    yield {
+                        'supplement_name': name,
+                        'date': day.isoformat(),
+                        'time': time(8, self.rng.randint(0, 59)).isoformat(),
+                        'dosage': dosage,
+                    }
+            day += timedelta(days=1)
+
+    def sections(self):
+        """(name, value) pairs in import order; list sections are generators."""
+        yield 'profile', self.profile()
+        yield 'preferences', self.preferences()
+        yield 'weight_history', self.weight_history()
+        yield 'body_measurements', self.body_measurements()
+        yield 'workouts', self.workouts()
+        yield 'template_workouts', self.template_workouts()
+        yield 'supplements', self.user_supplements()
+        yield 'supplement_logs', self.supplement_logs()
+
+
+def catalogs():
+    """The exercise and supplement catalogs SyntheticUser picks from, in a stable order."""
+    from exercise.models import Exercise
+    from supplements.models import Supplement
+
+    exercises = list(Exercise.objects.filter(is_active=True).order_by('id').values('name', 'primary_muscle', 'category'))
+    supplements = list(Supplement.objects.order_by('id').values_list('name', 'default_dosage'))
+    return exercises, supplements
+
+
+def seed_user_data(user, seed, days=365, workouts_per_week=4.0, end=None, catalog=None):
+    """Bulk-import a synthetic history ending at `end` (default: now) for user; returns the import summary."""
+    from user.data_import import import_sections
+
+    exercises, supplements = catalog or catalogs()
+    end = end or timezone.now()
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    generator = SyntheticUser(seed, exercises, supplements, end, days, workouts_per_week)
+    return import_sections(user, generator.sections())
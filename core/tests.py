@@ -1,3 +1,769 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import queue
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from utrack.logging_handlers import JSONFormatter, RoutingQueueHandler, RoutingQueueListener
+from utrack.middleware import MetricsMiddleware, RequestResponseLogMiddleware
+
+from . import metrics
+from .query_budget import QueryBudgetMixin
+from .query_plans import QueryPlanMixin
+from .json_stream import iter_json_array, iter_json_object
+
+
+class JSONStreamTestCase(SimpleTestCase):
+    def test_stream_matches_json_load_across_chunk_boundaries(self):
+        """Test incremental parsing gives json.loads' result for every chunk size"""
+        document = {
+            'profile': {'gender': 'female', 'height': 170.5},
+            'empty': [],
+            'numbers': [0, -12, 3.25e2, 123456789, True, None],
+            'workouts': [
+                {'title': f'Günther\'s "day" {i} 💪', 'sets': [{'weight': 100.5, 'reps': i}]}
+                for i in range(20)
+            ],
+            'count': 1234567,
+        }
+        raw = json.dumps(document, indent=4, ensure_ascii=False).encode()
+        for chunk_size in (1, 3, 7, 64, 4096):
+            reads = []
+            parsed = {}
+            for name, value in iter_json_object(io.BytesIO(raw), chunk_size=chunk_size, progress=reads.append):
+                parsed[name] = value if not hasattr(value, '__next__') else list(value)
+            self.assertEqual(parsed, document)
+            self.assertEqual(reads[-1], len(raw))
+
+        # Unread array elements are skipped before the next member
+        names = [name for name, _ in iter_json_object(io.BytesIO(raw), chunk_size=5)]
+        self.assertEqual(names, list(document))
+        self.assertEqual(list(iter_json_array(io.StringIO('[1, [2], {"a": 3}]'), chunk_size=2)), [1, [2], {'a': 3}])
+
+    def test_stream_rejects_malformed_documents(self):
+        """Test malformed input raises JSONDecodeError"""
+        for text in ('[1, 2', '{"a": [1 2]}', '{"a" 1}', '[1,]', ''):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_array(io.StringIO(text)) if text.startswith('[') or not text else iter_json_object(io.StringIO(text)))
+
+
+class StructuredRequestLogTestCase(SimpleTestCase):
+    def test_request_record_is_written_as_json_line_by_listener(self):
+        """Test the middleware's record reaches the target handler through the queue as one JSON line"""
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JSONFormatter())
+        log_queue = queue.SimpleQueue()
+        listener = RoutingQueueListener(log_queue)
+        request_logger = logging.getLogger('utrack.requests')
+        saved_handlers, saved_level = request_logger.handlers, request_logger.level
+        request_logger.handlers = [RoutingQueueHandler(log_queue, [target])]
+        request_logger.setLevel(logging.INFO)
+        listener.start()
+        try:
+            middleware = RequestResponseLogMiddleware(lambda request: JsonResponse({'ok': True}, status=201))
+            request = RequestFactory().post(
+                '/api/workout/create/', json.dumps({'title': 'Push'}), content_type='application/json'
+            )
+            with override_settings(REQUEST_BODY_LOG_SAMPLE_RATE=1.0):
+                middleware(request)
+        finally:
+            listener.stop()
+            request_logger.handlers, request_logger.level = saved_handlers, saved_level
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        entry = json.loads(lines[0])
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['method'], 'POST')
+        self.assertEqual(entry['path'], '/api/workout/create/')
+        self.assertEqual(entry['status'], 201)
+        self.assertEqual(entry['user'], 'anonymous')
+        self.assertEqual(json.loads(entry['body']), {'title': 'Push'})
+        self.assertIn('Status: 201', entry['message'])
+
+    @override_settings(REQUEST_BODY_LOG_SAMPLE_RATE=0)
+    def test_unsampled_request_body_is_not_read(self):
+        """Test the body stays unread (and still readable by the view) when sampling is off"""
+        def view(request):
+            self.assertFalse(hasattr(request, '_body'))
+            return JsonResponse(json.loads(request.body))
+
+        middleware = RequestResponseLogMiddleware(view)
+        request = RequestFactory().post('/api/workout/create/', json.dumps({'a': 1}), content_type='application/json')
+        response = middleware(request)
+        self.assertEqual(json.loads(response.content), {'a': 1})
+        self.assertIsNone(request.log_body)
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        metrics._reset()
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            email='admin@example.com', password='testpass123', is_staff=True
+        )
+
+    def test_metrics_report_requests_and_queries_per_view(self):
+        """Test per-view request counts, latency and query counts are exposed to staff only"""
+        for _ in range(3):
+            self.client.get('/api/health/')
+        self.client.get('/api/does-not-exist/')
+
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('utrack_http_requests_total{view="health-check",method="GET",status="200"} 3', body)
+        self.assertIn('utrack_http_requests_total{view="unresolved",method="GET",status="404"} 1', body)
+        self.assertIn('utrack_http_request_duration_seconds_bucket{view="health-check",le="+Inf"} 3', body)
+        self.assertIn('utrack_http_request_duration_seconds_count{view="health-check"} 3', body)
+        # The health check runs SELECT 1 on every request
+        self.assertIn('utrack_db_queries_per_request_bucket{view="health-check",le="0"} 0', body)
+        self.assertIn('utrack_db_queries_total{view="health-check"} 3', body)
+        # The health check reads back a key it just wrote
+        self.assertRegex(body, r'utrack_cache_lookups_total\{view="health-check",result="hit"\} [1-9]')
+
+    def test_metrics_count_cache_lookups_per_view(self):
+        """Test default cache hits and misses of a view's get/get_many calls are counted under its URL name"""
+        from django.core.cache import cache
+
+        def view(request):
+            cache.set('metrics-test', 1)
+            cache.get('metrics-test')
+            cache.get('metrics-test-missing')
+            cache.get_many(['metrics-test', 'metrics-test-other'])
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.resolver_match = type('Match', (), {'view_name': 'cached-view'})()
+        MetricsMiddleware(view)(request)
+        cache.get('metrics-test')  # Outside a request: not counted
+
+        counters, _ = metrics.collect()
+        self.assertEqual(counters[('utrack_cache_lookups_total', (('view', 'cached-view'), ('result', 'hit')))], 2)
+        self.assertEqual(counters[('utrack_cache_lookups_total', (('view', 'cached-view'), ('result', 'miss')))], 2)
+
+    def test_metrics_sum_worker_snapshots_with_token(self):
+        """Test snapshots written by other workers are summed and the scraper token is accepted"""
+        with tempfile.TemporaryDirectory() as metrics_dir, \
+                override_settings(METRICS_DIR=metrics_dir, METRICS_TOKEN='scrape-secret'):
+            metrics.record_request('health-check', 'GET', 200, 0.02, 1, 0.001)
+            metrics.record_cache('auth_user', True)
+            # Another worker's totals
+            metrics.flush()
+            other = os.path.join(metrics_dir, 'other-worker.json')
+            os.replace(os.path.join(metrics_dir, metrics._state['file']), other)
+            metrics._reset()
+
+            metrics.record_request('health-check', 'GET', 200, 0.2, 1, 0.001)
+            metrics.record_cache('auth_user', False)
+
+            response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Metrics wrong')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Metrics scrape-secret')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        body = response.content.decode()
+        self.assertIn('utrack_http_requests_total{view="health-check",method="GET",status="200"} 2', body)
+        self.assertIn('utrack_http_request_duration_seconds_bucket{view="health-check",le="0.025"} 1', body)
+        self.assertIn('utrack_http_request_duration_seconds_bucket{view="health-check",le="0.25"} 2', body)
+        self.assertIn('utrack_cache_requests_total{cache="auth_user",result="hit"} 1', body)
+        self.assertIn('utrack_cache_requests_total{cache="auth_user",result="miss"} 1', body)
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Query and row budgets for every GET endpoint against a realistic account:
+    about 300 completed workouts (~6,000 sets) over 18 months, weight history,
+    measurements, supplement logs, earned achievements, PRs and the research
+    catalog, plus a few other users for rankings. Budgets are fixed numbers, so
+    an endpoint whose queries grow with the user's history fails here.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.core.management import call_command
+        from achievements.models import PersonalRecord
+        from exercise.models import Exercise
+        from supplements.models import UserSupplement
+        from user.models import DataExportJob
+        from workout.models import ExerciseSet, Workout, WorkoutExercise
+        from .synthetic import catalogs, seed_user_data
+
+        for command in ('populate_exercises', 'populate_supplements', 'seed_achievements', 'import_research'):
+            call_command(command, stdout=io.StringIO())
+
+        User = get_user_model()
+        catalog = catalogs()
+        cls.user = User.objects.create_user(
+            email='lifter@example.com', password='testpass123',
+            is_pro=True, pro_until=timezone.now() + timedelta(days=30)
+        )
+        cls.summary = seed_user_data(cls.user, seed=40, days=540, catalog=catalog)
+        for i in range(3):
+            other = User.objects.create_user(email=f'other{i}@example.com', password='testpass123')
+            seed_user_data(other, seed=i, days=90, catalog=catalog)
+
+        cls.workout = Workout.objects.filter(user=cls.user, is_done=True).latest('datetime')
+        cls.exercise = Exercise.objects.get(id=PersonalRecord.objects.filter(user=cls.user).values('exercise_id')[:1])
+        cls.user_supplement = UserSupplement.objects.filter(user=cls.user).first()
+        cls.export_job = DataExportJob.objects.create(user=cls.user)
+
+        active = Workout.objects.create(user=cls.user, title='Push', intensity='high')
+        cls.active_exercise = WorkoutExercise.objects.create(workout=active, exercise=cls.exercise, order=0)
+        for number in (1, 2):
+            ExerciseSet.objects.create(
+                workout_exercise=cls.active_exercise, set_number=number, reps=8, weight=60, rest_time_before_set=90
+            )
+
+    def setUp(self):
+        from django.core.cache import cache
+        from exercise.registry import get_registry
+
+        cache.clear()
+        # Process-wide and built once per catalog version, so warm in production
+        get_registry()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def check_budgets(self, budgets):
+        for path, data, max_queries, max_rows, *expected_status in budgets:
+            with self.subTest(path=path):
+                self.assertQueryBudget(path, max_queries, max_rows, *expected_status, data=data)
+
+    def test_dataset_is_realistic(self):
+        """Test the seeded account is large enough for per-row queries to show"""
+        self.assertGreater(self.summary['workouts'], 250)
+        self.assertGreater(self.summary['sets'], 4000)
+
+    def test_workout_endpoints(self):
+        """Test workout GET endpoints stay within their query and row budgets"""
+        today = timezone.now()
+        self.check_budgets([
+            ('/api/workout/list/', None, 5, 600),
+            ('/api/workout/list/', {'page': 5}, 5, 600),
+            (f'/api/workout/list/{self.workout.id}/', None, 4, 40),
+            ('/api/workout/active/', None, 4, 10),
+            ('/api/workout/active/rest-timer/', None, 2, 5),
+            ('/api/workout/calendar/', {'year': today.year}, 1, 200),
+            ('/api/workout/calendar/', {'year': today.year, 'month': today.month}, 1, 31),
+            ('/api/workout/calendar/stats/', {'year': today.year}, 3, 5),
+            ('/api/workout/years/', None, 1, 5),
+            (f'/api/workout/exercise/{self.exercise.id}/1rm-history/', None, 1, 5),
+            (f'/api/workout/exercise/{self.exercise.id}/set-history/', None, 2, 40),
+            (f'/api/workout/exercise/{self.exercise.id}/last-workout/', None, 2, 10),
+            ('/api/workout/recommendations/recovery/', None, 3, 20),
+            (f'/api/workout/exercise/{self.active_exercise.id}/rest-recommendations/', None, 2, 5),
+            ('/api/workout/recommendations/frequency/', None, 1, 5),
+            ('/api/workout/research/', None, 1, 20),
+            ('/api/workout/recovery/status/', None, 2, 20),
+            ('/api/workout/volume-analysis/', None, 3, 1600),
+            (f'/api/workout/{self.workout.id}/summary/', None, 3, 10),
+            ('/api/workout/check-today/', None, 1, 5),
+            ('/api/workout/template/list/', None, 2, 40),
+        ])
+
+    def test_achievement_endpoints(self):
+        """Test achievement GET endpoints stay within their query and row budgets"""
+        self.check_budgets([
+            ('/api/achievements/list/', None, 4, 30),
+            ('/api/achievements/earned/', None, 1, 30),
+            ('/api/achievements/categories/', None, 2, 10),
+            ('/api/achievements/unnotified/', None, 1, 30),
+            ('/api/achievements/prs/', None, 1, 20),
+            (f'/api/achievements/prs/{self.exercise.id}/', None, 1, 1),
+            ('/api/achievements/stats/', None, 1, 1),
+            (f'/api/achievements/ranking/{self.exercise.id}/', None, 8, 10),
+            ('/api/achievements/rankings/', None, 3, 40),
+            (f'/api/achievements/leaderboard/{self.exercise.id}/', None, 2, 20),
+        ])
+
+    def test_user_endpoints(self):
+        """Test user GET endpoints stay within their query and row budgets"""
+        self.check_budgets([
+            ('/api/user/me/', None, 0, 0),
+            ('/api/user/weight/history/', None, 2, 110),
+            ('/api/user/weight/trend/', None, 1, 250),
+            ('/api/user/timezone/', None, 1, 1),
+            (f'/api/user/data/export/{self.export_job.id}/', None, 1, 1),
+            # Reads the whole history by design; the query count must stay flat
+            ('/api/user/data/export/', None, 12, 10000),
+        ])
+
+    def test_supplement_endpoints(self):
+        """Test supplement GET endpoints stay within their query and row budgets"""
+        self.check_budgets([
+            ('/api/supplements/list/', None, 2, 50),
+            ('/api/supplements/user/list/', None, 2, 5),
+            # Unpaginated: returns every log of the supplement
+            ('/api/supplements/user/log/list/', {'user_supplement_id': self.user_supplement.id}, 2, 600),
+            ('/api/supplements/user/log/today/', None, 1, 5),
+        ])
+
+    def test_body_measurement_endpoints(self):
+        """Test body measurement GET endpoints stay within their query and row budgets"""
+        self.check_budgets([
+            ('/api/measurements/', None, 2, 25),
+        ])
+
+
+class SyntheticDataTestCase(TestCase):
+    def test_generate_and_benchmark_commands(self):
+        """Test generated users are deterministic per seed and the benchmark reports every requested endpoint"""
+        from django.core.management import call_command
+        from workout.models import ExerciseSet, Workout
+
+        call_command('populate_exercises', stdout=io.StringIO())
+        call_command('populate_supplements', stdout=io.StringIO())
+        call_command('generate_synthetic_data', users=2, years=0.25, seed=5, pro_fraction=1.0, stdout=io.StringIO())
+        self.assertEqual(get_user_model().objects.filter(email__startswith='synthetic-5-', is_pro=True).count(), 2)
+        workouts = list(Workout.objects.order_by('user__email', 'datetime').values_list('title', 'duration'))
+        sets = ExerciseSet.objects.count()
+        self.assertGreater(len(workouts), 20)
+
+        # Existing users are left alone; a fresh run with the same seed reproduces the data
+        call_command('generate_synthetic_data', users=2, years=0.25, seed=5, stdout=io.StringIO())
+        self.assertEqual(ExerciseSet.objects.count(), sets)
+        get_user_model().objects.filter(email__startswith='synthetic-5-').delete()
+        call_command('generate_synthetic_data', users=2, years=0.25, seed=5, pro_fraction=1.0, stdout=io.StringIO())
+        self.assertEqual(list(Workout.objects.order_by('user__email', 'datetime').values_list('title', 'duration')), workouts)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            output = os.path.join(output_dir, 'report.json')
+            call_command(
+                'benchmark_endpoints', seed=5, iterations=2, endpoints='workout_list,calendar_year,leaderboard',
+                output=output, stdout=io.StringIO(), stderr=io.StringIO()
+            )
+            with open(output) as f:
+                report = json.load(f)
+        self.assertEqual(set(report['endpoints']), {'workout_list', 'calendar_year', 'leaderboard'})
+        for result in report['endpoints'].values():
+            self.assertEqual(result['status'], [200])
+            self.assertGreaterEqual(result['p95_ms'], result['p50_ms'])
+            self.assertIn('queries_max', result)
+            self.assertGreater(result['peak_memory_kb'], 0)
+
+
+class LiveSessionSimulationTestCase(LiveServerTestCase):
+    def test_simulated_sessions_against_live_server(self):
+        """Test virtual users complete their sessions and every set-logging endpoint is reported"""
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from workout.models import ExerciseSet, Workout
+
+        cache.clear()
+        call_command('populate_exercises', stdout=io.StringIO())
+        # The live server shares the test database connection between its threads, so one
+        # virtual user at a time; contention is only meaningful against a real server
+        with tempfile.TemporaryDirectory() as output_dir:
+            output = os.path.join(output_dir, 'report.json')
+            call_command(
+                'simulate_live_sessions', url=self.live_server_url, users=1, sessions=2, exercises=2, sets=2,
+                think_time=0, ramp_up=0, output=output, stdout=io.StringIO(), stderr=io.StringIO()
+            )
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(report['sessions'], {'run': 2, 'completed': 2})
+        self.assertEqual(Workout.objects.filter(user__email='loadtest-0@example.com', is_done=True).count(), 2)
+        self.assertEqual(ExerciseSet.objects.count(), 8)
+        endpoints = report['endpoints']
+        self.assertEqual(endpoints['add-set']['status'], {'201': 8})
+        self.assertEqual(endpoints['rest-timer-state']['count'], 8)
+        self.assertEqual(endpoints['complete-workout']['status'], {'200': 2})
+        self.assertGreaterEqual(endpoints['add-set']['p99_ms'], endpoints['add-set']['p50_ms'])
+
+    def test_classify_server_errors(self):
+        """Test logged 500s are attributed to their endpoint by traceback"""
+        from core.management.commands.simulate_live_sessions import classify_server_errors
+
+        log = '\n'.join([
+            'ERROR 2026-01-01 10:00:00 Internal Server Error: /api/workout/exercise/7/add_set/',
+            'Traceback (most recent call last):',
+            'django.db.utils.OperationalError: database is locked',
+            'ERROR 2026-01-01 10:00:01 Internal Server Error: /api/workout/3/complete/',
+            'psycopg2.errors.DeadlockDetected: deadlock detected',
+            'ERROR 2026-01-01 10:00:02 Internal Server Error: /api/workout/create/',
+            'django.db.utils.IntegrityError: UNIQUE constraint failed',
+            'ERROR 2026-01-01 10:00:03 Internal Server Error: /api/workout/create/',
+            'ZeroDivisionError: division by zero',
+        ])
+        errors = classify_server_errors(log)
+        self.assertEqual(errors['add-set'], {'lock_timeout': 1})
+        self.assertEqual(errors['complete-workout'], {'deadlock': 1})
+        self.assertEqual(errors['create-workout'], {'integrity_error': 1, 'other': 1})
+
+
+class QueryPlanTestCase(QueryPlanMixin, TestCase):
+    """
+    EXPLAIN the hottest per-user filters and fail if one regresses to a full
+    scan of a large table, or sorts rows its index should already return in order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from exercise.models import Exercise
+
+        cls.user = get_user_model().objects.create_user(email='plans@example.com', password='testpass123')
+        cls.exercise = Exercise.objects.create(name='Bench Press', primary_muscle='chest', category='compound')
+
+    def test_workout_queries_use_indexes(self):
+        """Test active, history and list queries read workouts by index"""
+        from workout.models import Workout
+
+        table = {Workout._meta.db_table}
+        self.assertUsesIndex(Workout.objects.filter(user=self.user, is_done=False), table)
+        self.assertUsesIndex(Workout.objects.filter(user=self.user, is_done=True).order_by('-datetime'), table, ordered=True)
+        self.assertUsesIndex(Workout.objects.filter(user=self.user, is_done=True).order_by('-created_at'), table, ordered=True)
+        self.assertUsesIndex(
+            Workout.objects.filter(user=self.user, datetime__gte=timezone.now() - timedelta(days=365)), table
+        )
+
+    def test_exercise_history_and_recovery_queries_use_indexes(self):
+        """Test per-exercise history and latest recovery records avoid full scans"""
+        from workout.models import MuscleRecovery, Workout, WorkoutExercise
+
+        tables = {Workout._meta.db_table, WorkoutExercise._meta.db_table}
+        self.assertUsesIndex(
+            WorkoutExercise.objects.filter(
+                exercise=self.exercise, workout__user=self.user, workout__is_done=True
+            ).order_by('-workout__datetime'),
+            tables,
+        )
+        self.assertUsesIndex(
+            MuscleRecovery.objects.filter(user=self.user, muscle_group='chest').order_by('-recovery_until'),
+            {MuscleRecovery._meta.db_table}, ordered=True,
+        )
+
+    def test_leaderboard_log_and_history_queries_use_indexes(self):
+        """Test leaderboards, today's supplement logs and weight/measurement history read in index order"""
+        from achievements.models import PersonalRecord
+        from body_measurements.models import BodyMeasurement
+        from supplements.models import UserSupplementLog
+        from user.models import WeightHistory
+
+        for field in ('-best_one_rep_max', '-best_weight'):
+            self.assertUsesIndex(
+                PersonalRecord.objects.filter(exercise=self.exercise).order_by(field),
+                {PersonalRecord._meta.db_table}, ordered=True,
+            )
+        self.assertUsesIndex(
+            UserSupplementLog.objects.filter(user=self.user, date=timezone.now().date()).order_by('-time'),
+            {UserSupplementLog._meta.db_table}, ordered=True,
+        )
+        for model in (WeightHistory, BodyMeasurement):
+            self.assertUsesIndex(
+                model.objects.filter(user=self.user).order_by('-created_at'), {model._meta.db_table}, ordered=True
+            )
+
+
+class GCRAThrottleTestCase(SimpleTestCase):
+    def setUp(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.core.cache import cache
+
+        cache.clear()
+        self.now = 1_000_000.0
+        self.request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        self.request.user = AnonymousUser()
+
+    def throttle(self, base, **attrs):
+        attrs['timer'] = staticmethod(lambda: self.now)
+        return type('TestThrottle', (base,), attrs)()
+
+    def test_burst_then_one_request_per_interval(self):
+        """Test a full burst is allowed, then capacity returns one request per period/N in a single cache entry"""
+        from django.core.cache import cache
+        from utrack.throttles import LoginRateThrottle
+
+        # login: 5/minute, so one request every 12 seconds after the burst
+        for _ in range(5):
+            self.assertTrue(self.throttle(LoginRateThrottle).allow_request(self.request, None))
+        throttle = self.throttle(LoginRateThrottle)
+        self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertAlmostEqual(throttle.wait(), 12.0)
+        self.assertIsInstance(cache.get(throttle.key), int)
+
+        self.now += 11.9
+        self.assertFalse(self.throttle(LoginRateThrottle).allow_request(self.request, None))
+        self.now += 0.1
+        self.assertTrue(self.throttle(LoginRateThrottle).allow_request(self.request, None))
+        self.assertFalse(self.throttle(LoginRateThrottle).allow_request(self.request, None))
+
+        # A full idle period restores the whole burst
+        self.now += 60
+        for _ in range(5):
+            self.assertTrue(self.throttle(LoginRateThrottle).allow_request(self.request, None))
+        self.assertFalse(self.throttle(LoginRateThrottle).allow_request(self.request, None))
+
+    def test_scoped_throttle_reads_scope_from_view(self):
+        """Test the scoped throttle keeps DRF's per-view scope and skips views without one"""
+        from types import SimpleNamespace
+        from utrack.throttles import ScopedRateThrottle
+
+        view = SimpleNamespace(throttle_scope='password_reset')
+        for _ in range(3):
+            self.assertTrue(self.throttle(ScopedRateThrottle).allow_request(self.request, view))
+        throttle = self.throttle(ScopedRateThrottle)
+        self.assertFalse(throttle.allow_request(self.request, view))
+        self.assertAlmostEqual(throttle.wait(), 1200.0)
+        self.assertTrue(self.throttle(ScopedRateThrottle).allow_request(self.request, SimpleNamespace()))
+
+    def test_redis_path_runs_script_by_sha(self):
+        """Test the Redis path keeps no per-client state and loads the script only after NOSCRIPT"""
+        from types import SimpleNamespace
+        from unittest import mock
+        from utrack import throttles
+
+        class NoScript(Exception):
+            pass
+
+        loaded = set()
+        calls = []
+
+        class StubClient:
+            def evalsha(self, sha, numkeys, key, *args):
+                calls.append((sha, numkeys, key, args))
+                if sha not in loaded:
+                    raise NoScript('No matching script')
+                return b'0' if len(calls) % 2 else b'1500'
+
+            def script_load(self, script):
+                sha = throttles.hashlib.sha1(script.encode()).hexdigest()
+                loaded.add(sha)
+                return sha
+
+        # Like Django's RedisCacheClient, a new client object per call
+        cache = SimpleNamespace(
+            make_and_validate_key=lambda key: f':1:{key}',
+            _cache=SimpleNamespace(get_client=lambda key, write: StubClient()),
+        )
+        with mock.patch.object(throttles, 'NoScriptError', NoScript):
+            results = [throttles.gcra_redis(cache, 'throttle', 10, 12, 48) for _ in range(3)]
+
+        self.assertEqual(loaded, {throttles.GCRA_SHA})
+        self.assertEqual(len(calls), 4)  # NOSCRIPT once, then one EVALSHA per request
+        self.assertEqual(calls[0], (throttles.GCRA_SHA, 1, ':1:throttle', (10, 12, 48)))
+        self.assertEqual(results, [1500, 0, 1500])
+        self.assertFalse(hasattr(throttles, '_scripts'))
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from exercise.models import Exercise
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='lifter@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.exercise = Exercise.objects.create(name='Bench Press', primary_muscle='chest', equipment_type='barbell')
+
+    def assertNotModified(self, path, etag):
+        with self.assertNumQueries(0):
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_workout_list_is_revalidated_until_the_user_logs_a_set(self):
+        """Test 304 without queries for an unchanged workout list and a new ETag after a set is logged"""
+        from workout.models import Workout, WorkoutExercise
+
+        with self.captureOnCommitCallbacks(execute=True):
+            workout = Workout.objects.create(user=self.user, title='Push', is_done=True)
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise, order=1)
+
+        response = self.client.get('/api/workout/list/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag = response['ETag']
+        self.assertNotModified('/api/workout/list/', etag)
+        # Query parameters are part of the ETag
+        response = self.client.get('/api/workout/list/', {'page_size': 5}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/workout/exercise/{workout_exercise.id}/add_set/',
+                {'reps': 5, 'weight': 100, 'rest_time_before_set': 60, 'reps_in_reserve': 1}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get('/api/workout/list/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['results'][0]['exercises'][0]['sets']), 1)
+
+        # Another user's changes leave this user's ETag alone
+        other = get_user_model().objects.create_user(email='other@example.com', password='testpass123')
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Workout.objects.create(user=other, title='Pull', is_done=True)
+        self.assertNotModified('/api/workout/list/', etag)
+
+    def test_deleting_a_workout_costs_the_same_for_any_number_of_sets(self):
+        """Test set and exercise rows deleted with their workout are not looked up one by one"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from workout.models import ExerciseSet, Workout, WorkoutExercise
+
+        counts = []
+        for set_count in (2, 30):
+            workout = Workout.objects.create(user=self.user, title='Push', is_done=True)
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise, order=1)
+            ExerciseSet.objects.bulk_create([
+                ExerciseSet(workout_exercise=workout_exercise, set_number=number, reps=5, weight=100)
+                for number in range(1, set_count + 1)
+            ])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete(f'/api/workout/{workout.id}/delete/')
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_sets_written_outside_views_rotate_the_version_with_one_lookup(self):
+        """Test ORM writes (admin, shell, workers) rotate the owner's version, resolving it once per transaction"""
+        from core.conditional import user_data_version
+        from workout.models import ExerciseSet, Workout, WorkoutExercise
+
+        with self.captureOnCommitCallbacks(execute=True):
+            workout = Workout.objects.create(user=self.user, title='Push', is_done=True)
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise, order=1)
+        version = user_data_version(self.user.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            for number in range(1, 11):
+                ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=number, reps=5, weight=100)
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        self.assertNotEqual(user_data_version(self.user.id), version)
+
+        version = user_data_version(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            ExerciseSet.objects.filter(workout_exercise=workout_exercise).first().delete()
+        self.assertNotEqual(user_data_version(self.user.id), version)
+
+    def test_catalog_etags_follow_catalog_changes(self):
+        """Test the supplement and exercise lists answer 304 until their catalog changes"""
+        from supplements.models import Supplement
+
+        for path, change in [
+            ('/api/supplements/list/', lambda: Supplement.objects.create(name='Creatine', dosage_unit='g')),
+            ('/api/exercise/list/', lambda: self.exercise.save(update_fields=['name'])),
+        ]:
+            with self.subTest(path=path):
+                etag = self.client.get(path)['ETag']
+                self.assertNotModified(path, etag)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.exercise.name = 'Barbell Bench Press'
+                    change()
+                self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class CatalogBundleTestCase(TestCase):
+    def setUp(self):
+        from exercise.models import Exercise
+        from workout.models import TrainingResearch
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='lifter@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Exercise.objects.create(name='Bench Press', primary_muscle='chest', equipment_type='barbell')
+        TrainingResearch.objects.create(
+            title='Rest intervals', summary='Longer rests for heavy sets', content='...', category='MUSCLE_GROUPS'
+        )
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        settings = override_settings(STATIC_ROOT=self.static_root.name, CATALOG_X_ACCEL_REDIRECT=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_bundles_are_content_hashed_and_match_the_api(self):
+        """Test bundles are named by their hash, gzip to the same bytes and rebuild idempotently"""
+        import gzip
+        import hashlib
+        from django.core.management import call_command
+        from exercise.models import Exercise
+
+        call_command('build_catalog_bundles', stdout=io.StringIO())
+        root = os.path.join(self.static_root.name, 'catalog')
+        with open(os.path.join(root, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertEqual(set(manifest), {'exercises', 'supplements', 'achievements', 'research'})
+        self.assertTrue(manifest['research']['file'].startswith('pro/'))
+
+        for name, entry in manifest.items():
+            with open(os.path.join(root, entry['file']), 'rb') as f:
+                payload = f.read()
+            self.assertEqual(hashlib.sha256(payload).hexdigest()[:16], entry['hash'])
+            self.assertIn(entry['hash'], entry['file'])
+            with open(os.path.join(root, entry['file'] + '.gz'), 'rb') as f:
+                self.assertEqual(gzip.decompress(f.read()), payload)
+
+        with open(os.path.join(root, manifest['exercises']['file'])) as f:
+            self.assertEqual(json.load(f), json.loads(self.client.get('/api/exercise/list/').content))
+
+        # Unchanged catalogs keep their files; a changed one gets a new name and --prune drops the old one
+        output = io.StringIO()
+        call_command('build_catalog_bundles', stdout=output)
+        self.assertIn('0 new bundles', output.getvalue())
+        Exercise.objects.create(name='Deadlift', primary_muscle='back', equipment_type='barbell')
+        call_command('build_catalog_bundles', '--bundles', 'exercises', '--prune', stdout=io.StringIO())
+        with open(os.path.join(root, 'manifest.json')) as f:
+            rebuilt = json.load(f)
+        self.assertNotEqual(rebuilt['exercises']['hash'], manifest['exercises']['hash'])
+        self.assertEqual(rebuilt['supplements'], manifest['supplements'])
+        self.assertFalse(os.path.exists(os.path.join(root, manifest['exercises']['file'])))
+        self.assertTrue(os.path.exists(os.path.join(root, manifest['supplements']['file'])))
+
+    def test_manifest_lists_pro_bundles_for_pro_users_only(self):
+        """Test the manifest links public bundles statically and the research bundle only for PRO users"""
+        from django.core.management import call_command
+        from .catalog_bundles import read_manifest
+
+        response = self.client.get('/api/catalog/manifest/')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        call_command('build_catalog_bundles', stdout=io.StringIO())
+        response = self.client.get('/api/catalog/manifest/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'exercises', 'supplements', 'achievements'})
+        exercises = response.data['exercises']
+        self.assertEqual(exercises['url'], f"/static/catalog/exercises.{exercises['hash']}.json")
+        self.assertEqual(
+            self.client.get('/api/catalog/manifest/', HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        research_hash = read_manifest()['research']['hash']
+        research_url = f'/api/catalog/research/{research_hash}/'
+        self.assertEqual(self.client.get(research_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_pro = True
+        self.user.pro_until = timezone.now() + timedelta(days=30)
+        self.user.save()
+        response = self.client.get('/api/catalog/manifest/')
+        self.assertEqual(response.data['research']['url'], research_url)
+        response = self.client.get(research_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(b''.join(response.streaming_content))[0]['title'], 'Rest intervals')
+        self.assertEqual(self.client.get('/api/catalog/research/0000/').status_code, status.HTTP_404_NOT_FOUND)
+
+        with override_settings(CATALOG_X_ACCEL_REDIRECT=True):
+            response = self.client.get(research_url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/catalog/pro/research.{research_hash}.json')
@@ -1,10 +1,21 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, BasePermission, IsAdminUser, IsAuthenticated
 from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.templatetags.static import static
+from django.urls import reverse
+from user.auth_cache import auth_user_cache_stats
+from workout.permissions import get_pro_response, is_pro_user
+import hmac
+import os
+
+from . import metrics
+from .catalog_bundles import BUNDLE_DIR, bundle_root, read_manifest
+from .conditional import ConditionalGetMixin
 
 class HealthCheckView(APIView):
     """
@@ -64,6 +75,11 @@ class HealthCheckView(APIView):
                 'message': f'Cache connection failed: {str(e)}'
             }
         
+        # Per-process cache metrics
+        health_status['metrics'] = {
+            'auth_user_cache': auth_user_cache_stats(),
+        }
+        
         # Add environment info (non-sensitive)
         health_status['environment'] = {
             'debug': settings.DEBUG,
@@ -72,3 +88,91 @@ class HealthCheckView(APIView):
         
         http_status = status.HTTP_200_OK if overall_healthy else status.HTTP_503_SERVICE_UNAVAILABLE
         return Response(health_status, status=http_status)
+
+
+class HasMetricsToken(BasePermission):
+    """Allows requests sending "Authorization: Metrics <METRICS_TOKEN>" (for Prometheus scrapers)."""
+    
+    def has_permission(self, request, view):
+        if not settings.METRICS_TOKEN:
+            return False
+        scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+        return scheme == 'Metrics' and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+
+
+class MetricsView(APIView):
+    """
+    GET /api/metrics/
+    Request, latency, database query and cache metrics of all workers in
+    Prometheus text format (see core/metrics.py). Staff users or scrapers
+    holding METRICS_TOKEN only.
+    """
+    permission_classes = [IsAdminUser | HasMetricsToken]
+    throttle_classes = []
+    
+    def get(self, request):
+        return HttpResponse(
+            metrics.render(*metrics.collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class CatalogManifestView(ConditionalGetMixin, APIView):
+    """
+    GET /api/catalog/manifest/
+    Hash, size and URL of each pre-rendered catalog bundle (see
+    core/catalog_bundles.py). Public bundles are static files nginx caches for
+    a year; PRO-only bundles are listed for PRO users with an API URL.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_etag_parts(self, request):
+        manifest = read_manifest() or {}
+        return (sorted((name, entry['hash']) for name, entry in manifest.items()), is_pro_user(request.user))
+
+    def get(self, request):
+        manifest = read_manifest()
+        if manifest is None:
+            return Response(
+                {'error': 'Catalog bundles have not been built'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        is_pro = is_pro_user(request.user)
+        bundles = {}
+        for name, entry in sorted(manifest.items()):
+            if entry['pro_only']:
+                if not is_pro:
+                    continue
+                url = reverse('catalog-bundle', args=[name, entry['hash']])
+            else:
+                url = static(f"{BUNDLE_DIR}/{entry['file']}")
+            bundles[name] = {'hash': entry['hash'], 'bytes': entry['bytes'], 'url': url}
+        return Response(bundles)
+
+
+class CatalogBundleView(APIView):
+    """
+    GET /api/catalog/<name>/<hash>/
+    A PRO-only catalog bundle. Behind nginx the file is sent by nginx via
+    X-Accel-Redirect; otherwise Django streams it. The URL names the content
+    hash, so the response may be cached privately for good.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, name, bundle_hash):
+        entry = (read_manifest() or {}).get(name)
+        if entry is None or entry['hash'] != bundle_hash:
+            return Response({'error': 'Catalog bundle not found'}, status=status.HTTP_404_NOT_FOUND)
+        if entry['pro_only'] and not is_pro_user(request.user):
+            return get_pro_response()
+
+        if settings.CATALOG_X_ACCEL_REDIRECT:
+            response = HttpResponse(content_type='application/json')
+            response['X-Accel-Redirect'] = f"/protected/{BUNDLE_DIR}/{entry['file']}"
+        else:
+            file_path = os.path.join(bundle_root(), entry['file'])
+            if not os.path.exists(file_path):
+                return Response({'error': 'Catalog bundle not found'}, status=status.HTTP_404_NOT_FOUND)
+            response = FileResponse(open(file_path, 'rb'), content_type='application/json')
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
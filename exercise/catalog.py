@@ -0,0 +1,63 @@
+"""
+Version stamp of the exercise catalog, shared by all workers through the cache.
+
+Process-local structures built from the catalog (the search index) remember
+the version they were built from and rebuild when it moves. Saving or
+deleting an exercise drops this process's copies right away and bumps the
+shared version once the transaction commits; other workers read the version
+at most every CHECK_SECONDS, so they pick the change up within that window.
+
+Versions are random tokens rather than counters, so a version key that was
+evicted and recreated can never repeat one a worker already built from. An
+evicted key is re-added with this process's token instead of counting as a
+change.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Exercise
+
+VERSION_KEY = 'exercise_catalog_version'
+CHECK_SECONDS = 5
+
+_state = {'version': None, 'checked_at': 0.0}
+_listeners = []
+
+
+def catalog_version():
+    now = time.monotonic()
+    if _state['version'] is None or now - _state['checked_at'] >= CHECK_SECONDS:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, _state['version'] or uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        _state['version'] = version
+        _state['checked_at'] = now
+    return _state['version']
+
+
+def bump_catalog_version():
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY, version, None)
+    _state['version'] = version
+    _state['checked_at'] = time.monotonic()
+    return version
+
+
+def on_catalog_change(callback):
+    """Register a callable that drops a process-local copy of the catalog."""
+    _listeners.append(callback)
+    return callback
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def exercise_changed(sender, **kwargs):
+    for callback in _listeners:
+        callback()
+    transaction.on_commit(bump_catalog_version)
@@ -0,0 +1,112 @@
+"""
+Process-wide, read-only copy of the exercise catalog.
+
+The catalog is small (~140 rows) and changes only through the admin and
+populate_exercises, yet nearly every workout query joined it and every
+WorkoutExercise in a response re-serialized it. The registry loads it once
+per catalog version (see catalog.py) into compact ExerciseRecord objects
+plus the ExerciseSerializer output of each exercise, so hot paths look
+exercises up by id instead of joining and serializing them.
+
+Records and serialized dicts are shared by every request in the process:
+treat them as read-only.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from .catalog import catalog_version, on_catalog_change
+from .models import Exercise
+from .serializers import ExerciseSerializer
+
+# Backstop for catalog writes that bypass signals (queryset.update)
+REBUILD_SECONDS = 60 * 60
+
+
+class ExerciseRecord:
+    """The Exercise fields workout code reads, with the same attribute names."""
+    __slots__ = (
+        'id', 'name', 'primary_muscle', 'secondary_muscles', 'equipment_type',
+        'category', 'difficulty_level', 'is_active',
+    )
+
+    def __init__(self, exercise):
+        self.id = exercise.id
+        self.name = exercise.name
+        self.primary_muscle = exercise.primary_muscle
+        self.secondary_muscles = tuple(exercise.secondary_muscles or ())
+        self.equipment_type = exercise.equipment_type
+        self.category = exercise.category
+        self.difficulty_level = exercise.difficulty_level
+        self.is_active = exercise.is_active
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        return f'<ExerciseRecord {self.id}: {self.name}>'
+
+
+class ExerciseRegistry:
+    def __init__(self, exercises, version=None):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.records = {}
+        self.serialized = {}
+        for exercise, data in zip(exercises, ExerciseSerializer(exercises, many=True).data):
+            self.records[exercise.id] = ExerciseRecord(exercise)
+            self.serialized[exercise.id] = dict(data)
+        # Changes whenever any serialized exercise does; used in ETags of responses embedding exercises
+        self.digest = hashlib.sha1(
+            json.dumps(list(self.serialized.values()), sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() - self.built_at < REBUILD_SECONDS
+
+
+_lock = threading.Lock()
+_state = {'registry': None}
+
+
+def get_registry():
+    version = catalog_version()
+    registry = _state['registry']
+    if registry is not None and registry.is_current(version):
+        return registry
+    with _lock:
+        registry = _state['registry']
+        if registry is None or not registry.is_current(version):
+            registry = ExerciseRegistry(list(Exercise.objects.order_by('id')), version)
+            _state['registry'] = registry
+    return registry
+
+
+def _lookup(exercise_id, table):
+    try:
+        exercise_id = int(exercise_id)
+    except (TypeError, ValueError):
+        return None
+    value = getattr(get_registry(), table).get(exercise_id)
+    if value is None and Exercise.objects.filter(pk=exercise_id).exists():
+        # Created in another worker since this one last read the catalog version
+        drop_registry()
+        value = getattr(get_registry(), table).get(exercise_id)
+    return value
+
+
+def get_exercise(exercise_id):
+    """ExerciseRecord for exercise_id, or None if there is no such exercise."""
+    return _lookup(exercise_id, 'records')
+
+
+def serialized_exercise(exercise_id):
+    """ExerciseSerializer data for exercise_id, or None if there is no such exercise."""
+    return _lookup(exercise_id, 'serialized')
+
+
+@on_catalog_change
+def drop_registry():
+    _state['registry'] = None
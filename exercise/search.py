@@ -0,0 +1,154 @@
+"""
+Process-local search index over the active exercise catalog.
+
+Names, primary muscles and equipment types (stored value and display label,
+so "back" finds lats and traps) are split into tokens with the same plural
+rule the old icontains search used: a trailing "s" is dropped from words
+longer than three letters. Every query word has to match, in order of
+preference, a whole token, the start of a token (search-as-you-type), any
+part of a token, or, when none of those match, a similarly spelled token by
+trigram overlap. Results are ranked by field (name over muscle over
+equipment) and match quality.
+
+The index is built from the exercise registry and rebuilt whenever the
+registry is (see registry.py), so searches run no queries at all.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from .models import Exercise
+from .registry import get_registry
+
+FIELD_WEIGHTS = {'name': 3.0, 'primary_muscle': 2.0, 'equipment_type': 1.0}
+EXACT, PREFIX, PARTIAL = 1.0, 0.8, 0.5
+# Dice coefficient of padded trigrams a typo has to reach; 'calf' vs 'calve' is 0.44
+FUZZY_THRESHOLD = 0.4
+FUZZY_MIN_LENGTH = 4
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_MUSCLE_LABELS = dict(Exercise.MUSCLE_GROUPS)
+_EQUIPMENT_LABELS = dict(Exercise.EQUIPMENT_TYPES)
+
+
+def normalize(word):
+    return word[:-1] if word.endswith('s') and len(word) > 3 else word
+
+
+def tokenize(text):
+    return [normalize(word) for word in _TOKEN.findall((text or '').lower())]
+
+
+def trigrams(token):
+    padded = f'${token}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ExerciseSearchIndex:
+    def __init__(self, registry):
+        self.registry = registry
+        self.ids = []
+        self.names = {}
+        # token -> {exercise id: best field weight}
+        self.postings = defaultdict(dict)
+        for exercise in registry.records.values():
+            if not exercise.is_active:
+                continue
+            self.ids.append(exercise.id)
+            self.names[exercise.id] = exercise.name.lower()
+            muscle, equipment = exercise.primary_muscle, exercise.equipment_type
+            fields = {
+                'name': exercise.name,
+                'primary_muscle': f'{muscle} {_MUSCLE_LABELS.get(muscle, "")}',
+                'equipment_type': f'{equipment} {_EQUIPMENT_LABELS.get(equipment, "")}',
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    posting = self.postings[token]
+                    posting[exercise.id] = max(posting.get(exercise.id, 0.0), weight)
+        self.postings = dict(self.postings)
+        self.tokens = sorted(self.postings)
+        self.trigrams = defaultdict(set)
+        self.gram_counts = {}
+        for token in self.tokens:
+            grams = trigrams(token)
+            self.gram_counts[token] = len(grams)
+            for gram in grams:
+                self.trigrams[gram].add(token)
+        self.trigrams = dict(self.trigrams)
+
+    def _candidates(self, term):
+        """(token, match quality) pairs for one normalized query word."""
+        matches = {}
+        if term in self.postings:
+            matches[term] = EXACT
+        start = bisect_left(self.tokens, term)
+        for token in self.tokens[start:]:
+            if not token.startswith(term):
+                break
+            matches.setdefault(token, PREFIX)
+        for token in self.tokens:
+            if token not in matches and term in token:
+                matches[token] = PARTIAL
+        if matches or len(term) < FUZZY_MIN_LENGTH:
+            return matches
+
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for token in self.trigrams.get(gram, ()):
+                shared[token] += 1
+        for token, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.gram_counts[token])
+            if similarity >= FUZZY_THRESHOLD:
+                matches[token] = PARTIAL * similarity
+        return matches
+
+    def search(self, query):
+        """Ids of the exercises matching every word of query, best first."""
+        terms = tokenize(query)
+        if not terms:
+            return list(self.ids)
+
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token, quality in self._candidates(term).items():
+                for exercise_id, weight in self.postings[token].items():
+                    score = weight * quality
+                    if score > term_scores.get(exercise_id, 0.0):
+                        term_scores[exercise_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    exercise_id: score + term_scores[exercise_id]
+                    for exercise_id, score in scores.items() if exercise_id in term_scores
+                }
+            if not scores:
+                return []
+        return sorted(scores, key=lambda exercise_id: (
+            -scores[exercise_id], len(self.names[exercise_id]), self.names[exercise_id], exercise_id
+        ))
+
+    def serialized(self, exercise_ids):
+        return [self.registry.serialized[exercise_id] for exercise_id in exercise_ids]
+
+
+_lock = threading.Lock()
+_state = {'index': None}
+
+
+def get_search_index():
+    registry = get_registry()
+    index = _state['index']
+    if index is not None and index.registry is registry:
+        return index
+    with _lock:
+        index = _state['index']
+        if index is None or index.registry is not registry:
+            index = ExerciseSearchIndex(registry)
+            _state['index'] = index
+    return index
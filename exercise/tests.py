@@ -1,3 +1,91 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Exercise
+
+
+class ExerciseSearchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='test@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        for name, muscle, equipment in [
+            ('Barbell Bench Press', 'chest', 'barbell'),
+            ('Dumbbell Bicep Curl', 'biceps', 'dumbbell'),
+            ('Cable Lat Pulldown', 'lats', 'cable'),
+            ('Standing Calf Raise', 'calves', 'machine'),
+            ('Leg Press', 'quads', 'machine'),
+        ]:
+            Exercise.objects.create(name=name, primary_muscle=muscle, equipment_type=equipment)
+        Exercise.objects.create(name='Retired Press', primary_muscle='chest', equipment_type='machine', is_active=False)
+
+    def search(self, query):
+        response = self.client.get('/api/exercise/list/', {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [exercise['name'] for exercise in response.data]
+
+    def test_search_matches_tokens_prefixes_plurals_and_typos(self):
+        """Test plurals, search-as-you-type prefixes, muscle labels and misspellings all find exercises"""
+        self.assertEqual(len(self.search('')), 5)
+        self.assertEqual(self.search('curls'), ['Dumbbell Bicep Curl'])
+        self.assertEqual(self.search('benc'), ['Barbell Bench Press'])
+        # Equal matches rank shorter names first; inactive exercises are never returned
+        self.assertEqual(self.search('press'), ['Leg Press', 'Barbell Bench Press'])
+        self.assertEqual(self.search('machine press'), ['Leg Press'])
+        # "back" is part of the lats label ("Back – Lats")
+        self.assertEqual(self.search('back'), ['Cable Lat Pulldown'])
+        self.assertEqual(self.search('dumbell curl'), ['Dumbbell Bicep Curl'])
+        self.assertEqual(self.search('calf'), ['Standing Calf Raise'])
+        self.assertEqual(self.search('zzz'), [])
+
+    def test_search_runs_no_queries_and_follows_catalog_changes(self):
+        """Test warm searches run no queries and saved exercises show up in the next search"""
+        self.search('press')
+        with self.assertNumQueries(0):
+            self.search('pres')
+
+        Exercise.objects.create(name='Dumbbell Shoulder Press', primary_muscle='shoulders', equipment_type='dumbbell')
+        self.assertIn('Dumbbell Shoulder Press', self.search('shoulder'))
+        Exercise.objects.filter(name='Leg Press').get().delete()
+        self.assertEqual(self.search('leg press'), [])
+
+
+class ExerciseRegistryTestCase(TestCase):
+    def setUp(self):
+        self.bench = Exercise.objects.create(
+            name='Barbell Bench Press', primary_muscle='chest', equipment_type='barbell',
+            secondary_muscles=['triceps', 'shoulders']
+        )
+
+    def test_registry_is_built_once_per_catalog_version(self):
+        """Test records and serialized exercises are reused until the shared catalog version moves"""
+        from .catalog import bump_catalog_version
+        from .registry import get_exercise, get_registry, serialized_exercise
+        from .serializers import ExerciseSerializer
+
+        registry = get_registry()
+        with self.assertNumQueries(0):
+            self.assertIs(get_registry(), registry)
+            record = get_exercise(self.bench.id)
+            self.assertEqual((record.name, record.category), ('Barbell Bench Press', 'compound'))
+            self.assertEqual(record.secondary_muscles, ('triceps', 'shoulders'))
+            self.assertIs(serialized_exercise(str(self.bench.id)), serialized_exercise(self.bench.id))
+        self.assertEqual(serialized_exercise(self.bench.id), ExerciseSerializer(self.bench).data)
+
+        # Another worker changed the catalog
+        bump_catalog_version()
+        self.assertIsNot(get_registry(), registry)
+
+    def test_unknown_ids_and_writes_that_skip_signals(self):
+        """Test unknown ids return None and exercises the registry has not seen yet are still found"""
+        from .registry import get_exercise
+
+        self.assertIsNone(get_exercise(self.bench.id + 100))
+        self.assertIsNone(get_exercise('not-an-id'))
+        # bulk_create sends no post_save, so the registry is stale until the lookup misses
+        squat, = Exercise.objects.bulk_create([
+            Exercise(name='Barbell Squat', primary_muscle='quads', equipment_type='barbell')
+        ])
+        self.assertEqual(get_exercise(squat.id).name, 'Barbell Squat')
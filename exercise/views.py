@@ -1,6 +1,9 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
+from core.conditional import ConditionalGetMixin
 from .models import Exercise
+from .registry import get_exercise, get_registry, serialized_exercise
+from .search import get_search_index
 from .serializers import ExerciseSerializer
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
@@ -8,52 +11,28 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from workout.models import Workout, WorkoutExercise
-from django.core.cache import cache
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
 
 class ExercisePagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
 
-class ExerciseListView(APIView):
+class ExerciseListView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = ExercisePagination
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
 
+    def get_etag_parts(self, request):
+        return get_registry().digest
+
     def get(self, request):
         query = request.query_params.get('search', None)
-        cache_key = f'exercises_list_{query or "all"}'
-        
-        # Cache globally (same for all users) - exercises don't change per user
-        exercises_data = cache.get(cache_key)
-        if exercises_data is None:
-            exercises = Exercise.objects.filter(is_active=True)
-            if query:
-                keywords = query.lower().split()
-                for word in keywords:
-                    # Search for word in name, primary_muscle or equipment_type
-                    # Also handle simple plurals by stripping 's' from query word
-                    q_obj = Q(name__icontains=word) | \
-                            Q(primary_muscle__icontains=word) | \
-                            Q(equipment_type__icontains=word)
-                    
-                    if word.endswith('s') and len(word) > 3:
-                        singular = word[:-1]
-                        q_obj |= Q(name__icontains=singular) | \
-                                 Q(primary_muscle__icontains=singular) | \
-                                 Q(equipment_type__icontains=singular)
-                    
-                    exercises = exercises.filter(q_obj)
-            
-            serializer = ExerciseSerializer(exercises, many=True)
-            exercises_data = serializer.data
-            cache.set(cache_key, exercises_data, 60*60)  # 1 hour cache
-        
-        return Response(exercises_data)
-        
+        # Searched in the process-local index; no queries once it is built
+        index = get_search_index()
+        return Response(index.serialized(index.search(query or '')))
+
 class addExerciseToWorkoutView(APIView):
     permission_classes = [IsAuthenticated]
     def post(self, request, workout_id):
@@ -69,13 +48,12 @@ class addExerciseToWorkoutView(APIView):
         if not exercise_id:
             return Response({'error': 'exercise_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            exercise = Exercise.objects.get(id=exercise_id)
-        except Exercise.DoesNotExist:
-             return Response({'error': 'Exercise not found'}, status=status.HTTP_404_NOT_FOUND)
+        exercise = get_exercise(exercise_id)
+        if exercise is None:
+            return Response({'error': 'Exercise not found'}, status=status.HTTP_404_NOT_FOUND)
 
         # Fix: Create a WorkoutExercise object instead of workout.exercises.add()
-        WorkoutExercise.objects.create(workout=workout, exercise=exercise, order=order)
+        WorkoutExercise.objects.create(workout=workout, exercise_id=exercise.id, order=order)
         
-        return Response(ExerciseSerializer(exercise).data, status=status.HTTP_200_OK)
+        return Response(serialized_exercise(exercise.id), status=status.HTTP_200_OK)
 
@@ -8,9 +8,89 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'utrack.settings')
 django.setup()
 
 from django.core.management import call_command
+from django.core.serializers.python import Deserializer
 from django.db.models.signals import post_save, pre_save
 from django.contrib.contenttypes.models import ContentType
-from django.db import connection
+from django.db import connection, transaction
+
+from core.json_stream import iter_json_array
+from user.timezones import fill_local_dates
+
+FIXTURE_PATH = 'datadump_clean.json'
+# Fixture records deserialized and inserted per round
+FIXTURE_BATCH_SIZE = 1000
+# Models whose local_date is derived in save(), which raw inserts skip; dumps taken
+# before the column existed lack it. Model label -> the datetime it is derived from
+LOCAL_DATE_SOURCES = {
+    'workout.workout': 'datetime',
+    'user.weighthistory': 'created_at',
+    'body_measurements.bodymeasurement': 'created_at',
+}
+
+
+def _insert_raw(objects):
+    """Insert deserialized rows of one model as-is (like loaddata's raw save) in as few INSERTs as the backend allows."""
+    model = type(objects[0])
+    fields = model._meta.local_concrete_fields
+    step = connection.ops.bulk_batch_size(fields, objects) or len(objects)
+    for start in range(0, len(objects), step):
+        model._base_manager._insert(objects[start:start + step], fields=fields, raw=True)
+
+
+def _model_runs(records):
+    """Group consecutive fixture records of the same model into runs of at most FIXTURE_BATCH_SIZE."""
+    run = []
+    for record in records:
+        if run and (record.get('model') != run[0].get('model') or len(run) >= FIXTURE_BATCH_SIZE):
+            yield run
+            run = []
+        run.append(record)
+    if run:
+        yield run
+
+
+def load_fixture_streaming(path):
+    """
+    Load a dumpdata fixture without reading it into memory.
+
+    Records are parsed one at a time and inserted per run of the same model,
+    so natural foreign keys always resolve against rows already written.
+    Rows without a primary key (natural primary keys), rows that already
+    exist and rows with many-to-many data go through the regular loaddata
+    save. Returns the number of objects loaded.
+    """
+    total_bytes = os.path.getsize(path)
+    reported = [0]
+
+    def progress(bytes_read):
+        percent = bytes_read * 100 // total_bytes if total_bytes else 100
+        if percent >= reported[0] + 10:
+            reported[0] = percent
+            print(f"  ...{percent}% read ({bytes_read:,}/{total_bytes:,} bytes)")
+
+    loaded = 0
+    with open(path, 'rb') as fixture, transaction.atomic():
+        for run in _model_runs(iter_json_array(fixture, progress=progress)):
+            deserialized_run = list(Deserializer(run, ignorenonexistent=True))
+            model = type(deserialized_run[0].object)
+            source_field = LOCAL_DATE_SOURCES.get(model._meta.label_lower)
+            if source_field:
+                fill_local_dates([d.object for d in deserialized_run], source_field)
+            # Rows that already exist (e.g. recreated by migrate) are updated like loaddata does
+            existing = set(model._base_manager.filter(
+                pk__in=[d.object.pk for d in deserialized_run if d.object.pk is not None]
+            ).values_list('pk', flat=True))
+            objects = []
+            for deserialized in deserialized_run:
+                if deserialized.object.pk is None or deserialized.object.pk in existing or deserialized.m2m_data:
+                    deserialized.save()
+                else:
+                    objects.append(deserialized.object)
+            if objects:
+                _insert_raw(objects)
+            loaded += len(run)
+    return loaded
+
 
 def run_migration():
     print("--- Starting Master Migration Process ---")
@@ -39,10 +119,11 @@ def run_migration():
 
     try:
         # 6. Load the data
-        print("Step 5: Loading datadump_clean.json...")
+        # Streamed record by record instead of loaddata's json.load of the whole dump
+        print(f"Step 5: Loading {FIXTURE_PATH}...")
         # We use ignorenonexistent=True to handle any tiny model differences
-        call_command('loaddata', 'datadump_clean.json')
-        print("SUCCESS: Data imported.")
+        loaded = load_fixture_streaming(FIXTURE_PATH)
+        print(f"SUCCESS: Data imported ({loaded} objects).")
     except Exception as e:
         print(f"FAILED during loaddata: {e}")
         return
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('supplements', '0002_supplement_bioavailability_score_usersupplementlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='usersupplementlog',
+            index=models.Index(fields=['user', '-date', '-time'], name='supplements_user_id_d7c501_idx'),
+        ),
+    ]
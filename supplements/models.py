@@ -56,6 +56,11 @@ class UserSupplementLog(TimestampedModel):
     date = models.DateField()
     time = models.TimeField()
     dosage = models.FloatField(help_text="Amount taken")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date', '-time']),  # today's logs, newest first
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.user_supplement.supplement.name} - {self.date} - {self.time}"
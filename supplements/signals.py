@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.conditional import touch_data
+
+from .models import Supplement
+
+
+@receiver(post_save, sender=Supplement)
+@receiver(post_delete, sender=Supplement)
+def supplement_catalog_changed(sender, **kwargs):
+    """New ETags for the supplement list (see core/conditional.py)."""
+    touch_data('supplements')
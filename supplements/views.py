@@ -6,25 +6,25 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from .models import Supplement, UserSupplement, UserSupplementLog
 from .serializers import SupplementSerializer, UserSupplementSerializer, UserSupplementLogSerializer
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
 from django.db.models import Q
 from django.utils import timezone
 from rest_framework.pagination import PageNumberPagination
+from core.conditional import ConditionalGetMixin, data_version
 
 class SupplementPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
 
-class SupplementListView(APIView):
+class SupplementListView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = SupplementPagination
 
-    # Cache this view for 15 minutes (60 seconds * 15) 
-    # django keeps cached data in memory for 15 minutes so it doesn't have to hit the database every time
-    # for multiple servers in production we can use redis to cache the data
-    @method_decorator(cache_page(60*15))
+    def get_etag_parts(self, request):
+        return data_version('supplements')
+
+    # Revalidated with ETags instead of cache_page, which kept serving the old list
+    # for 15 minutes after a catalog change
     def get(self, request):
         query = request.query_params.get('search', None)
         if query:
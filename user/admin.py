@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import CustomUser, UserProfile, SecurityStatus, Preferences
+from .models import CustomUser, UserProfile, SecurityStatus, Preferences, DataExportJob
 
 admin.site.register(CustomUser)
 admin.site.register(UserProfile)
 admin.site.register(SecurityStatus)
 admin.site.register(Preferences)
+admin.site.register(DataExportJob)
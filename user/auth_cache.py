@@ -0,0 +1,88 @@
+"""
+Short-lived cache of authenticated users for JWT requests.
+
+Users are cached by id and token version (a digest of the password hash
+carried in the token's 'ver' claim), so tokens issued before a password
+change never share an entry with tokens issued after it. Entries are deleted
+whenever the user is saved or deleted, which covers password changes and
+deactivation; anything else expires after AUTH_USER_CACHE_SECONDS.
+
+Invalidation only reaches other workers through a shared cache, so the cache
+is off (AUTH_USER_CACHE_SECONDS = 0) unless REDIS_URL is set.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.metrics import record_cache
+
+from .models import CustomUser
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def token_version(password_hash):
+    """Short digest of a password hash; changes whenever the password does."""
+    return hashlib.sha256((password_hash or '').encode()).hexdigest()[:12]
+
+
+def _cache_key(user_id, version):
+    return f'auth_user:{user_id}:{version}'
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def auth_user_cache_enabled():
+    return settings.AUTH_USER_CACHE_SECONDS > 0
+
+
+def get_cached_user(user_id, version):
+    if not auth_user_cache_enabled():
+        return None
+    user = cache.get(_cache_key(user_id, version))
+    _record('hits' if user is not None else 'misses')
+    record_cache('auth_user', user is not None)
+    return user
+
+
+def cache_user(user):
+    if not auth_user_cache_enabled():
+        return
+    cache.set(_cache_key(user.pk, token_version(user.password)), user, settings.AUTH_USER_CACHE_SECONDS)
+
+
+def invalidate_user(user):
+    keys = [_cache_key(user.pk, token_version(user.password))]
+    previous_password = getattr(user, '_previous_password', None)
+    if previous_password is not None:
+        keys.append(_cache_key(user.pk, token_version(previous_password)))
+    cache.delete_many(keys)
+
+
+def auth_user_cache_stats():
+    """Hit/miss counts of this process since it started."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    lookups = hits + misses
+    return {
+        'enabled': auth_user_cache_enabled(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else None,
+    }
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance)
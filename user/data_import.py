@@ -0,0 +1,341 @@
+"""
+Bulk importer behind DataImportView and the import_user_data command.
+
+Exercise and supplement names are resolved through in-memory maps, rows are
+written with chunked bulk_create inside one transaction, and the derived data
+(calories, personal records, achievements, statistics) is rebuilt once at the
+end instead of per set through the signal handlers.
+"""
+from decimal import Decimal
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+from body_measurements.models import BodyMeasurement
+from core.conditional import touch_user_data
+from core.json_stream import iter_json_object
+from exercise.models import Exercise
+from supplements.models import Supplement, UserSupplement, UserSupplementLog
+from workout.models import Workout, WorkoutExercise, ExerciseSet, TemplateWorkout, TemplateWorkoutExercise
+from .models import Preferences, UserProfile, WeightHistory
+from .timezones import local_date, validate_timezone
+
+logger = logging.getLogger('user')
+
+# Workouts written per round of bulk_create (their exercises and sets follow in the same round)
+IMPORT_CHUNK_SIZE = 500
+IMPORT_BATCH_SIZE = 1000
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _to_datetime(value):
+    value = parse_datetime(value) if isinstance(value, str) else value
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _to_decimal(value):
+    return Decimal(str(value)).quantize(Decimal('0.01')) if value is not None else None
+
+
+def _name_map(model):
+    """Lowercased name -> id, keeping the lowest id when names collide."""
+    names = {}
+    for pk, name in model.objects.order_by('id').values_list('id', 'name').iterator(chunk_size=2000):
+        names.setdefault(name.lower(), pk)
+    return names
+
+
+def _keep_created_at(model, objects, created_at):
+    """bulk_create stamps auto_now_add fields; write the imported timestamps back."""
+    for obj, value in zip(objects, created_at):
+        obj.created_at = value
+    model.objects.bulk_update(objects, ['created_at'], batch_size=IMPORT_BATCH_SIZE)
+
+
+def import_profile(user, profile_data):
+    if 'gender' in profile_data:
+        user.gender = profile_data['gender']
+    user.save()
+
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    if 'height' in profile_data:
+        profile.height = profile_data['height']
+    if 'weight' in profile_data:
+        profile.body_weight = profile_data['weight']
+    profile.save()
+
+
+def import_preferences(user, preferences_data):
+    preferences, _ = Preferences.objects.get_or_create(user=user)
+    if 'auto_warmup_set' in preferences_data:
+        preferences.auto_warmup_set = preferences_data['auto_warmup_set']
+    if 'rest_time' in preferences_data:
+        preferences.rest_time = preferences_data['rest_time']
+    if 'units' in preferences_data:
+        preferences.units = preferences_data['units']
+    if 'timezone' in preferences_data:
+        try:
+            validate_timezone(preferences_data['timezone'])
+            preferences.timezone = preferences_data['timezone']
+        except ValidationError:
+            logger.warning(f"Ignoring invalid timezone {preferences_data['timezone']!r} in import for {user.email}")
+    preferences.save()
+    # The rows imported next compute their local dates from this preference
+    user.preferences = preferences
+
+
+def import_weight_history(user, entries):
+    seen = set(WeightHistory.objects.filter(user=user).values_list('weight', 'created_at'))
+    created = 0
+    for chunk in _chunked(entries, IMPORT_BATCH_SIZE):
+        objects, created_at = [], []
+        for entry in chunk:
+            key = (_to_decimal(entry['weight']), _to_datetime(entry['created_at']))
+            if key in seen:
+                continue
+            seen.add(key)
+            objects.append(WeightHistory(user=user, weight=key[0], local_date=local_date(user, key[1])))
+            created_at.append(key[1])
+        WeightHistory.objects.bulk_create(objects, batch_size=IMPORT_BATCH_SIZE)
+        _keep_created_at(WeightHistory, objects, created_at)
+        created += len(objects)
+    return created
+
+
+def import_body_measurements(user, entries):
+    seen = set(BodyMeasurement.objects.filter(user=user).values_list('created_at', flat=True))
+    # Exports do not carry height; fall back to the profile height
+    profile = UserProfile.objects.filter(user=user).first()
+    height = profile.height if profile and profile.height else 0
+    created = 0
+    for chunk in _chunked(entries, IMPORT_BATCH_SIZE):
+        objects, created_at = [], []
+        for entry in chunk:
+            entry_created_at = _to_datetime(entry['created_at'])
+            if entry_created_at in seen:
+                continue
+            seen.add(entry_created_at)
+            # bulk_create skips BodyMeasurement.save(), so the exported
+            # body fat is kept as-is instead of being recalculated
+            objects.append(BodyMeasurement(
+                user=user,
+                height=entry.get('height') or height,
+                weight=entry.get('weight'),
+                body_fat_percentage=entry.get('body_fat_percentage'),
+                neck=entry.get('neck'),
+                waist=entry.get('waist'),
+                hips=entry.get('hip'),
+                gender=user.gender or 'male',
+                local_date=local_date(user, entry_created_at),
+            ))
+            created_at.append(entry_created_at)
+        BodyMeasurement.objects.bulk_create(objects, batch_size=IMPORT_BATCH_SIZE)
+        _keep_created_at(BodyMeasurement, objects, created_at)
+        created += len(objects)
+    return created
+
+
+def import_workouts(user, entries, exercise_ids):
+    """Create workouts that do not exist yet (matched on datetime) with their exercises and sets."""
+    seen = set(Workout.objects.filter(user=user).values_list('datetime', flat=True))
+    counts = {'workouts': 0, 'sets': 0}
+    for chunk in _chunked(entries, IMPORT_CHUNK_SIZE):
+        workouts, workout_entries = [], []
+        for entry in chunk:
+            workout_datetime = _to_datetime(entry['datetime'])
+            if workout_datetime in seen:
+                continue
+            seen.add(workout_datetime)
+            workouts.append(Workout(
+                user=user,
+                datetime=workout_datetime,
+                local_date=local_date(user, workout_datetime),
+                title=entry['title'],
+                duration=entry['duration'],
+                intensity=entry['intensity'],
+                notes=entry.get('notes'),
+                is_done=entry.get('is_done', True),
+                is_rest_day=entry.get('is_rest_day', False),
+                calories_burned=entry.get('calories_burned'),
+            ))
+            workout_entries.append(entry)
+        Workout.objects.bulk_create(workouts, batch_size=IMPORT_BATCH_SIZE)
+
+        workout_exercises, exercise_entries = [], []
+        for workout, entry in zip(workouts, workout_entries):
+            for exercise_entry in entry.get('exercises', []):
+                exercise_id = exercise_ids.get(exercise_entry['exercise_name'].lower())
+                if exercise_id is None:
+                    continue
+                workout_exercises.append(WorkoutExercise(
+                    workout=workout, exercise_id=exercise_id, order=exercise_entry['order']
+                ))
+                exercise_entries.append(exercise_entry)
+        WorkoutExercise.objects.bulk_create(workout_exercises, batch_size=IMPORT_BATCH_SIZE)
+
+        sets = [
+            ExerciseSet(
+                workout_exercise=workout_exercise,
+                set_number=s['set_number'],
+                reps=s['reps'],
+                weight=s['weight'],
+                rest_time_before_set=s.get('rest_time_before_set', 0),
+                is_warmup=s.get('is_warmup', False),
+                reps_in_reserve=s.get('reps_in_reserve', 0),
+                eccentric_time=s.get('eccentric_time'),
+                concentric_time=s.get('concentric_time'),
+                total_tut=s.get('total_tut'),
+            )
+            for workout_exercise, exercise_entry in zip(workout_exercises, exercise_entries)
+            for s in exercise_entry.get('sets', [])
+        ]
+        ExerciseSet.objects.bulk_create(sets, batch_size=IMPORT_BATCH_SIZE)
+
+        counts['workouts'] += len(workouts)
+        counts['sets'] += len(sets)
+    return counts
+
+
+def import_template_workouts(user, entries, exercise_ids):
+    seen = set(TemplateWorkout.objects.filter(user=user).values_list('title', flat=True))
+    templates, template_entries = [], []
+    for entry in entries:
+        if entry['title'] in seen:
+            continue
+        seen.add(entry['title'])
+        templates.append(TemplateWorkout(user=user, title=entry['title'], notes=entry.get('notes')))
+        template_entries.append(entry)
+    TemplateWorkout.objects.bulk_create(templates, batch_size=IMPORT_BATCH_SIZE)
+
+    TemplateWorkoutExercise.objects.bulk_create([
+        TemplateWorkoutExercise(template_workout=template, exercise_id=exercise_ids[name], order=ex['order'])
+        for template, entry in zip(templates, template_entries)
+        for ex in entry.get('exercises', [])
+        if (name := ex['exercise_name'].lower()) in exercise_ids
+    ], batch_size=IMPORT_BATCH_SIZE)
+    return len(templates)
+
+
+def import_supplements(user, entries, supplement_ids, user_supplements):
+    """Create missing UserSupplements and add them to the supplement id -> UserSupplement id map."""
+    new_user_supplements = []
+    for entry in entries:
+        supplement_id = supplement_ids.get(entry['supplement_name'].lower())
+        if supplement_id is None or supplement_id in user_supplements:
+            continue
+        user_supplement = UserSupplement(
+            user=user,
+            supplement_id=supplement_id,
+            dosage=entry['dosage'],
+            frequency=entry['frequency'],
+            time_of_day=entry.get('time_of_day'),
+            is_active=entry.get('is_active', True),
+        )
+        user_supplements[supplement_id] = user_supplement
+        new_user_supplements.append(user_supplement)
+    UserSupplement.objects.bulk_create(new_user_supplements, batch_size=IMPORT_BATCH_SIZE)
+    for user_supplement in new_user_supplements:
+        user_supplements[user_supplement.supplement_id] = user_supplement.id
+    return len(new_user_supplements)
+
+
+def import_supplement_logs(user, entries, supplement_ids, user_supplements):
+    seen = set(UserSupplementLog.objects.filter(user=user).values_list('user_supplement_id', 'date', 'time'))
+    created = 0
+    for chunk in _chunked(entries, IMPORT_BATCH_SIZE):
+        logs = []
+        for entry in chunk:
+            user_supplement_id = user_supplements.get(supplement_ids.get(entry['supplement_name'].lower()))
+            if user_supplement_id is None:
+                continue
+            key = (user_supplement_id, parse_date(entry['date']), parse_time(entry['time']))
+            if key in seen:
+                continue
+            seen.add(key)
+            logs.append(UserSupplementLog(
+                user=user, user_supplement_id=key[0], date=key[1], time=key[2], dosage=entry['dosage']
+            ))
+        UserSupplementLog.objects.bulk_create(logs, batch_size=IMPORT_BATCH_SIZE)
+        created += len(logs)
+    return created
+
+
+def import_sections(user, sections):
+    """
+    Import (name, value) sections of the export format for user in one transaction.
+
+    Section values may be lazy iterators (see core.json_stream); every section
+    is consumed in bounded chunks, so memory use does not grow with the input.
+    bulk_create does not send post_save, so no per-set outbox events are
+    queued; recalculate_users rebuilds everything derived once at the end, and
+    the user's data version (and so their ETags) rotates once on commit.
+    Returns the number of rows created per section.
+    """
+    from achievements.utils import recalculate_users
+
+    summary = {}
+    exercise_ids = supplement_ids = user_supplements = None
+    with transaction.atomic():
+        for name, value in sections:
+            if name == 'profile':
+                import_profile(user, value)
+            elif name == 'preferences':
+                import_preferences(user, value)
+            elif name == 'weight_history':
+                summary['weight_history'] = import_weight_history(user, value)
+            elif name == 'body_measurements':
+                summary['body_measurements'] = import_body_measurements(user, value)
+            elif name in ('workouts', 'template_workouts'):
+                if exercise_ids is None:
+                    exercise_ids = _name_map(Exercise)
+                if name == 'workouts':
+                    summary.update(import_workouts(user, value, exercise_ids))
+                else:
+                    summary['template_workouts'] = import_template_workouts(user, value, exercise_ids)
+            elif name in ('supplements', 'supplement_logs'):
+                if supplement_ids is None:
+                    supplement_ids = _name_map(Supplement)
+                    user_supplements = dict(
+                        UserSupplement.objects.filter(user=user).values_list('supplement_id', 'id')
+                    )
+                if name == 'supplements':
+                    summary['supplements'] = import_supplements(user, value, supplement_ids, user_supplements)
+                else:
+                    summary['supplement_logs'] = import_supplement_logs(
+                        user, value, supplement_ids, user_supplements
+                    )
+
+        recalculate_users([user.pk])
+        touch_user_data(user.pk)
+
+    logger.info(f"Imported data for {user.email}: {summary}")
+    return summary
+
+
+def import_user_data(user, data):
+    """Import an already decoded export document."""
+    return import_sections(user, data.items())
+
+
+def import_user_data_file(user, fp, progress=None):
+    """
+    Import an export file without loading it into memory: sections and their
+    elements are parsed incrementally and written while the file is read.
+    progress(bytes_read) is called after every chunk read from fp.
+    """
+    return import_sections(user, iter_json_object(fp, progress=progress))
@@ -0,0 +1,437 @@
+"""
+Streaming generators behind DataExportView and the export job worker.
+
+Rows are read in chunks with iterator() and written out as they are produced,
+so an export never holds the user's whole history in memory.
+"""
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from body_measurements.models import BodyMeasurement
+from supplements.models import UserSupplement, UserSupplementLog
+from workout.models import Workout, WorkoutExercise, ExerciseSet, TemplateWorkout
+from .models import DataExportJob, WeightHistory
+
+logger = logging.getLogger('user')
+
+EXPORT_CHUNK_SIZE = 200
+# Bytes collected before a chunk is handed to the WSGI server
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+ZIP_ENTRY_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+SET_EXPORT_FIELDS = [
+    'set_number', 'reps', 'weight', 'rest_time_before_set', 'is_warmup',
+    'reps_in_reserve', 'eccentric_time', 'concentric_time', 'total_tut'
+]
+
+
+def _profile(user):
+    return {
+        'gender': user.gender,
+        'height': float(user.userprofile.height) if user.userprofile.height else None,
+        'weight': float(user.userprofile.body_weight) if user.userprofile.body_weight else None,
+    }
+
+
+def _preferences(user):
+    return {
+        'auto_warmup_set': user.preferences.auto_warmup_set,
+        'rest_time': user.preferences.rest_time,
+        'units': user.preferences.units,
+        'timezone': user.preferences.timezone,
+    }
+
+
+def iter_weight_history(user):
+    for entry in WeightHistory.objects.filter(user=user).values('weight', 'created_at').iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        entry['created_at'] = entry['created_at'].isoformat()
+        entry['weight'] = float(entry['weight'])
+        yield entry
+
+
+def iter_body_measurements(user):
+    # The export format calls the hips measurement 'hip'
+    for weight, body_fat_percentage, neck, waist, hips, created_at in BodyMeasurement.objects.filter(user=user).values_list(
+        'weight', 'body_fat_percentage', 'neck', 'waist', 'hips', 'created_at'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        entry = {
+            'weight': weight,
+            'body_fat_percentage': body_fat_percentage,
+            'neck': neck,
+            'waist': waist,
+            'hip': hips,
+            'created_at': created_at,
+        }
+        entry['created_at'] = entry['created_at'].isoformat()
+        for key in ['weight', 'body_fat_percentage', 'neck', 'waist', 'hip']:
+            if entry[key] is not None:
+                entry[key] = float(entry[key])
+        yield entry
+
+
+def _workout_chunks(user):
+    chunk = []
+    for workout in Workout.objects.filter(user=user).order_by('datetime', 'id').values(
+        'id', 'title', 'datetime', 'duration', 'intensity', 'notes', 'is_done', 'is_rest_day', 'calories_burned'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(workout)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_workouts(user, progress=None):
+    """
+    Yield one export dict per workout.
+    Exercises and sets are read with one values() query each per chunk of workouts;
+    plain dicts avoid the reference cycles prefetched model instances leave behind.
+    progress, if given, is called with the number of workouts read so far.
+    """
+    done = 0
+    for chunk in _workout_chunks(user):
+        workout_ids = [w['id'] for w in chunk]
+
+        sets_by_exercise = {}
+        for s in ExerciseSet.objects.filter(workout_exercise__workout_id__in=workout_ids).order_by(
+            'workout_exercise_id', 'set_number', 'id'
+        ).values('workout_exercise_id', *SET_EXPORT_FIELDS):
+            s['weight'] = float(s['weight'])
+            sets_by_exercise.setdefault(s.pop('workout_exercise_id'), []).append(s)
+
+        exercises_by_workout = {}
+        for we in WorkoutExercise.objects.filter(workout_id__in=workout_ids).order_by(
+            'workout_id', 'order', 'id'
+        ).values('id', 'workout_id', 'exercise__name', 'order'):
+            exercises_by_workout.setdefault(we['workout_id'], []).append({
+                'exercise_name': we['exercise__name'],
+                'order': we['order'],
+                'sets': sets_by_exercise.get(we['id'], [])
+            })
+
+        for w in chunk:
+            yield {
+                'title': w['title'],
+                'datetime': w['datetime'].isoformat(),
+                'duration': w['duration'],
+                'intensity': w['intensity'],
+                'notes': w['notes'],
+                'is_done': w['is_done'],
+                'is_rest_day': w['is_rest_day'],
+                'calories_burned': float(w['calories_burned']) if w['calories_burned'] else None,
+                'exercises': exercises_by_workout.get(w['id'], [])
+            }
+
+        done += len(chunk)
+        if progress:
+            progress(done)
+
+
+def iter_template_workouts(user):
+    templates = TemplateWorkout.objects.filter(user=user).prefetch_related('templateworkoutexercise_set__exercise')
+    for t in templates.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'title': t.title,
+            'notes': t.notes,
+            'exercises': [
+                {'exercise_name': twe.exercise.name, 'order': twe.order}
+                for twe in t.templateworkoutexercise_set.all()
+            ]
+        }
+
+
+def iter_supplements(user):
+    for us in UserSupplement.objects.filter(user=user).select_related('supplement').iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'supplement_name': us.supplement.name,
+            'dosage': us.dosage,
+            'frequency': us.frequency,
+            'time_of_day': us.time_of_day,
+            'is_active': us.is_active
+        }
+
+
+def iter_supplement_logs(user):
+    logs = UserSupplementLog.objects.filter(user=user).select_related('user_supplement__supplement')
+    for log in logs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'supplement_name': log.user_supplement.supplement.name,
+            'date': log.date.isoformat(),
+            'time': log.time.isoformat(),
+            'dosage': log.dosage
+        }
+
+
+def _buffered(chunks, size=EXPORT_BUFFER_SIZE):
+    """Join small chunks so each write to the client is about `size` long."""
+    parts = []
+    length = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield parts[0][:0].join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield parts[0][:0].join(parts)
+
+
+def _dumps(value, level):
+    """json.dumps(indent=4) for a value nested `level` levels deep in the document."""
+    return json.dumps(value, indent=4).replace('\n', '\n' + '    ' * level)
+
+
+def _json_chunks(user, progress=None):
+    sections = [
+        ('profile', _profile(user)),
+        ('preferences', _preferences(user)),
+        ('weight_history', iter_weight_history(user)),
+        ('body_measurements', iter_body_measurements(user)),
+        ('workouts', iter_workouts(user, progress)),
+        ('template_workouts', iter_template_workouts(user)),
+        ('supplements', iter_supplements(user)),
+        ('supplement_logs', iter_supplement_logs(user)),
+    ]
+
+    yield '{'
+    for index, (key, value) in enumerate(sections):
+        yield ('\n' if index == 0 else ',\n') + f'    {json.dumps(key)}: '
+        if isinstance(value, dict):
+            yield _dumps(value, 1)
+            continue
+
+        # Lists are written one item at a time
+        empty = True
+        for item in value:
+            yield ('[\n' if empty else ',\n') + '        ' + _dumps(item, 2)
+            empty = False
+        yield '[]' if empty else '\n    ]'
+    yield '\n}'
+
+
+def stream_json_export(user, progress=None):
+    """
+    Yield the JSON export in chunks.
+    The document is byte-for-byte what json.dumps(data, indent=4) would produce.
+    """
+    return _buffered(_json_chunks(user, progress))
+
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink for ZipFile; written bytes are collected until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _csv_files(user, progress=None):
+    yield 'weight_history.csv', ['Date', 'Weight (kg)'], (
+        [entry['created_at'], entry['weight']] for entry in iter_weight_history(user)
+    )
+    yield 'workouts.csv', ['Date', 'Workout Title', 'Exercise', 'Set #', 'Weight', 'Reps', 'Is Warmup', 'RIR'], (
+        [
+            w['datetime'], w['title'], we['exercise_name'],
+            s['set_number'], s['weight'], s['reps'],
+            s['is_warmup'], s['reps_in_reserve']
+        ]
+        for w in iter_workouts(user, progress)
+        for we in w['exercises']
+        for s in we['sets']
+    )
+    yield 'body_measurements.csv', ['Date', 'Weight', 'Body Fat %', 'Neck', 'Waist', 'Hip'], (
+        [bm['created_at'], bm['weight'], bm['body_fat_percentage'], bm['neck'], bm['waist'], bm['hip']]
+        for bm in iter_body_measurements(user)
+    )
+    yield 'supplement_logs.csv', ['Date', 'Time', 'Supplement', 'Dosage'], (
+        [log['date'], log['time'], log['supplement_name'], log['dosage']]
+        for log in iter_supplement_logs(user)
+    )
+
+
+def _zip_chunks(user, progress=None):
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, header, rows in _csv_files(user, progress):
+            # Fixed timestamps keep identical exports byte-identical (and content-hash equal)
+            info = zipfile.ZipInfo(name, date_time=ZIP_ENTRY_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zip_file.open(info, 'w') as entry:
+                text = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+                writer = csv.writer(text)
+                writer.writerow(header)
+                for row in rows:
+                    writer.writerow(row)
+                    # Compressed output only appears once zlib has filled a block
+                    data = sink.drain()
+                    if data:
+                        yield data
+                text.detach()
+            yield sink.drain()
+    # Central directory is written when the archive closes
+    yield sink.drain()
+
+
+def stream_csv_export(user, progress=None):
+    """Yield a zip archive of CSV files in chunks, compressing rows as they are read."""
+    return _buffered(chunk for chunk in _zip_chunks(user, progress) if chunk)
+
+
+EXPORT_STREAMS = {
+    'json': (stream_json_export, 'json'),
+    'csv': (stream_csv_export, 'zip'),
+}
+
+
+def render_export_job(job):
+    """
+    Render a DataExportJob to MEDIA_ROOT/exports/<user id>/<sha256>.<ext>.
+
+    The artifact is written to a temporary file while it is hashed; when a file
+    with the same hash already exists it is reused. Progress is saved as the
+    user's workouts are read.
+    """
+    stream, extension = EXPORT_STREAMS[job.export_format]
+    total_workouts = Workout.objects.filter(user=job.user).count()
+
+    def progress(done):
+        percent = min(99, done * 100 // total_workouts) if total_workouts else 99
+        if percent != job.progress:
+            job.progress = percent
+            job.save(update_fields=['progress', 'updated_at'])
+
+    export_dir = os.path.join(settings.MEDIA_ROOT, 'exports', str(job.user_id))
+    os.makedirs(export_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile('wb', dir=export_dir, suffix='.part', delete=False)
+    try:
+        with tmp:
+            for chunk in stream(job.user, progress=progress):
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                digest.update(data)
+                tmp.write(data)
+                size += len(data)
+
+        content_hash = digest.hexdigest()
+        file_path = f'exports/{job.user_id}/{content_hash}.{extension}'
+        final_path = os.path.join(settings.MEDIA_ROOT, file_path)
+        if os.path.exists(final_path):
+            os.remove(tmp.name)
+            # A fresh mtime keeps sweep_export_artifacts from removing it before the job is saved
+            os.utime(final_path)
+        else:
+            os.replace(tmp.name, final_path)
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+    job.file_path = file_path
+    job.content_hash = content_hash
+    job.size = size
+    return job
+
+
+def run_next_export_job():
+    """
+    Claim the oldest pending DataExportJob and render it.
+    Returns the job, or None when nothing is pending.
+    """
+    with transaction.atomic():
+        job = DataExportJob.objects.select_for_update(skip_locked=True).filter(
+            status='pending'
+        ).order_by('created_at').select_related('user').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    try:
+        render_export_job(job)
+        job.status = 'done'
+        job.progress = 100
+        job.error = ''
+    except Exception as e:
+        logger.error(f"Export job {job.id} for {job.user.email} failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def fail_stale_export_jobs():
+    """
+    Fail running jobs whose worker stopped (killed, OOM, redeployed) before
+    finishing: progress saves bump updated_at, so a job untouched for
+    EXPORT_JOB_STALE_SECONDS is not being rendered. Its user can request the
+    export again, as the dedup window ignores failed jobs.
+    Returns the number of jobs failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+    return DataExportJob.objects.filter(status='running', updated_at__lt=cutoff).update(
+        status='failed',
+        error='Export worker stopped before the export finished',
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def sweep_export_artifacts():
+    """
+    Delete finished jobs older than EXPORT_RETENTION_SECONDS, then every file
+    under MEDIA_ROOT/exports/ no remaining done job points to. Artifacts are
+    shared by jobs with the same content hash, so a file stays while any job
+    uses it. Files younger than EXPORT_JOB_STALE_SECONDS are left alone: they
+    may belong to a job that is still being rendered or saved.
+    Returns (jobs deleted, files removed).
+    """
+    now = timezone.now()
+    expired, _ = DataExportJob.objects.filter(
+        status__in=['done', 'failed'],
+        finished_at__lt=now - timedelta(seconds=settings.EXPORT_RETENTION_SECONDS)
+    ).delete()
+
+    keep = set(DataExportJob.objects.filter(status='done').values_list('file_path', flat=True))
+    settle_before = (now - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)).timestamp()
+    removed = 0
+    exports_root = os.path.join(settings.MEDIA_ROOT, 'exports')
+    if not os.path.isdir(exports_root):
+        return expired, removed
+    for user_dir in os.scandir(exports_root):
+        if not user_dir.is_dir():
+            continue
+        for entry in os.scandir(user_dir.path):
+            file_path = f'exports/{user_dir.name}/{entry.name}'
+            if entry.is_file() and file_path not in keep and entry.stat().st_mtime < settle_before:
+                os.remove(entry.path)
+                removed += 1
+    return expired, removed
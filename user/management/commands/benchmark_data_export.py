@@ -0,0 +1,90 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from exercise.models import Exercise
+from user.models import CustomUser
+from user.export import stream_csv_export, stream_json_export
+from workout.models import Workout, WorkoutExercise, ExerciseSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark peak memory of the streaming data export against history size. '
+        'Synthetic data is created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='100,500,2000',
+            help='Comma separated workout counts to benchmark'
+        )
+        parser.add_argument(
+            '--sets-per-workout',
+            type=int,
+            default=20,
+            help='Sets created per workout'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        sets_per_workout = options['sets_per_workout']
+
+        self.stdout.write(f"{'workouts':>9} {'sets':>8} {'format':>6} {'size':>10} {'stream peak':>12} {'buffered peak':>14} {'time':>7}")
+        with transaction.atomic():
+            exercise = Exercise.objects.create(name='Benchmark Press', primary_muscle='chest', equipment_type='barbell')
+            for size in sizes:
+                user = CustomUser.objects.create_user(email=f'benchmark-export-{size}@example.com', password=None)
+                self._create_history(user, exercise, size, sets_per_workout)
+
+                for export_format, stream in (('json', stream_json_export), ('csv', stream_csv_export)):
+                    total, stream_peak, elapsed = self._measure(lambda: self._consume(stream(user)))
+                    _, buffered_peak, _ = self._measure(lambda: len(b''.join(self._encoded(stream(user)))))
+                    self.stdout.write(
+                        f'{size:>9} {size * sets_per_workout:>8} {export_format:>6} '
+                        f'{total / 1024 ** 2:>8.1f}MB {stream_peak / 1024 ** 2:>10.1f}MB '
+                        f'{buffered_peak / 1024 ** 2:>12.1f}MB {elapsed:>6.2f}s'
+                    )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('\nCompleted! "buffered peak" holds the whole response in memory for comparison'))
+
+    def _create_history(self, user, exercise, workouts, sets_per_workout):
+        now = timezone.now()
+        created = Workout.objects.bulk_create([
+            Workout(user=user, title=f'Workout {i}', datetime=now, local_date=now.date(), is_done=True, intensity='medium')
+            for i in range(workouts)
+        ])
+        workout_exercises = WorkoutExercise.objects.bulk_create([
+            WorkoutExercise(workout=workout, exercise=exercise, order=1) for workout in created
+        ])
+        ExerciseSet.objects.bulk_create([
+            ExerciseSet(workout_exercise=workout_exercise, set_number=n, weight=100, reps=5)
+            for workout_exercise in workout_exercises
+            for n in range(1, sets_per_workout + 1)
+        ], batch_size=2000)
+
+    @staticmethod
+    def _encoded(chunks):
+        for chunk in chunks:
+            yield chunk.encode() if isinstance(chunk, str) else chunk
+
+    def _consume(self, chunks):
+        return sum(len(chunk) for chunk in self._encoded(chunks))
+
+    @staticmethod
+    @override_settings(DEBUG=False)  # keep the query log out of the measurement
+    def _measure(func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, peak, elapsed
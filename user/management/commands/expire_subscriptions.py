@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from user.auth_cache import invalidate_user
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Clear is_pro for users whose PRO subscription has lapsed (pro_until in the past)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping on an interval instead of exiting after one pass'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600.0,
+            help='Seconds to sleep between sweeps'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            now = timezone.now()
+            lapsed = CustomUser.objects.filter(is_pro=True, pro_until__lt=now)
+            # update() sends no post_save, so drop the cached copies explicitly
+            users = list(lapsed.only('id', 'password'))
+            expired = lapsed.update(is_pro=False, updated_at=now)
+            for user in users:
+                invalidate_user(user)
+            self.stdout.write(self.style.SUCCESS(f'Expired {expired} PRO subscriptions'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from user.data_import import import_user_data_file
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Import a JSON data export for a user, streaming the file instead of loading it into memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', type=str, help='Email of the user to import into')
+        parser.add_argument('path', type=str, help='Path to the JSON export file')
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['email'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        total_bytes = os.path.getsize(options['path'])
+        started = time.monotonic()
+        reported = [0]
+
+        def progress(bytes_read):
+            # Report every 10% of the file
+            percent = bytes_read * 100 // total_bytes if total_bytes else 100
+            if percent >= reported[0] + 10 or bytes_read == total_bytes:
+                reported[0] = percent
+                self.stdout.write(f'Read {bytes_read:,}/{total_bytes:,} bytes ({percent}%) in {time.monotonic() - started:.1f}s')
+
+        with open(options['path'], 'rb') as import_file:
+            summary = import_user_data_file(user, import_file, progress=progress)
+
+        created = ', '.join(f'{count} {section}' for section, count in summary.items())
+        self.stdout.write(
+            self.style.SUCCESS(f'\nCompleted! Imported {created or "nothing"} for {user.email} in {time.monotonic() - started:.1f}s')
+        )
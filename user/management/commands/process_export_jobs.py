@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from user.export import fail_stale_export_jobs, run_next_export_job, sweep_export_artifacts
+
+
+class Command(BaseCommand):
+    help = (
+        'Render queued data export jobs into MEDIA_ROOT/exports/. Between jobs, fails running jobs whose '
+        'worker stopped and deletes jobs and artifacts older than EXPORT_RETENTION_SECONDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting when none are pending'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep between polls when no job is pending'
+        )
+        parser.add_argument(
+            '--sweep-interval',
+            type=float,
+            default=300.0,
+            help='Seconds between stale job and expired artifact sweeps'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        last_sweep = None
+        while True:
+            if last_sweep is None or time.monotonic() - last_sweep >= options['sweep_interval']:
+                self._sweep()
+                last_sweep = time.monotonic()
+
+            job = run_next_export_job()
+            if job is None:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            processed += 1
+            if job.status == 'done':
+                self.stdout.write(
+                    self.style.SUCCESS(f'Export {job.id} ({job.export_format}) for {job.user.email}: {job.file_path} ({job.size} bytes)')
+                )
+            else:
+                self.stdout.write(self.style.ERROR(f'Export {job.id} for {job.user.email} failed: {job.error}'))
+
+        self.stdout.write(self.style.SUCCESS(f'\nCompleted! Processed {processed} export jobs'))
+
+    def _sweep(self):
+        stale = fail_stale_export_jobs()
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Failed {stale} export jobs whose worker stopped'))
+        expired, removed = sweep_export_artifacts()
+        if expired or removed:
+            self.stdout.write(f'Deleted {expired} expired export jobs and {removed} artifact files')
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-18 21:44
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_add_trial_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataExportJob',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('export_format', models.CharField(choices=[('json', 'JSON'), ('csv', 'CSV (zip)')], default='json', max_length=4)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Percent complete')),
+                ('file_path', models.CharField(blank=True, help_text='Artifact path relative to MEDIA_ROOT', max_length=255)),
+                ('content_hash', models.CharField(blank=True, help_text='SHA-256 of the artifact', max_length=64)),
+                ('size', models.PositiveBigIntegerField(default=0, help_text='Artifact size in bytes')),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'export_format', '-created_at'], name='user_dataex_user_id_26d286_idx'), models.Index(fields=['status', 'created_at'], name='user_dataex_status_45e9f6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:24
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('user', '0009_dataexportjob'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='weighthistory',
+            index=models.Index(fields=['user', '-created_at'], name='user_weight_user_id_ab01b9_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+import user.timezones
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_local_date(apps, schema_editor):
+    WeightHistory = apps.get_model('user', 'WeightHistory')
+    Preferences = apps.get_model('user', 'Preferences')
+
+    zones = {}
+    for user_id, name in Preferences.objects.values_list('user_id', 'timezone'):
+        try:
+            zones[user_id] = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    default = ZoneInfo(settings.TIME_ZONE)
+
+    # Batches by primary key; SQLite cannot update a table it is still iterating
+    last_id = 0
+    while True:
+        batch = list(WeightHistory.objects.filter(id__gt=last_id).order_by('id').only('id', 'user_id', 'created_at')[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        for entry in batch:
+            entry.local_date = timezone.localtime(entry.created_at, zones.get(entry.user_id, default)).date()
+        WeightHistory.objects.bulk_update(batch, ['local_date'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_add_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preferences',
+            name='timezone',
+            field=models.CharField(default='UTC', help_text='IANA timezone that local dates are computed in', max_length=64, validators=[user.timezones.validate_timezone]),
+        ),
+        migrations.AddField(
+            model_name='weighthistory',
+            name='local_date',
+            field=models.DateField(null=True, help_text="created_at's date in the user's timezone when the entry was written"),
+        ),
+        migrations.RunPython(backfill_local_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:28
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('user', '0011_preferences_timezone_weighthistory_local_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='weighthistory',
+            name='local_date',
+            field=models.DateField(help_text="created_at's date in the user's timezone when the entry was written"),
+        ),
+        AddIndexConcurrently(
+            model_name='weighthistory',
+            index=models.Index(fields=['user', 'local_date'], name='user_weight_user_id_d80597_idx'),
+        ),
+    ]
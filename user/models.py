@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.utils import timezone
 import uuid
 from core.models import TimestampedModel
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from .timezones import local_date as to_local_date, validate_timezone
 
 ## Basic info about the models
 
@@ -56,6 +58,11 @@ class CustomUser(AbstractUser, TimestampedModel):
     
     objects = CustomUserManager() ## This is the custom user manager that we created above. It is used to create and manage users.
 
+    def set_password(self, raw_password):
+        # Remembered so the auth cache can drop the entry keyed by the old password (see auth_cache.py)
+        self._previous_password = self.password
+        super().set_password(raw_password)
+
 class UserProfile(TimestampedModel):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
     body_weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Body weight in kg for calorie calculations")
@@ -65,10 +72,20 @@ class WeightHistory(TimestampedModel):
     """Track user weight over time"""
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='weight_history')
     weight = models.DecimalField(max_digits=5, decimal_places=2, help_text="Weight in kg")
+    local_date = models.DateField(help_text="created_at's date in the user's timezone when the entry was written")
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Weight Histories'
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'local_date']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.local_date is None:
+            self.local_date = to_local_date(self.user, self.created_at or timezone.now())
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.user.email} - {self.created_at.date()} - {self.weight}kg"
@@ -89,6 +106,45 @@ class Preferences(TimestampedModel):
     auto_warmup_set = models.BooleanField(default=False)
     rest_time = models.PositiveIntegerField(default=90)
     units = models.CharField(max_length=10, choices=[('metric', 'Metric'), ('imperial', 'Imperial')], default='metric')
+    timezone = models.CharField(max_length=64, default='UTC', validators=[validate_timezone], help_text="IANA timezone that local dates are computed in")
+
+class DataExportJob(TimestampedModel):
+    """
+    Asynchronous data export. The process_export_jobs command renders the
+    artifact into MEDIA_ROOT/exports/<user id>/<content hash>.<ext>.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('json', 'JSON'),
+        ('csv', 'CSV (zip)'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='export_jobs')
+    export_format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='json')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    file_path = models.CharField(max_length=255, blank=True, help_text="Artifact path relative to MEDIA_ROOT")
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the artifact")
+    size = models.PositiveBigIntegerField(default=0, help_text="Artifact size in bytes")
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'export_format', '-created_at']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.export_format} export ({self.status})"
 
 @receiver(post_save, sender=CustomUser)
 # This function creates the user related records when a new user is created.
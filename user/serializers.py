@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import UserProfile
+from django.urls import reverse
+from .models import UserProfile, DataExportJob
 from workout.permissions import (
     is_pro_user, is_paid_pro_user, is_trial_user,
     get_pro_days_remaining, get_trial_days_remaining
@@ -88,4 +89,29 @@ class UserSerializer(serializers.ModelSerializer):
     
     def get_trial_days_remaining(self, obj):
         """Get days remaining for free trial"""
-        return get_trial_days_remaining(obj)
\ No newline at end of file
+        return get_trial_days_remaining(obj)
+
+
+class DataExportJobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DataExportJob
+        fields = [
+            'id', 'export_format', 'status', 'progress', 'size', 'content_hash',
+            'error', 'created_at', 'started_at', 'finished_at', 'status_url', 'download_url'
+        ]
+
+    def _absolute(self, path):
+        request = self.context.get('request')
+        return request.build_absolute_uri(path) if request else path
+
+    def get_status_url(self, obj):
+        return self._absolute(reverse('data_export_job', args=[obj.id]))
+
+    def get_download_url(self, obj):
+        """Only set once the artifact is ready"""
+        if obj.status != 'done':
+            return None
+        return self._absolute(reverse('data_export_download', args=[obj.id]))
@@ -1,9 +1,11 @@
-from django.test import TestCase
+import io
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.utils import timezone
-from .models import UserProfile, WeightHistory
+from .models import DataExportJob, UserProfile, WeightHistory
 
 User = get_user_model()
 
@@ -95,6 +97,165 @@ class UserProfileTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
+    def test_weight_history_joins_body_fat(self):
+        """Test weight history reads body fat for each entry's date in a single page query"""
+        from datetime import timedelta
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from body_measurements.models import BodyMeasurement
+
+        for i in range(30):
+            entry = WeightHistory.objects.create(user=self.user, weight=80 - i * 0.1)
+            moment = timezone.now() - timedelta(days=i)
+            WeightHistory.objects.filter(pk=entry.pk).update(created_at=moment, local_date=moment.date())
+        measurement = BodyMeasurement.objects.create(
+            user=self.user, height=180, weight=80, waist=85, neck=38, gender='male'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/user/weight/history/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # COUNT for the paginator and one page query, however many entries
+        self.assertEqual(len(queries), 2)
+        results = response.data['results']
+        self.assertEqual(len(results), 30)
+        self.assertEqual(results[0]['bodyfat'], float(measurement.body_fat_percentage))
+        self.assertIsNone(results[1]['bodyfat'])
+
+    def test_weight_trend_smooths_and_downsamples(self):
+        """Test the weight trend endpoint returns a smoothed series reduced to the requested points"""
+        from datetime import timedelta
+
+        start = timezone.now() - timedelta(days=1000)
+        entries = WeightHistory.objects.bulk_create([
+            WeightHistory(user=self.user, weight=90 - i * 0.01 + (0.8 if i % 2 else -0.8), local_date=start.date())
+            for i in range(1000)
+        ])
+        for i, entry in enumerate(entries):
+            entry.created_at = start + timedelta(days=i)
+        WeightHistory.objects.bulk_update(entries, ['created_at'])
+
+        response = self.client.get('/api/user/weight/trend/', {'points': 50})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1000)
+        points = response.data['points']
+        self.assertEqual(len(points), 50)
+        self.assertEqual(points[0]['date'], start.isoformat())
+        self.assertEqual(points[-1]['weight'], 90 - 999 * 0.01 + 0.8)
+        # The +/-0.8 kg day-to-day noise is smoothed out of the trend
+        self.assertLess(abs(points[-1]['trend'] - (90 - 999 * 0.01)), 0.3)
+        dates = [point['date'] for point in points]
+        self.assertEqual(dates, sorted(dates))
+
+        response = self.client.get('/api/user/weight/trend/', {'points': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EntitlementClaimsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def login(self):
+        response = self.client.post('/api/user/login/', {'email': 'test@example.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def test_lapsed_subscription_reads_from_claims_without_writes(self):
+        """Test PRO status comes from token claims and lapsed subscriptions are only cleared by the sweep"""
+        from datetime import timedelta
+        from django.core.management import call_command
+        from rest_framework_simplejwt.tokens import AccessToken
+        from workout.permissions import is_pro_user, is_paid_pro_user, is_trial_user
+
+        self.user.is_pro = True
+        self.user.pro_until = timezone.now() - timedelta(days=1)
+        self.user.trial_until = timezone.now() + timedelta(days=3)
+        self.user.save()
+        tokens = self.login()
+
+        access = AccessToken(tokens['access'])
+        self.assertTrue(access['is_pro'])
+        self.assertEqual(access['pro_until'], int(self.user.pro_until.timestamp()))
+
+        response = self.client.get('/api/user/me/')
+        self.assertFalse(response.data['is_paid_pro'])
+        self.assertTrue(response.data['is_trial'])
+        self.assertTrue(response.data['is_pro'])
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_pro)
+
+        # Checks against a token-authenticated user cost no queries
+        self.user.entitlement_claims = {claim: access[claim] for claim in ('is_pro', 'pro_until', 'trial_until')}
+        with self.assertNumQueries(0):
+            self.assertTrue(is_pro_user(self.user))
+            self.assertFalse(is_paid_pro_user(self.user))
+            self.assertTrue(is_trial_user(self.user))
+
+        call_command('expire_subscriptions', stdout=io.StringIO())
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_pro)
+
+        # Refreshing re-reads the user, so the new access token reflects the sweep
+        response = self.client.post('/api/user/refresh/', {'refresh': tokens['refresh']})
+        self.assertFalse(AccessToken(response.data['access'])['is_pro'])
+
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=60)
+    def test_authenticated_user_is_cached_until_changed(self):
+        """Test JWT requests reuse the cached user and saves, password changes and deactivation invalidate it"""
+        from django.core.cache import cache
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .auth_cache import auth_user_cache_stats
+
+        cache.clear()
+        self.login()
+        self.client.get('/api/user/me/')
+        hits = auth_user_cache_stats()['hits']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/user/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth_user_cache_stats()['hits'], hits + 1)
+        self.assertFalse(any('FROM "user_customuser"' in q['sql'] for q in queries.captured_queries))
+
+        # A save elsewhere is visible on the next request
+        user = User.objects.get(pk=self.user.pk)
+        user.gender = 'female'
+        user.save()
+        self.assertEqual(self.client.get('/api/user/me/').data['gender'], 'female')
+
+        # Changing the password drops the entry the current token points at
+        response = self.client.post('/api/user/change-password/', {
+            'old_password': 'testpass123', 'new_password': 'newpass12345'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/user/me/')
+        self.assertTrue(any('FROM "user_customuser"' in q['sql'] for q in queries.captured_queries))
+
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.client.get('/api/user/me/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+    def test_authenticated_user_is_not_cached_without_a_shared_cache(self):
+        """Test per-process caches never hold users, so every worker sees password changes and deactivation"""
+        from django.core.cache import cache
+        from .auth_cache import auth_user_cache_stats
+
+        cache.clear()
+        self.login()
+        self.assertEqual(self.client.get('/api/user/me/').status_code, status.HTTP_200_OK)
+        self.assertFalse(auth_user_cache_stats()['enabled'])
+        self.assertFalse(any(key.startswith(':1:auth_user:') for key in cache._cache))
+
 class PasswordResetTestCase(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -108,3 +269,259 @@ class PasswordResetTestCase(TestCase):
         data = {'email': 'test@example.com'}
         response = self.client.post('/api/user/request-password-reset/', data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class DataExportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        from exercise.models import Exercise
+        from workout.models import Workout, WorkoutExercise, ExerciseSet
+        exercise = Exercise.objects.create(name='Bench Press', primary_muscle='chest', equipment_type='barbell')
+        for i in range(3):
+            workout = Workout.objects.create(user=self.user, title=f'Workout {i}', is_done=True)
+            workout_exercise = WorkoutExercise.objects.create(workout=workout, exercise=exercise, order=1)
+            for set_number in range(1, 4):
+                ExerciseSet.objects.create(workout_exercise=workout_exercise, set_number=set_number, weight=100, reps=5)
+        WeightHistory.objects.create(user=self.user, weight=80)
+
+    def test_export_json_streams_full_document(self):
+        """Test JSON export streams the same document json.dumps would produce"""
+        import json
+        response = self.client.get('/api/user/data/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        data = json.loads(content)
+        self.assertEqual(content, json.dumps(data, indent=4))
+        self.assertEqual(len(data['workouts']), 3)
+        self.assertEqual(len(data['workouts'][0]['exercises'][0]['sets']), 3)
+        self.assertEqual(data['weight_history'][0]['weight'], 80.0)
+        self.assertEqual(data['supplements'], [])
+
+    def test_export_json_keeps_zero_measurements(self):
+        """Test a zero Decimal measurement is exported as 0.0 instead of breaking the stream"""
+        import json
+        from body_measurements.models import BodyMeasurement
+
+        measurement = BodyMeasurement.objects.create(
+            user=self.user, height=180, weight=80, waist=85, neck=38, gender='male'
+        )
+        BodyMeasurement.objects.filter(id=measurement.id).update(body_fat_percentage=0)
+        response = self.client.get('/api/user/data/export/')
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['body_measurements'][0]['body_fat_percentage'], 0.0)
+
+    def test_export_csv_streams_zip(self):
+        """Test CSV export streams a readable zip archive"""
+        import io
+        import zipfile
+        response = self.client.get('/api/user/data/export/?format=csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(),
+            ['weight_history.csv', 'workouts.csv', 'body_measurements.csv', 'supplement_logs.csv']
+        )
+        rows = archive.read('workouts.csv').decode().splitlines()
+        self.assertEqual(len(rows), 1 + 9)
+        self.assertIn('Bench Press', rows[1])
+
+    def test_export_job_renders_deduplicated_artifact(self):
+        """Test queued export jobs are deduplicated, rendered by the worker and downloadable"""
+        import os
+        import tempfile
+        from django.test import override_settings
+        from .export import run_next_export_job
+
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, EXPORT_X_ACCEL_REDIRECT=False):
+            response = self.client.post('/api/user/data/export/', {'format': 'json'})
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            job_id = response.data['id']
+            self.assertIsNone(response.data['download_url'])
+
+            # Identical request within the window reuses the job
+            response = self.client.post('/api/user/data/export/', {'format': 'json'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['id'], job_id)
+
+            job = run_next_export_job()
+            self.assertEqual(job.status, 'done')
+            self.assertIsNone(run_next_export_job())
+            self.assertTrue(os.path.exists(os.path.join(media_root, job.file_path)))
+            self.assertIn(job.content_hash, job.file_path)
+
+            response = self.client.get(f'/api/user/data/export/{job_id}/')
+            self.assertEqual(response.data['progress'], 100)
+            self.assertIsNotNone(response.data['download_url'])
+
+            response = self.client.get(f'/api/user/data/export/{job_id}/download/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            downloaded = b''.join(response.streaming_content)
+            streamed = b''.join(self.client.get('/api/user/data/export/').streaming_content)
+            self.assertEqual(downloaded, streamed)
+
+            with override_settings(EXPORT_X_ACCEL_REDIRECT=True):
+                response = self.client.get(f'/api/user/data/export/{job_id}/download/')
+                self.assertEqual(response['X-Accel-Redirect'], f'/protected/{job.file_path}')
+
+
+    def test_stale_jobs_fail_and_expired_artifacts_are_swept(self):
+        """Test jobs abandoned by a stopped worker fail and old artifacts are deleted unless a job still uses them"""
+        import os
+        import tempfile
+        from datetime import timedelta
+        from django.test import override_settings
+        from .export import fail_stale_export_jobs, run_next_export_job, sweep_export_artifacts
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            old, shared = DataExportJob.objects.create(user=self.user), DataExportJob.objects.create(user=self.user)
+            run_next_export_job()
+            run_next_export_job()
+            shared.refresh_from_db()
+            artifact = os.path.join(media_root, shared.file_path)
+            orphan = os.path.join(media_root, 'exports', str(self.user.id), 'crashed.part')
+            open(orphan, 'w').close()
+            hour_ago = (timezone.now() - timedelta(hours=1)).timestamp()
+            for path in (artifact, orphan):
+                os.utime(path, (hour_ago, hour_ago))
+
+            # Both jobs rendered the same bytes; the file stays while the newer job is kept
+            DataExportJob.objects.filter(id=old.id).update(finished_at=timezone.now() - timedelta(days=30))
+            self.assertEqual(sweep_export_artifacts(), (1, 1))
+            self.assertTrue(os.path.exists(artifact))
+            self.assertFalse(os.path.exists(orphan))
+
+            DataExportJob.objects.filter(id=shared.id).update(finished_at=timezone.now() - timedelta(days=30))
+            self.assertEqual(sweep_export_artifacts(), (1, 1))
+            self.assertFalse(os.path.exists(artifact))
+
+            running = DataExportJob.objects.create(user=self.user, status='running')
+            DataExportJob.objects.filter(id=running.id).update(updated_at=timezone.now() - timedelta(hours=1))
+            fresh = DataExportJob.objects.create(user=self.user, status='running')
+            self.assertEqual(fail_stale_export_jobs(), 1)
+            running.refresh_from_db()
+            fresh.refresh_from_db()
+            self.assertEqual(running.status, 'failed')
+            self.assertEqual(fresh.status, 'running')
+
+class DataImportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_fixture_without_local_dates_loads(self):
+        """Test migrator fills local_date for rows from dumps taken before the column existed"""
+        import json
+        import os
+        import tempfile
+        import migrator
+        from body_measurements.models import BodyMeasurement
+        from workout.models import Workout
+
+        self.user.preferences.timezone = 'Asia/Tokyo'
+        self.user.preferences.save()
+        stamp = {'created_at': '2026-03-01T20:00:00Z', 'updated_at': '2026-03-01T20:00:00Z'}
+        records = [
+            {'model': 'workout.workout', 'pk': 901, 'fields': {
+                'user': self.user.id, 'title': 'Old dump', 'datetime': '2026-03-01T16:00:00Z', 'is_done': True, **stamp
+            }},
+            {'model': 'user.weighthistory', 'pk': 902, 'fields': {'user': self.user.id, 'weight': '80.00', **stamp}},
+            {'model': 'body_measurements.bodymeasurement', 'pk': 903, 'fields': {
+                'user': self.user.id, 'height': '180.00', 'weight': '80.00', 'waist': '85.00', 'neck': '38.00',
+                'gender': 'male', **stamp
+            }},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as fixture:
+            json.dump(records, fixture, default=str)
+        self.addCleanup(os.unlink, fixture.name)
+
+        self.assertEqual(migrator.load_fixture_streaming(fixture.name), 3)
+        # 16:00 and 20:00 UTC are the next day in Tokyo
+        self.assertEqual(Workout.objects.get(pk=901).local_date.isoformat(), '2026-03-02')
+        self.assertEqual(WeightHistory.objects.get(pk=902).local_date.isoformat(), '2026-03-02')
+        self.assertEqual(BodyMeasurement.objects.get(pk=903).local_date.isoformat(), '2026-03-02')
+
+    def test_import_rotates_user_data_version(self):
+        """Test a bulk import, which sends no post_save, still gives the user new ETags on commit"""
+        from core.conditional import user_data_version
+        from user.data_import import import_user_data
+
+        version = user_data_version(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_user_data(self.user, {'weight_history': [{'weight': 80.5, 'created_at': timezone.now().isoformat()}]})
+        self.assertNotEqual(user_data_version(self.user.id), version)
+
+    def test_import_bulk_sets_within_query_budget(self):
+        """Test importing 5,000 sets runs in a fixed number of queries and is idempotent"""
+        import json
+        import math
+        from datetime import timedelta
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from exercise.models import Exercise
+        from workout.models import Workout, ExerciseSet
+        from achievements.models import OutboxEvent, PersonalRecord, UserStatistics
+
+        for name in ['Bench Press', 'Squat', 'Deadlift', 'Overhead Press', 'Barbell Row']:
+            Exercise.objects.create(name=name, primary_muscle='chest', equipment_type='barbell')
+        start = timezone.now() - timedelta(days=200)
+        data = {
+            'weight_history': [{'weight': 80.5, 'created_at': (start + timedelta(days=i)).isoformat()} for i in range(50)],
+            'workouts': [
+                {
+                    'title': f'Workout {i}',
+                    'datetime': (start + timedelta(days=i)).isoformat(),
+                    'duration': 3600,
+                    'intensity': 'medium',
+                    'is_done': True,
+                    'exercises': [
+                        {
+                            'exercise_name': name.lower(),
+                            'order': order,
+                            'sets': [{'set_number': n, 'reps': 5, 'weight': 60 + i % 10} for n in range(1, 11)]
+                        }
+                        for order, name in enumerate(['Bench Press', 'Squat', 'Deadlift', 'Overhead Press', 'Barbell Row'])
+                    ]
+                }
+                for i in range(100)
+            ],
+        }
+
+        def upload():
+            return self.client.post('/api/user/data/import/', {
+                'file': SimpleUploadedFile('export.json', json.dumps(data).encode(), content_type='application/json')
+            }, format='multipart')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = upload()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # A fixed overhead plus the set INSERTs, which the backend splits by its parameter limit
+        set_fields = [f for f in ExerciseSet._meta.concrete_fields if not f.primary_key]
+        set_batches = math.ceil(5000 / min(1000, connection.ops.bulk_batch_size(set_fields, [None] * 5000)))
+        self.assertLessEqual(len(queries), 30 + set_batches)
+
+        self.assertEqual(ExerciseSet.objects.filter(workout_exercise__workout__user=self.user).count(), 5000)
+        self.assertFalse(OutboxEvent.objects.filter(user=self.user).exists())
+        self.assertEqual(PersonalRecord.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(UserStatistics.objects.get(user=self.user).total_workouts, 100)
+        self.assertEqual(
+            WeightHistory.objects.filter(user=self.user).order_by('created_at').first().created_at,
+            start
+        )
+
+        # Re-importing the same file creates nothing new
+        self.assertEqual(upload().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Workout.objects.filter(user=self.user).count(), 100)
+        self.assertEqual(WeightHistory.objects.filter(user=self.user).count(), 50)
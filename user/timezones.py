@@ -0,0 +1,69 @@
+"""
+Calendar dates in the user's own timezone.
+
+Workouts, weight entries and body measurements store local_date: the date of
+their timestamp in the user's Preferences.timezone when the row was written.
+Calendar, stats and same-day lookups filter that indexed column instead of
+converting every row's timestamp with __date in the server's timezone.
+Changing the preference does not move existing rows; a workout logged while
+travelling stays on the date it had where it was logged.
+"""
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.utils import timezone
+
+
+def validate_timezone(name):
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f'{name!r} is not a valid IANA timezone')
+
+
+def _zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.TIME_ZONE)
+
+
+def user_timezone(user):
+    try:
+        name = user.preferences.timezone
+    except ObjectDoesNotExist:
+        name = settings.TIME_ZONE
+    return _zone(name)
+
+
+def local_date(user, moment):
+    """The date of an aware datetime in the user's timezone."""
+    return timezone.localtime(moment, user_timezone(user)).date()
+
+
+def local_today(user):
+    return local_date(user, timezone.now())
+
+
+def fill_local_dates(objects, source_field):
+    """
+    Set local_date from source_field (an aware datetime) on objects that have
+    none, e.g. rows from an older fixture that are inserted without save().
+    Looks the users' timezones up in one query.
+    """
+    from .models import Preferences
+
+    missing = [obj for obj in objects if obj.local_date is None]
+    if not missing:
+        return
+    names = dict(
+        Preferences.objects.filter(user_id__in={obj.user_id for obj in missing}).values_list('user_id', 'timezone')
+    )
+    zones = {}
+    for obj in missing:
+        zone = zones.get(obj.user_id)
+        if zone is None:
+            zone = zones[obj.user_id] = _zone(names.get(obj.user_id, settings.TIME_ZONE))
+        moment = getattr(obj, source_field) or timezone.now()
+        obj.local_date = timezone.localtime(moment, zone).date()
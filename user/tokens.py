@@ -0,0 +1,68 @@
+"""
+JWT tokens carrying the user's PRO and trial entitlements.
+
+Access tokens embed is_pro, pro_until and trial_until so entitlement checks
+(workout.permissions.get_entitlements) read the token instead of the
+database. The claims are taken from the user at login and recomputed on
+every refresh, so they are at most one access token lifetime old; expiry
+dates are compared against the clock at check time. Tokens also carry the
+'ver' claim that keys the authenticated user cache (see auth_cache.py).
+"""
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .auth_cache import TOKEN_VERSION_CLAIM, token_version
+
+ENTITLEMENT_CLAIMS = ('is_pro', 'pro_until', 'trial_until')
+
+
+def user_claims(user):
+    """Entitlement claims plus the token version used to key the auth user cache."""
+    claims = entitlement_claims(user)
+    claims[TOKEN_VERSION_CLAIM] = token_version(user.password)
+    return claims
+
+
+def entitlement_claims(user):
+    """Entitlement claims for user; expiry dates as Unix timestamps or None."""
+    return {
+        'is_pro': user.is_pro,
+        'pro_until': int(user.pro_until.timestamp()) if user.pro_until else None,
+        'trial_until': int(user.trial_until.timestamp()) if user.trial_until else None,
+    }
+
+
+class EntitlementRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the entitlement claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class EntitlementTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = EntitlementRefreshToken
+
+
+class EntitlementTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = EntitlementRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        # The refresh token's copy of the claims dates from login; re-read the
+        # user so subscription changes reach the new access token
+        access = AccessToken(data['access'])
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]}
+        ).only('password', 'is_pro', 'pro_until', 'trial_until').first()
+        if user is not None:
+            for claim, value in user_claims(user).items():
+                access[claim] = value
+            data['access'] = str(access)
+        return data
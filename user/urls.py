@@ -1,10 +1,10 @@
 from django.urls import path
 from .views import (
-    RegisterView, UserProfileView, UpdateHeightView, UpdateGenderView, 
+    RegisterView, UserProfileView, UpdateHeightView, UpdateGenderView, UpdateTimezoneView,
     ChangePasswordView, RequestPasswordResetView, ResetPasswordView,
-    UpdateWeightView, GetWeightHistoryView, DeleteWeightView,
+    UpdateWeightView, GetWeightHistoryView, WeightTrendView, DeleteWeightView,
     CheckEmailView, CheckPasswordView, CheckNameView,
-    DataExportView, DataImportView
+    DataExportView, DataExportJobView, DataExportDownloadView, DataImportView
 )
 from .custom_auth_views import (
     ThrottledTokenObtainPairView,
@@ -17,8 +17,10 @@ urlpatterns = [
     path('height/', UpdateHeightView.as_view(), name='update_height'),
     path('weight/', UpdateWeightView.as_view(), name='update_weight'),
     path('weight/history/', GetWeightHistoryView.as_view(), name='get_weight_history'),
+    path('weight/trend/', WeightTrendView.as_view(), name='weight_trend'),
     path('weight/<int:weight_id>/', DeleteWeightView.as_view(), name='delete_weight'),
     path('gender/', UpdateGenderView.as_view(), name='update_gender'),
+    path('timezone/', UpdateTimezoneView.as_view(), name='update_timezone'),
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('request-password-reset/', RequestPasswordResetView.as_view(), name='request_password_reset'),
     path('reset-password/', ResetPasswordView.as_view(), name='reset_password'),
@@ -28,5 +30,7 @@ urlpatterns = [
     path('login/', ThrottledTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('refresh/', ThrottledTokenRefreshView.as_view(), name='token_refresh'),
     path('data/export/', DataExportView.as_view(), name='data_export'),
+    path('data/export/<uuid:job_id>/', DataExportJobView.as_view(), name='data_export_job'),
+    path('data/export/<uuid:job_id>/download/', DataExportDownloadView.as_view(), name='data_export_download'),
     path('data/import/', DataImportView.as_view(), name='data_import'),
 ]
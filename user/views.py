@@ -3,40 +3,40 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.throttling import ScopedRateThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import EntitlementRefreshToken
 from utrack.throttles import (
     LoginRateThrottle, RegistrationRateThrottle,
     BurstRateThrottle, SustainedRateThrottle,
-    ProUserRateThrottle
+    ProUserRateThrottle, ScopedRateThrottle
 )
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from .serializers import RegisterSerializer, UserSerializer
-from .models import UserProfile, WeightHistory
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .serializers import RegisterSerializer, UserSerializer, DataExportJobSerializer
+from .models import Preferences, UserProfile, WeightHistory, DataExportJob
+from .timezones import validate_timezone
 from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
-from datetime import date
+from django.db.models import OuterRef, Subquery
+from datetime import date, timedelta
 from body_measurements.models import BodyMeasurement
+import os
 import re
 import html
-import csv
-import io
-import zipfile
 import json
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 import logging
-from django.db import transaction
-from workout.models import Workout, WorkoutExercise, ExerciseSet, TemplateWorkout, TemplateWorkoutExercise
-from supplements.models import UserSupplement, UserSupplementLog, Supplement
-from exercise.models import Exercise
-from .models import Preferences
+from .export import stream_csv_export, stream_json_export
+from .data_import import import_user_data_file
+from .weight_trend import (
+    weight_trend, WEIGHT_TREND_DEFAULT_POINTS, WEIGHT_TREND_DEFAULT_SPAN_DAYS, WEIGHT_TREND_MAX_POINTS
+)
 
 User = get_user_model()
 
@@ -48,7 +48,7 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = EntitlementRefreshToken.for_user(user)
             return Response({
                 'user': UserSerializer(user).data,
                 'refresh': str(refresh),
@@ -138,6 +138,46 @@ class UpdateGenderView(APIView):
             'message': 'Gender updated successfully'
         }, status=status.HTTP_200_OK)
 
+class UpdateTimezoneView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        GET /api/user/timezone/
+        Get the timezone calendar dates are computed in
+        """
+        preferences, created = Preferences.objects.get_or_create(user=request.user)
+        return Response({'timezone': preferences.timezone}, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        """
+        POST /api/user/timezone/
+        Set the IANA timezone (e.g. "Europe/Istanbul") that new workouts, weigh-ins
+        and measurements are dated in. Existing entries keep their dates.
+        """
+        name = request.data.get('timezone')
+
+        if not name:
+            return Response({
+                'error': 'timezone field is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            validate_timezone(name)
+        except DjangoValidationError:
+            return Response({
+                'error': 'timezone must be a valid IANA timezone name'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        preferences, created = Preferences.objects.get_or_create(user=request.user)
+        preferences.timezone = name
+        preferences.save(update_fields=['timezone', 'updated_at'])
+
+        return Response({
+            'timezone': preferences.timezone,
+            'message': 'Timezone updated successfully'
+        }, status=status.HTTP_200_OK)
+
 class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -353,36 +393,60 @@ class GetWeightHistoryView(APIView):
         """
         paginator = WeightHistoryPagination()
         
-        # Get all weight history entries for the user
-        weight_history = WeightHistory.objects.filter(user=request.user).order_by('-created_at')
+        # Body fat from the latest body measurement on the same date, joined in
+        # the same query instead of one lookup per entry
+        same_day_body_fat = BodyMeasurement.objects.filter(
+            user=OuterRef('user'),
+            local_date=OuterRef('local_date')
+        ).order_by('-created_at').values('body_fat_percentage')[:1]
+        weight_history = WeightHistory.objects.filter(user=request.user).annotate(
+            bodyfat=Subquery(same_day_body_fat)
+        ).order_by('-created_at').values('id', 'created_at', 'weight', 'bodyfat')
         
         # Paginate - always returns paginated results
         page = paginator.paginate_queryset(weight_history, request)
         
-        results = []
-        for entry in page:
-            # Get date (just the date part, not time)
-            entry_date = entry.created_at.date()
-            
-            # Try to find body measurement on the same date
-            body_fat = None
-            body_measurement = BodyMeasurement.objects.filter(
-                user=request.user,
-                created_at__date=entry_date
-            ).first()
-            
-            if body_measurement and body_measurement.body_fat_percentage:
-                body_fat = float(body_measurement.body_fat_percentage)
-            
-            results.append({
-                'id': entry.id,
-                'date': entry.created_at.isoformat(),
-                'weight': float(entry.weight),
-                'bodyfat': body_fat
-            })
+        results = [
+            {
+                'id': entry['id'],
+                'date': entry['created_at'].isoformat(),
+                'weight': float(entry['weight']),
+                'bodyfat': float(entry['bodyfat']) if entry['bodyfat'] else None
+            }
+            for entry in page
+        ]
         
         return paginator.get_paginated_response(results)
 
+
+class WeightTrendView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        GET /api/user/weight/trend/?points=200&span_days=10
+        Smoothed weight trend over the whole history, downsampled for charting.
+        Returns: count (weigh-ins in the history) and up to `points` entries of
+        date, weight and trend (exponential moving average with a `span_days` time constant)
+        """
+        try:
+            points = int(request.query_params.get('points', WEIGHT_TREND_DEFAULT_POINTS))
+            span_days = float(request.query_params.get('span_days', WEIGHT_TREND_DEFAULT_SPAN_DAYS))
+        except ValueError:
+            return Response({'error': 'points and span_days must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 3 <= points <= WEIGHT_TREND_MAX_POINTS or span_days <= 0:
+            return Response({
+                'error': f'points must be between 3 and {WEIGHT_TREND_MAX_POINTS} and span_days must be positive'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = list(
+            WeightHistory.objects.filter(user=request.user).order_by('created_at').values_list('created_at', 'weight')
+        )
+        return Response({
+            'count': len(rows),
+            'points': weight_trend(rows, points, span_days)
+        })
+
 class DeleteWeightView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -404,7 +468,7 @@ class DeleteWeightView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Get the date of the weight entry
-        entry_date = weight_entry.created_at.date()
+        entry_date = weight_entry.local_date
         
         # Check if user wants to delete bodyfat on the same date
         delete_bodyfat = request.query_params.get('delete_bodyfat', 'false').lower() == 'true'
@@ -414,7 +478,7 @@ class DeleteWeightView(APIView):
             # Find and delete body measurements on the same date
             body_measurements = BodyMeasurement.objects.filter(
                 user=request.user,
-                created_at__date=entry_date
+                local_date=entry_date
             )
             if body_measurements.exists():
                 count = body_measurements.count()
@@ -732,160 +796,100 @@ class CheckNameView(APIView):
 class DataExportView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def perform_content_negotiation(self, request, force=False):
+        # ?format=csv selects the export format, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request):
         export_format = request.query_params.get('format', 'json').lower()
         user = request.user
 
-        # Gather all user data
-        data = {
-            'profile': {
-                'gender': user.gender,
-                'height': float(user.userprofile.height) if user.userprofile.height else None,
-                'weight': float(user.userprofile.body_weight) if user.userprofile.body_weight else None,
-            },
-            'preferences': {
-                'auto_warmup_set': user.preferences.auto_warmup_set,
-                'rest_time': user.preferences.rest_time,
-                'units': user.preferences.units,
-            },
-            'weight_history': list(WeightHistory.objects.filter(user=user).values('weight', 'created_at')),
-            'body_measurements': list(BodyMeasurement.objects.filter(user=user).values(
-                'weight', 'body_fat_percentage', 'neck', 'waist', 'hip', 'created_at'
-            )),
-            'workouts': [],
-            'template_workouts': [],
-            'supplements': [],
-            'supplement_logs': []
-        }
+        # Streamed: rows are read in chunks and written as they are produced
+        if export_format == 'csv':
+            response = StreamingHttpResponse(stream_csv_export(user), content_type='application/zip')
+            response['Content-Disposition'] = f'attachment; filename="utrack_data_export_{user.email}_{date.today()}.zip"'
+            return response
 
-        # Convert datetimes to strings for JSON
-        for entry in data['weight_history']:
-            entry['created_at'] = entry['created_at'].isoformat()
-            entry['weight'] = float(entry['weight'])
+        else:
+            # Default to JSON
+            response = StreamingHttpResponse(stream_json_export(user), content_type='application/json')
+            response['Content-Disposition'] = f'attachment; filename="utrack_data_export_{user.email}_{date.today()}.json"'
+            return response
 
-        for entry in data['body_measurements']:
-            entry['created_at'] = entry['created_at'].isoformat()
-            for key in ['weight', 'body_fat_percentage', 'neck', 'waist', 'hip']:
-                if entry[key]:
-                    entry[key] = float(entry[key])
+    def post(self, request):
+        """
+        Queue an export job for the process_export_jobs worker.
+        A job for the same format started within EXPORT_JOB_DEDUP_WINDOW_SECONDS is reused.
+        """
+        export_format = (request.data.get('format') or request.query_params.get('format', 'json')).lower()
+        if export_format not in ('json', 'csv'):
+            return Response({'error': 'format must be json or csv'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get Workouts
-        workouts = Workout.objects.filter(user=user).prefetch_related('workoutexercise_set__exercise', 'workoutexercise_set__sets')
-        for w in workouts:
-            w_data = {
-                'title': w.title,
-                'datetime': w.datetime.isoformat(),
-                'duration': w.duration,
-                'intensity': w.intensity,
-                'notes': w.notes,
-                'is_done': w.is_done,
-                'is_rest_day': w.is_rest_day,
-                'calories_burned': float(w.calories_burned) if w.calories_burned else None,
-                'exercises': []
-            }
-            for we in w.workoutexercise_set.all():
-                we_data = {
-                    'exercise_name': we.exercise.name,
-                    'order': we.order,
-                    'sets': list(we.sets.values('set_number', 'reps', 'weight', 'rest_time_before_set', 'is_warmup', 'reps_in_reserve', 'eccentric_time', 'concentric_time', 'total_tut'))
-                }
-                for s in we_data['sets']:
-                    s['weight'] = float(s['weight'])
-                w_data['exercises'].append(we_data)
-            data['workouts'].append(w_data)
+        window_start = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_DEDUP_WINDOW_SECONDS)
+        job = DataExportJob.objects.filter(
+            user=request.user,
+            export_format=export_format,
+            status__in=['pending', 'running', 'done'],
+            created_at__gte=window_start
+        ).order_by('-created_at').first()
+
+        created = job is None
+        if created:
+            job = DataExportJob.objects.create(user=request.user, export_format=export_format)
+
+        return Response(
+            DataExportJobSerializer(job, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+        )
 
-        # Get Template Workouts
-        templates = TemplateWorkout.objects.filter(user=user).prefetch_related('templateworkoutexercise_set__exercise')
-        for t in templates:
-            t_data = {
-                'title': t.title,
-                'notes': t.notes,
-                'exercises': [
-                    {'exercise_name': twe.exercise.name, 'order': twe.order}
-                    for twe in t.templateworkoutexercise_set.all()
-                ]
-            }
-            data['template_workouts'].append(t_data)
 
-        # Get Supplements
-        user_supps = UserSupplement.objects.filter(user=user).select_related('supplement')
-        for us in user_supps:
-            us_data = {
-                'supplement_name': us.supplement.name,
-                'dosage': us.dosage,
-                'frequency': us.frequency,
-                'time_of_day': us.time_of_day,
-                'is_active': us.is_active
-            }
-            data['supplements'].append(us_data)
+class DataExportJobView(APIView):
+    """
+    GET /api/user/data/export/<job_id>/
+    Status and progress of an export job; includes download_url once done.
+    """
+    permission_classes = [IsAuthenticated]
 
-        # Get Supplement Logs
-        logs = UserSupplementLog.objects.filter(user=user).select_related('user_supplement__supplement')
-        for log in logs:
-            log_data = {
-                'supplement_name': log.user_supplement.supplement.name,
-                'date': log.date.isoformat(),
-                'time': log.time.isoformat(),
-                'dosage': log.dosage
-            }
-            data['supplement_logs'].append(log_data)
+    def get(self, request, job_id):
+        try:
+            job = DataExportJob.objects.get(id=job_id, user=request.user)
+        except DataExportJob.DoesNotExist:
+            return Response({'error': 'Export job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(DataExportJobSerializer(job, context={'request': request}).data)
 
-        if export_format == 'csv':
-            # Create ZIP archive with multiple CSVs
-            buffer = io.BytesIO()
-            with zipfile.ZipFile(buffer, 'w') as zip_file:
-                # Weight History CSV
-                weight_io = io.StringIO()
-                weight_writer = csv.writer(weight_io)
-                weight_writer.writerow(['Date', 'Weight (kg)'])
-                for entry in data['weight_history']:
-                    weight_writer.writerow([entry['created_at'], entry['weight']])
-                zip_file.writestr('weight_history.csv', weight_io.getvalue())
 
-                # Workouts CSV (flat format)
-                workout_io = io.StringIO()
-                workout_writer = csv.writer(workout_io)
-                workout_writer.writerow(['Date', 'Workout Title', 'Exercise', 'Set #', 'Weight', 'Reps', 'Is Warmup', 'RIR'])
-                for w in data['workouts']:
-                    for we in w['exercises']:
-                        for s in we['sets']:
-                            workout_writer.writerow([
-                                w['datetime'], w['title'], we['exercise_name'],
-                                s['set_number'], s['weight'], s['reps'],
-                                s['is_warmup'], s['reps_in_reserve']
-                            ])
-                zip_file.writestr('workouts.csv', workout_io.getvalue())
+class DataExportDownloadView(APIView):
+    """
+    GET /api/user/data/export/<job_id>/download/
+    Download a finished export. Behind nginx the file is sent by nginx via
+    X-Accel-Redirect; otherwise Django streams it.
+    """
+    permission_classes = [IsAuthenticated]
 
-                # Body Measurements CSV
-                bm_io = io.StringIO()
-                bm_writer = csv.writer(bm_io)
-                bm_writer.writerow(['Date', 'Weight', 'Body Fat %', 'Neck', 'Waist', 'Hip'])
-                for bm in data['body_measurements']:
-                    bm_writer.writerow([
-                        bm['created_at'], bm['weight'], bm['body_fat_percentage'],
-                        bm['neck'], bm['waist'], bm['hip']
-                    ])
-                zip_file.writestr('body_measurements.csv', bm_io.getvalue())
+    def get(self, request, job_id):
+        try:
+            job = DataExportJob.objects.get(id=job_id, user=request.user)
+        except DataExportJob.DoesNotExist:
+            return Response({'error': 'Export job not found'}, status=status.HTTP_404_NOT_FOUND)
 
-                # Supplements CSV
-                supp_io = io.StringIO()
-                supp_writer = csv.writer(supp_io)
-                supp_writer.writerow(['Date', 'Time', 'Supplement', 'Dosage'])
-                for log in data['supplement_logs']:
-                    supp_writer.writerow([log['date'], log['time'], log['supplement_name'], log['dosage']])
-                zip_file.writestr('supplement_logs.csv', supp_io.getvalue())
+        if job.status != 'done':
+            return Response({'error': 'Export is not ready', 'status': job.status}, status=status.HTTP_409_CONFLICT)
 
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/zip')
-            response['Content-Disposition'] = f'attachment; filename="utrack_data_export_{user.email}_{date.today()}.zip"'
-            return response
+        extension = 'zip' if job.export_format == 'csv' else 'json'
+        filename = f'utrack_data_export_{request.user.email}_{job.created_at.date()}.{extension}'
+        content_type = 'application/zip' if job.export_format == 'csv' else 'application/json'
 
+        if settings.EXPORT_X_ACCEL_REDIRECT:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = f"/protected/{job.file_path}"
         else:
-            # Default to JSON
-            response_json = json.dumps(data, indent=4)
-            response = HttpResponse(response_json, content_type='application/json')
-            response['Content-Disposition'] = f'attachment; filename="utrack_data_export_{user.email}_{date.today()}.json"'
-            return response
+            file_path = os.path.join(settings.MEDIA_ROOT, job.file_path)
+            if not os.path.exists(file_path):
+                return Response({'error': 'Export file is no longer available'}, status=status.HTTP_410_GONE)
+            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
 class DataImportView(APIView):
     permission_classes = [IsAuthenticated]
@@ -894,144 +898,11 @@ class DataImportView(APIView):
         if 'file' not in request.FILES:
             return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
 
-        import_file = request.FILES['file']
+        # Parsed incrementally; the import transaction rolls back if the
+        # file turns out to be malformed part way through
         try:
-            data = json.load(import_file)
-        except json.JSONDecodeError:
+            import_user_data_file(request.user, request.FILES['file'])
+        except (json.JSONDecodeError, UnicodeDecodeError):
             return Response({'error': 'Invalid JSON file'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = request.user
-        
-        with transaction.atomic():
-            # 1. Profile and Preferences
-            if 'profile' in data:
-                p = data['profile']
-                if 'gender' in p: user.gender = p['gender']
-                user.save()
-                
-                profile, _ = UserProfile.objects.get_or_create(user=user)
-                if 'height' in p: profile.height = p['height']
-                if 'weight' in p: profile.body_weight = p['weight']
-                profile.save()
-
-            if 'preferences' in data:
-                pref = data['preferences']
-                p_obj, _ = Preferences.objects.get_or_create(user=user)
-                if 'auto_warmup_set' in pref: p_obj.auto_warmup_set = pref['auto_warmup_set']
-                if 'rest_time' in pref: p_obj.rest_time = pref['rest_time']
-                if 'units' in pref: p_obj.units = pref['units']
-                p_obj.save()
-
-            # 2. Weight History
-            if 'weight_history' in data:
-                for entry in data['weight_history']:
-                    WeightHistory.objects.get_or_create(
-                        user=user,
-                        weight=entry['weight'],
-                        created_at=entry['created_at']
-                    )
-
-            # 3. Body Measurements
-            if 'body_measurements' in data:
-                for bm in data['body_measurements']:
-                    BodyMeasurement.objects.get_or_create(
-                        user=user,
-                        created_at=bm['created_at'],
-                        defaults={
-                            'weight': bm.get('weight'),
-                            'body_fat_percentage': bm.get('body_fat_percentage'),
-                            'neck': bm.get('neck'),
-                            'waist': bm.get('waist'),
-                            'hip': bm.get('hip')
-                        }
-                    )
-
-            # 4. Workouts
-            if 'workouts' in data:
-                for w in data['workouts']:
-                    workout, created = Workout.objects.get_or_create(
-                        user=user,
-                        datetime=w['datetime'],
-                        defaults={
-                            'title': w['title'],
-                            'duration': w['duration'],
-                            'intensity': w['intensity'],
-                            'notes': w.get('notes'),
-                            'is_done': w.get('is_done', True),
-                            'is_rest_day': w.get('is_rest_day', False),
-                            'calories_burned': w.get('calories_burned')
-                        }
-                    )
-                    if created:
-                        for ex in w.get('exercises', []):
-                            exercise = Exercise.objects.filter(name__iexact=ex['exercise_name']).first()
-                            if exercise:
-                                we = WorkoutExercise.objects.create(
-                                    workout=workout,
-                                    exercise=exercise,
-                                    order=ex['order']
-                                )
-                                for s in ex.get('sets', []):
-                                    ExerciseSet.objects.create(
-                                        workout_exercise=we,
-                                        set_number=s['set_number'],
-                                        reps=s['reps'],
-                                        weight=s['weight'],
-                                        rest_time_before_set=s.get('rest_time_before_set', 0),
-                                        is_warmup=s.get('is_warmup', False),
-                                        reps_in_reserve=s.get('reps_in_reserve', 0),
-                                        eccentric_time=s.get('eccentric_time'),
-                                        concentric_time=s.get('concentric_time'),
-                                        total_tut=s.get('total_tut')
-                                    )
-
-            # 5. Template Workouts
-            if 'template_workouts' in data:
-                for t in data['template_workouts']:
-                    template, created = TemplateWorkout.objects.get_or_create(
-                        user=user,
-                        title=t['title'],
-                        defaults={'notes': t.get('notes')}
-                    )
-                    if created:
-                        for ex in t.get('exercises', []):
-                            exercise = Exercise.objects.filter(name__iexact=ex['exercise_name']).first()
-                            if exercise:
-                                TemplateWorkoutExercise.objects.create(
-                                    template_workout=template,
-                                    exercise=exercise,
-                                    order=ex['order']
-                                )
-
-            # 6. Supplements
-            if 'supplements' in data:
-                for s in data['supplements']:
-                    supplement = Supplement.objects.filter(name__iexact=s['supplement_name']).first()
-                    if supplement:
-                        UserSupplement.objects.get_or_create(
-                            user=user,
-                            supplement=supplement,
-                            defaults={
-                                'dosage': s['dosage'],
-                                'frequency': s['frequency'],
-                                'time_of_day': s.get('time_of_day'),
-                                'is_active': s.get('is_active', True)
-                            }
-                        )
-
-            # 7. Supplement Logs
-            if 'supplement_logs' in data:
-                for log in data['supplement_logs']:
-                    supplement = Supplement.objects.filter(name__iexact=log['supplement_name']).first()
-                    if supplement:
-                        user_supp = UserSupplement.objects.filter(user=user, supplement=supplement).first()
-                        if user_supp:
-                            UserSupplementLog.objects.get_or_create(
-                                user=user,
-                                user_supplement=user_supp,
-                                date=log['date'],
-                                time=log['time'],
-                                defaults={'dosage': log['dosage']}
-                            )
-
         return Response({'message': 'Data imported successfully'}, status=status.HTTP_201_CREATED)
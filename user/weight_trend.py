@@ -0,0 +1,81 @@
+"""
+Smoothed and downsampled weight series behind WeightTrendView.
+
+Weigh-ins are irregular, so the moving average decays with the time between
+entries rather than per entry. The smoothed series is then reduced to a fixed
+number of points with Largest-Triangle-Three-Buckets, which keeps the visual
+shape of the line for charting.
+"""
+import numpy as np
+
+WEIGHT_TREND_DEFAULT_POINTS = 200
+WEIGHT_TREND_MAX_POINTS = 1000
+WEIGHT_TREND_DEFAULT_SPAN_DAYS = 10.0
+
+SECONDS_PER_DAY = 86400.0
+
+
+def exponential_moving_average(days, values, span_days):
+    """EMA of values sampled at days, weighting each step by 1 - exp(-elapsed / span_days)."""
+    if len(values) == 0:
+        return np.array([], dtype=float)
+    alphas = (1.0 - np.exp(-np.diff(days) / span_days)).tolist()
+    values_list = values.tolist()
+    average = np.empty(len(values), dtype=float)
+    current = values_list[0]
+    average[0] = current
+    for i, alpha in enumerate(alphas, start=1):
+        current += alpha * (values_list[i] - current)
+        average[i] = current
+    return average
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps when reducing (x, y) to threshold points."""
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    every = (length - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+
+        # Third vertex: the average of the next bucket
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[selected] - average_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (average_y - y[selected])
+        )
+        selected = start + int(areas.argmax())
+        indices[bucket + 1] = selected
+    indices[-1] = length - 1
+    return indices
+
+
+def weight_trend(rows, points=WEIGHT_TREND_DEFAULT_POINTS, span_days=WEIGHT_TREND_DEFAULT_SPAN_DAYS):
+    """
+    rows: (created_at, weight) pairs in chronological order.
+    Returns up to `points` dicts of date, raw weight and smoothed trend.
+    """
+    if not rows:
+        return []
+
+    days = np.array([created_at.timestamp() for created_at, _ in rows]) / SECONDS_PER_DAY
+    weights = np.array([float(weight) for _, weight in rows])
+    trend = exponential_moving_average(days, weights, span_days)
+
+    return [
+        {
+            'date': rows[i][0].isoformat(),
+            'weight': float(weights[i]),
+            'trend': round(float(trend[i]), 2),
+        }
+        for i in lttb_indices(days, trend, points).tolist()
+    ]
@@ -0,0 +1,34 @@
+"""
+Custom JWT authentication classes.
+"""
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+
+class EntitlementJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user through the short-lived auth user
+    cache (user/auth_cache.py, when REDIS_URL is set) and attaches the token's entitlement claims to it,
+    so workout.permissions.get_entitlements answers PRO/trial checks without the database.
+    Tokens issued before these claims existed load the user from the database as before.
+    """
+
+    def get_user(self, validated_token):
+        from user.auth_cache import TOKEN_VERSION_CLAIM, cache_user, get_cached_user, token_version
+        from user.tokens import ENTITLEMENT_CLAIMS
+
+        version = validated_token.get(TOKEN_VERSION_CLAIM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = get_cached_user(user_id, version) if version and user_id else None
+        if user is None:
+            user = super().get_user(validated_token)
+            # Tokens from before a password change keep working but are not cached
+            if version and version == token_version(user.password):
+                cache_user(user)
+        elif not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        if all(claim in validated_token for claim in ENTITLEMENT_CLAIMS):
+            user.entitlement_claims = {claim: validated_token[claim] for claim in ENTITLEMENT_CLAIMS}
+        return user
@@ -1,9 +1,14 @@
+import atexit
+import copy
+import json
 import logging
+import logging.config
 import os
+import queue
 import sys
 import time
 import platform
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 class WindowsSafeRotatingFileHandler(RotatingFileHandler):
@@ -56,3 +61,124 @@ class WindowsSafeRotatingFileHandler(RotatingFileHandler):
         if not self.delay:
             self.stream = self._open()
 
+
+
+class ProcessRotatingFileHandler(WindowsSafeRotatingFileHandler):
+    """
+    Rotating file handler that can give every process its own file.
+
+    With per_process=True, 'requests.log' becomes 'requests.<pid>.log', so
+    gunicorn workers never rotate a file another worker is still writing.
+    The pid is taken when the file is opened, which happens after the fork.
+    """
+
+    def __init__(self, filename, *args, per_process=False, **kwargs):
+        self.per_process = per_process
+        self._template = os.fspath(filename)
+        kwargs.setdefault('delay', True)
+        super().__init__(filename, *args, **kwargs)
+
+    def _open(self):
+        if self.per_process:
+            root, ext = os.path.splitext(os.path.abspath(self._template))
+            self.baseFilename = f'{root}.{os.getpid()}{ext}'
+        return super()._open()
+
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'targets'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, process, plus any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RoutingQueueHandler(QueueHandler):
+    """
+    Puts records on the process-wide logging queue, tagged with the handlers
+    that should write them, so the request thread never touches a file.
+    """
+
+    def __init__(self, queue, targets):
+        super().__init__(queue)
+        self.targets = targets
+
+    def prepare(self, record):
+        # Resolve the message and traceback now (the arguments may change
+        # after this call returns) but leave all other formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.targets = self.targets
+        return record
+
+
+class RoutingQueueListener(QueueListener):
+    """Writes each queued record to the handlers its RoutingQueueHandler tagged it with."""
+
+    def handle(self, record):
+        for handler in record.targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+_listener = None
+
+
+def configure_logging(config):
+    """
+    LOGGING_CONFIG entry point: apply the dictConfig, then move every logger's
+    handlers behind one queue drained by a background thread in each process.
+    """
+    global _listener
+
+    logging.config.dictConfig(config)
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue = queue.SimpleQueue()
+    loggers = [logging.getLogger(name) for name in config.get('loggers', {})] + [logging.getLogger()]
+    for logger in loggers:
+        targets = [handler for handler in logger.handlers if not isinstance(handler, QueueHandler)]
+        if targets:
+            logger.handlers = [RoutingQueueHandler(log_queue, targets)]
+
+    _listener = RoutingQueueListener(log_queue)
+    _listener.start()
+
+
+def _restart_listener():
+    # The listener thread does not survive fork (e.g. gunicorn --preload)
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+
+def _stop_listener():
+    # Flush whatever is still queued when the process exits
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+os.register_at_fork(after_in_child=_restart_listener)
+atexit.register(_stop_listener)
@@ -1,16 +1,22 @@
-import json
 import logging
+import random
 import time
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from django.db import connection
+
+from core import metrics
 
 logger = logging.getLogger('utrack.requests')
 error_logger = logging.getLogger('utrack')
 
 class RequestResponseLogMiddleware(MiddlewareMixin):
     """
-    Logs all HTTP requests and responses with timing information.
-    Only logs request body/response for non-sensitive endpoints in production.
+    Logs one record per request with method, path, status, duration, user and IP
+    as structured fields (written as a JSON line by the file handlers).
+    Small JSON request bodies of non-sensitive endpoints are included for a
+    REQUEST_BODY_LOG_SAMPLE_RATE fraction of requests; nothing is formatted
+    unless the record is actually emitted.
     """
     
     # Endpoints where we don't want to log request/response bodies (sensitive data)
@@ -21,35 +27,24 @@ class RequestResponseLogMiddleware(MiddlewareMixin):
         '/api/token/',
     ]
     
+    # Only bodies smaller than this are ever logged
+    MAX_LOGGED_BODY_BYTES = 1000
+    
     def process_request(self, request):
-        """Log incoming request"""
-        request.start_time = time.time()
-        
-        # Get user info
-        user = getattr(request, 'user', None)
-        user_str = user.email if user and user.is_authenticated else 'anonymous'
-        
-        # Get IP address
-        ip = self.get_client_ip(request)
-        
-        # Log basic request info
-        logger.info(
-            f"REQUEST: {request.method} {request.get_full_path()} | "
-            f"User: {user_str} | IP: {ip}"
-        )
+        """Start the request timer and sample the request body"""
+        request.start_time = time.perf_counter()
+        request.log_body = None
         
-        # Log request body for non-sensitive endpoints (only in DEBUG mode or for specific endpoints)
-        if request.body and not self._is_sensitive_path(request.path):
-            try:
-                body_str = request.body.decode('utf-8')
-                if body_str and len(body_str) < 1000:  # Only log small bodies
-                    try:
-                        body_json = json.loads(body_str)
-                        logger.debug(f"Request body: {json.dumps(body_json, indent=2)}")
-                    except json.JSONDecodeError:
-                        logger.debug(f"Request body: {body_str[:200]}")
-            except Exception as e:
-                logger.debug(f"Could not decode request body: {str(e)}")
+        # Read the body only for sampled small JSON requests, so uploads and
+        # streaming imports are never pulled into memory here
+        if (
+            settings.REQUEST_BODY_LOG_SAMPLE_RATE > 0
+            and request.content_type == 'application/json'
+            and 0 < self._content_length(request) < self.MAX_LOGGED_BODY_BYTES
+            and not self._is_sensitive_path(request.path)
+            and random.random() < settings.REQUEST_BODY_LOG_SAMPLE_RATE
+        ):
+            request.log_body = request.body.decode('utf-8', errors='replace')
         
         return None
     
@@ -58,57 +53,37 @@ class RequestResponseLogMiddleware(MiddlewareMixin):
         if not hasattr(request, 'start_time'):
             return response
         
-        duration = int((time.time() - request.start_time) * 1000)  # Convert to milliseconds
+        duration = int((time.perf_counter() - request.start_time) * 1000)  # Convert to milliseconds
         
         user = getattr(request, 'user', None)
         user_str = user.email if user and user.is_authenticated else 'anonymous'
         ip = self.get_client_ip(request)
         
-        # Log response
-        log_level = 'warning' if response.status_code >= 400 else 'info'
-        log_message = (
-            f"RESPONSE: {request.method} {request.get_full_path()} | "
-            f"Status: {response.status_code} | "
-            f"Duration: {duration}ms | "
-            f"User: {user_str} | IP: {ip}"
-        )
+        fields = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': duration,
+            'user': user_str,
+            'ip': ip,
+        }
+        if request.log_body is not None:
+            fields['body'] = request.log_body
         
-        # Log response body in DEBUG mode (development)
-        if settings.DEBUG and not self._is_sensitive_path(request.path):
-            try:
-                # Try to get response content
-                if hasattr(response, 'content'):
-                    content = response.content
-                    if content:
-                        try:
-                            content_str = content.decode('utf-8')
-                            # Only log if it's JSON and not too large
-                            if content_str.startswith('{') or content_str.startswith('['):
-                                try:
-                                    response_json = json.loads(content_str)
-                                    # Limit size to prevent huge logs
-                                    if len(content_str) < 5000:
-                                        logger.info(f"Response JSON:\n{json.dumps(response_json, indent=2)}")
-                                    else:
-                                        logger.info(f"Response JSON (truncated): {content_str[:500]}...")
-                                except json.JSONDecodeError:
-                                    # Not JSON, log as text (truncated)
-                                    logger.debug(f"Response body: {content_str[:200]}")
-                        except UnicodeDecodeError:
-                            pass
-            except Exception as e:
-                logger.debug(f"Could not log response body: {str(e)}")
+        # Arguments are only interpolated if a handler accepts the record
+        log_level = logging.WARNING if response.status_code >= 400 else logging.INFO
+        logger.log(
+            log_level, 'RESPONSE: %s %s | Status: %s | Duration: %sms | User: %s | IP: %s',
+            fields['method'], fields['path'], response.status_code, duration, user_str, ip,
+            extra=fields
+        )
         
-        if log_level == 'warning':
-            logger.warning(log_message)
-            # Log error details for 5xx errors
-            if response.status_code >= 500:
-                error_logger.error(
-                    f"Server Error: {request.method} {request.get_full_path()} | "
-                    f"Status: {response.status_code} | User: {user_str}"
-                )
-        else:
-            logger.info(log_message)
+        # Log error details for 5xx errors
+        if response.status_code >= 500:
+            error_logger.error(
+                'Server Error: %s %s | Status: %s | User: %s',
+                fields['method'], fields['path'], response.status_code, user_str
+            )
         
         return response
     
@@ -121,23 +96,42 @@ class RequestResponseLogMiddleware(MiddlewareMixin):
             ip = request.META.get('REMOTE_ADDR')
         return ip
     
+    def _content_length(self, request):
+        try:
+            return int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return 0
+    
     def _is_sensitive_path(self, path):
         """Check if path contains sensitive data"""
         return any(sensitive in path for sensitive in self.SENSITIVE_PATHS)
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+class MetricsMiddleware:
+    """
+    Records request count, latency, database query count and time, and default
+    cache hits and misses per resolved URL name into core.metrics (served by
+    MetricsView at /api/metrics/).
+    Sits first in MIDDLEWARE so the latency covers the whole middleware stack.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        timer = metrics.QueryTimer()
+        cache_counter = metrics.CacheCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer), metrics.count_cache_lookups(cache_counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        
+        # URL names keep the label set bounded; unmatched paths (404s) share one label
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.record_request(
+            view, request.method, response.status_code, duration, timer.queries, timer.seconds,
+            cache_counter.hits, cache_counter.misses
+        )
+        metrics.maybe_flush()
+        return response
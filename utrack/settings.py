@@ -144,6 +144,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'utrack.middleware.MetricsMiddleware', # Per-view request/query metrics, first so it times everything
     'corsheaders.middleware.CorsMiddleware', # Add CorsMiddleware at the top
     'utrack.middleware.RequestResponseLogMiddleware', # Add logging middleware
     'django.middleware.security.SecurityMiddleware',
@@ -221,6 +222,50 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Data export jobs
+# Requests for the same format within the window reuse the running or finished job
+EXPORT_JOB_DEDUP_WINDOW_SECONDS = env.int('EXPORT_JOB_DEDUP_WINDOW_SECONDS', default=15 * 60)
+# Running jobs that have not saved progress for this long lost their worker and are failed
+EXPORT_JOB_STALE_SECONDS = env.int('EXPORT_JOB_STALE_SECONDS', default=30 * 60)
+# Finished jobs and their artifacts under MEDIA_ROOT/exports/ are deleted after this long
+EXPORT_RETENTION_SECONDS = env.int('EXPORT_RETENTION_SECONDS', default=7 * 24 * 60 * 60)
+# Hand finished artifacts to nginx (internal /protected/exports/ location) instead of streaming them from Django
+EXPORT_X_ACCEL_REDIRECT = env.bool('EXPORT_X_ACCEL_REDIRECT', default=LOCALHOST != 'True')
+
+# Catalog bundles (build_catalog_bundles): PRO-only bundles are handed to nginx
+# (internal /protected/catalog/ location) instead of being streamed from Django
+CATALOG_X_ACCEL_REDIRECT = env.bool('CATALOG_X_ACCEL_REDIRECT', default=LOCALHOST != 'True')
+
+# Cache: Redis when REDIS_URL is set (shared by all gunicorn workers), per-process memory otherwise
+REDIS_URL = env('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Authenticated users are cached between JWT requests for this long (see user/auth_cache.py); 0 disables.
+# Needs the shared cache: in per-process memory a password change or deactivation would only
+# invalidate the worker that handled it, and the others would keep authenticating the old user
+AUTH_USER_CACHE_SECONDS = env.int('AUTH_USER_CACHE_SECONDS', default=60 if REDIS_URL else 0)
+if AUTH_USER_CACHE_SECONDS and not REDIS_URL:
+    raise ValueError("AUTH_USER_CACHE_SECONDS requires REDIS_URL", AUTH_USER_CACHE_SECONDS)
+
+# Metrics (core/metrics.py): each worker writes its snapshot to METRICS_DIR so
+# /api/metrics/ reports all gunicorn workers; empty means per-process only
+METRICS_DIR = env('METRICS_DIR', default='')
+METRICS_FLUSH_SECONDS = env.float('METRICS_FLUSH_SECONDS', default=5.0)
+# Scrapers authenticate with "Authorization: Metrics <token>"; staff users with their JWT
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
 # Email Configuration
 # Use console backend for development, SMTP for production
 if LOCALHOST == 'True':
@@ -285,7 +330,7 @@ SOCIALACCOUNT_PROVIDERS = {
 # REST Framework Config (update existing)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'utrack.authentication.EntitlementJWTAuthentication',
         'dj_rest_auth.jwt_auth.JWTCookieAuthentication', # Optional, for cookie auth
     ),
     # Rate limiting/throttling configuration
@@ -344,12 +389,17 @@ SIMPLE_JWT = {
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
 
     'JTI_CLAIM': 'jti',
+
+    # Access tokens carry PRO/trial entitlement claims (see user/tokens.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'user.tokens.EntitlementTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'user.tokens.EntitlementTokenRefreshSerializer',
 }
 
 # Use JWTs with dj-rest-auth
 REST_AUTH = {
     'USE_JWT': True,
     'JWT_AUTH_HTTPONLY': False, # <--- Add this line to return refresh token in body
+    'JWT_TOKEN_CLAIMS_SERIALIZER': 'user.tokens.EntitlementTokenObtainPairSerializer',
 }
 
 SITE_ID = 1
@@ -358,6 +408,14 @@ SITE_ID = 1
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)  # Create logs directory if it doesn't exist
 
+# Log files get one JSON record per line; handlers write from a background queue
+# thread (utrack.logging_handlers.configure_logging) instead of the request thread
+LOGGING_CONFIG = 'utrack.logging_handlers.configure_logging'
+# Each process writes its own files (e.g. requests.<pid>.log) so gunicorn workers never share a rollover
+LOG_FILE_PER_PROCESS = env.bool('LOG_FILE_PER_PROCESS', default=LOCALHOST != 'True')
+# Fraction of small JSON request bodies included in request log records
+REQUEST_BODY_LOG_SAMPLE_RATE = env.float('REQUEST_BODY_LOG_SAMPLE_RATE', default=1.0 if DEBUG else 0.01)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -370,9 +428,8 @@ LOGGING = {
             'format': '{levelname} {asctime} {message}',
             'style': '{',
         },
-        'request': {
-            'format': '{levelname} {asctime} {message}',
-            'style': '{',
+        'json': {
+            '()': 'utrack.logging_handlers.JSONFormatter',
         },
     },
     'filters': {
@@ -386,27 +443,30 @@ LOGGING = {
     'handlers': {
         'file_errors': {
             'level': 'ERROR',
-            'class': 'utrack.logging_handlers.WindowsSafeRotatingFileHandler',
+            'class': 'utrack.logging_handlers.ProcessRotatingFileHandler',
+            'per_process': LOG_FILE_PER_PROCESS,
             'filename': LOGS_DIR / 'errors.log',
             'maxBytes': 10 * 1024 * 1024,  # 10 MB
             'backupCount': 10,  # Keep 10 backup files
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'file_info': {
             'level': 'INFO',
-            'class': 'utrack.logging_handlers.WindowsSafeRotatingFileHandler',
+            'class': 'utrack.logging_handlers.ProcessRotatingFileHandler',
+            'per_process': LOG_FILE_PER_PROCESS,
             'filename': LOGS_DIR / 'info.log',
             'maxBytes': 10 * 1024 * 1024,  # 10 MB
             'backupCount': 5,  # Keep 5 backup files
-            'formatter': 'simple',
+            'formatter': 'json',
         },
         'file_requests': {
             'level': 'INFO',
-            'class': 'utrack.logging_handlers.WindowsSafeRotatingFileHandler',
+            'class': 'utrack.logging_handlers.ProcessRotatingFileHandler',
+            'per_process': LOG_FILE_PER_PROCESS,
             'filename': LOGS_DIR / 'requests.log',
             'maxBytes': 10 * 1024 * 1024,  # 10 MB
             'backupCount': 5,  # Keep 5 backup files
-            'formatter': 'request',
+            'formatter': 'json',
         },
         'console': {
             'level': 'INFO',
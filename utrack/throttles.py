@@ -1,10 +1,107 @@
 """
 Custom rate limiting/throttling classes for different endpoint types.
+
+All of them use GCRA (the generic cell rate algorithm) instead of DRF's
+request-history list: each key stores one integer, the theoretical arrival
+time (TAT) of the next request in microseconds. A rate of N/period spaces
+requests period/N apart and tolerates a burst of N, so a client can still
+send N requests at once, after which capacity comes back one request per
+period/N instead of all at once when the oldest request ages out.
+
+On Redis the read-check-write runs as a Lua script, so it is atomic across
+gunicorn workers. Other cache backends (LocMemCache in development and
+tests) are per-process, and a module lock makes the update atomic there.
+"""
+import hashlib
+import math
+import threading
+
+from django.core.cache.backends.redis import RedisCache
+from rest_framework import throttling
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+try:
+    from redis.exceptions import NoScriptError
+except ImportError:  # redis-py is only installed where REDIS_URL is used
+    NoScriptError = None
+
+# KEYS[1]: TAT key; ARGV: now, emission interval, burst tolerance (microseconds).
+# Returns 0 when the request is allowed, otherwise the microseconds to wait.
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local wait = tat - tolerance - now
+if wait > 0 then
+    return wait
+end
+tat = tat + interval
+redis.call('SET', KEYS[1], string.format('%d', tat), 'PX', math.ceil((tat - now) / 1000))
+return 0
 """
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle, ScopedRateThrottle
+GCRA_SHA = hashlib.sha1(GCRA_SCRIPT.encode()).hexdigest()
 
+_local_lock = threading.Lock()
 
-class BurstRateThrottle(UserRateThrottle):
+
+def gcra_local(cache, key, now, interval, tolerance):
+    """GCRA_SCRIPT for caches without server-side scripting."""
+    with _local_lock:
+        tat = cache.get(key)
+        if not isinstance(tat, int) or tat < now:
+            tat = now
+        wait = tat - tolerance - now
+        if wait > 0:
+            return wait
+        tat += interval
+        cache.set(key, tat, math.ceil((tat - now) / 1_000_000))
+        return 0
+
+
+def gcra_redis(cache, key, now, interval, tolerance):
+    key = cache.make_and_validate_key(key)
+    # get_client() returns a new client on every call, so nothing is kept per client:
+    # the script runs by its SHA and is loaded again only when the server answers NOSCRIPT
+    client = cache._cache.get_client(key, write=True)
+    try:
+        return int(client.evalsha(GCRA_SHA, 1, key, now, interval, tolerance))
+    except NoScriptError:
+        client.script_load(GCRA_SCRIPT)
+        return int(client.evalsha(GCRA_SHA, 1, key, now, interval, tolerance))
+
+
+class GCRARateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle with one fixed-size cache entry per key.
+    Subclasses pick the key (user, IP or scope) through the usual DRF base class.
+    """
+    cache_format = 'throttle_gcra_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        period = self.duration * 1_000_000
+        interval = period // self.num_requests
+        acquire = gcra_redis if isinstance(self.cache, RedisCache) else gcra_local
+        self.wait_us = acquire(self.cache, self.key, int(self.timer() * 1_000_000), interval, period - interval)
+        if self.wait_us:
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        return self.wait_us / 1_000_000 if self.wait_us else None
+
+
+class BurstRateThrottle(GCRARateThrottle, UserRateThrottle):
     """
     Throttle for burst requests (short-term rate limiting).
     Used for endpoints that should have strict limits.
@@ -12,7 +109,7 @@ class BurstRateThrottle(UserRateThrottle):
     scope = 'burst'
 
 
-class SustainedRateThrottle(UserRateThrottle):
+class SustainedRateThrottle(GCRARateThrottle, UserRateThrottle):
     """
     Throttle for sustained requests (long-term rate limiting).
     Used for endpoints that need protection against abuse over time.
@@ -20,36 +117,42 @@ class SustainedRateThrottle(UserRateThrottle):
     scope = 'sustained'
 
 
-class AnonBurstRateThrottle(AnonRateThrottle):
+class AnonBurstRateThrottle(GCRARateThrottle, AnonRateThrottle):
     """
     Throttle for anonymous burst requests.
     """
     scope = 'anon_burst'
 
 
-class AnonSustainedRateThrottle(AnonRateThrottle):
+class AnonSustainedRateThrottle(GCRARateThrottle, AnonRateThrottle):
     """
     Throttle for anonymous sustained requests.
     """
     scope = 'anon_sustained'
 
 
-class ProUserRateThrottle(UserRateThrottle):
+class ProUserRateThrottle(GCRARateThrottle, UserRateThrottle):
     """
     Higher rate limits for PRO users.
     """
     scope = 'pro_user'
 
 
-class LoginRateThrottle(AnonRateThrottle):
+class LoginRateThrottle(GCRARateThrottle, AnonRateThrottle):
     """
     Strict rate limiting for login endpoints to prevent brute force attacks.
     """
     scope = 'login'
 
 
-class RegistrationRateThrottle(AnonRateThrottle):
+class RegistrationRateThrottle(GCRARateThrottle, AnonRateThrottle):
     """
     Rate limiting for registration endpoints.
     """
     scope = 'registration'
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, GCRARateThrottle):
+    """
+    Per-view limits from the view's throttle_scope (e.g. 'password_reset').
+    """
@@ -20,12 +20,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from user.social_views import GoogleLogin, AppleLogin # Import the views you just created
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-from core.views import HealthCheckView
+from core.views import CatalogBundleView, CatalogManifestView, HealthCheckView, MetricsView
 # Removed TokenRefreshView import - using custom ThrottledTokenRefreshView from user.urls instead
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health/', HealthCheckView.as_view(), name='health-check'),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/catalog/manifest/', CatalogManifestView.as_view(), name='catalog-manifest'),
+    path('api/catalog/<str:name>/<str:bundle_hash>/', CatalogBundleView.as_view(), name='catalog-bundle'),
     path('api/user/', include('user.urls')),
     path('api/workout/', include('workout.urls')),
     path('api/supplements/', include('supplements.urls')),
@@ -0,0 +1,218 @@
+"""
+Serializer-free rendering of completed workouts for the workout list.
+
+GetWorkoutSerializer builds a serializer per workout, exercise and set and
+walks every field through DRF's field machinery. For a page of read-only
+workouts render_workouts produces the same dicts (and so byte-identical JSON)
+from values() rows: one query per level, rows grouped by parent id, and a
+mapper per field taken once from the serializers themselves. Fields whose
+DRF representation of a database value is the value itself (ints, strings,
+booleans, choices, primary keys) are copied; datetimes and decimals keep the
+serializer field's to_representation.
+
+Insights (include_insights) are not rendered here; views that show them keep
+using the serializers. The parity test in workout/tests.py compares both
+paths and fails when a serializer field is added without a mapper here.
+
+The exercise history endpoints (1rm-history, set-history) have no serializer;
+their rows are read with values() through the joined workout instead of
+building a set, workout exercise and workout instance per row.
+"""
+from django.db.models import F
+from rest_framework import serializers
+
+from exercise.registry import get_exercise, serialized_exercise
+
+from .models import ExerciseSet, WorkoutExercise, WorkoutMuscleRecovery, exercise_cns_coefficient, set_cns_factor
+from .serializers import ExerciseSetSerializer, GetWorkoutSerializer, WorkoutExerciseSerializer, format_weight
+
+# Representation equals the database value
+_IDENTITY_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+# Fields the fast path computes itself, per serializer
+_COMPUTED = {
+    GetWorkoutSerializer: {
+        'exercises', 'total_volume', 'primary_muscles_worked', 'secondary_muscles_worked',
+        'muscle_recovery_pre_workout', 'cns_load',
+    },
+    WorkoutExerciseSerializer: {'exercise', 'sets'},
+    ExerciseSetSerializer: {'insights'},
+}
+
+# Representation overrides from the serializers' to_representation
+_OVERRIDES = {
+    ExerciseSetSerializer: {'weight': format_weight},
+}
+
+_mappers = {}
+
+
+def field_mappers(serializer_class):
+    """
+    (name, mapper, column) for each field the serializer outputs, in output order.
+    mapper is None for copied values; column is False for computed fields.
+    """
+    mappers = _mappers.get(serializer_class)
+    if mappers is None:
+        computed = _COMPUTED.get(serializer_class, set())
+        overrides = _OVERRIDES.get(serializer_class, {})
+        mappers = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                mappers.append((name, None, False))
+            elif name in overrides:
+                mappers.append((name, overrides[name], True))
+            elif isinstance(field, _IDENTITY_FIELDS):
+                mappers.append((name, None, True))
+            else:
+                mappers.append((name, field.to_representation, True))
+        mappers = _mappers[serializer_class] = tuple(mappers)
+    return mappers
+
+
+def columns(serializer_class):
+    """Model columns the serializer outputs, for values()."""
+    return [name for name, _, column in field_mappers(serializer_class) if column]
+
+
+def _render(row, mappers):
+    data = {}
+    for name, mapper, _ in mappers:
+        value = row[name]
+        if mapper is not None and value is not None:
+            value = mapper(value)
+        data[name] = value
+    return data
+
+
+def workout_values(queryset):
+    """The queryset's rows with the columns render_workouts needs."""
+    return queryset.values(*columns(GetWorkoutSerializer))
+
+
+def load_related(rows):
+    """
+    Exercises, sets and pre-workout recovery of the workout rows, grouped by
+    parent id, in the order the serializers' prefetches return them.
+    """
+    workout_ids = [row['id'] for row in rows]
+    exercises = {workout_id: [] for workout_id in workout_ids}
+    for row in WorkoutExercise.objects.filter(workout_id__in=workout_ids).values(
+        *columns(WorkoutExerciseSerializer), 'exercise_id'
+    ):
+        exercises[row['workout']].append(row)
+
+    sets = {row['id']: [] for workout_rows in exercises.values() for row in workout_rows}
+    for row in ExerciseSet.objects.filter(workout_exercise_id__in=list(sets)).values(
+        *columns(ExerciseSetSerializer)
+    ):
+        sets[row['workout_exercise']].append(row)
+
+    recovery = {workout_id: {} for workout_id in workout_ids}
+    for row in WorkoutMuscleRecovery.objects.filter(workout_id__in=workout_ids, condition='pre').values_list(
+        'workout_id', 'muscle_group', 'recovery_progress'
+    ):
+        recovery[row[0]][row[1]] = float(row[2])
+    return exercises, sets, recovery
+
+
+def render_loaded(rows, related):
+    """GetWorkoutSerializer(many=True).data for rows and their load_related() result."""
+    exercises, sets, recovery = related
+    workout_mappers = field_mappers(GetWorkoutSerializer)
+    exercise_mappers = field_mappers(WorkoutExerciseSerializer)
+    set_mappers = field_mappers(ExerciseSetSerializer)
+
+    results = []
+    for row in rows:
+        row = dict(row)
+        total_volume = 0
+        cns_load = 0.0
+        primary_muscles = set()
+        secondary_muscles = set()
+        rendered_exercises = []
+        for exercise_row in exercises[row['id']]:
+            exercise = get_exercise(exercise_row['exercise_id'])
+            if exercise and exercise.primary_muscle:
+                primary_muscles.add(exercise.primary_muscle)
+            if exercise and exercise.secondary_muscles:
+                secondary_muscles.update(muscle for muscle in exercise.secondary_muscles if muscle)
+
+            set_rows = sets[exercise_row['id']]
+            rendered_sets = []
+            cns_coefficient = exercise_cns_coefficient(exercise) if set_rows and not row['is_rest_day'] else None
+            for set_row in set_rows:
+                total_volume += float(set_row['weight']) * set_row['reps']
+                if cns_coefficient is not None and not set_row['is_warmup']:
+                    cns_load += set_cns_factor(set_row['reps_in_reserve']) * cns_coefficient
+                set_row['insights'] = None
+                rendered_sets.append(_render(set_row, set_mappers))
+
+            exercise_row['exercise'] = serialized_exercise(exercise_row['exercise_id'])
+            exercise_row['sets'] = rendered_sets
+            rendered_exercises.append(_render(exercise_row, exercise_mappers))
+
+        row['exercises'] = rendered_exercises
+        row['total_volume'] = round(total_volume, 2)
+        row['primary_muscles_worked'] = sorted(primary_muscles)
+        row['secondary_muscles_worked'] = sorted(secondary_muscles)
+        row['muscle_recovery_pre_workout'] = recovery[row['id']]
+        row['cns_load'] = 0.0 if row['is_rest_day'] else round(cns_load, 2)
+        results.append(_render(row, workout_mappers))
+    return results
+
+
+def render_workouts(rows):
+    """GetWorkoutSerializer(workouts, many=True).data for a page of workout_values() rows."""
+    rows = list(rows)
+    return render_loaded(rows, load_related(rows))
+
+
+def one_rep_max_history(queryset):
+    """The 1rm-history entries of a WorkoutExercise queryset, in its order."""
+    return [
+        {
+            'workout_id': row['workout_id'],
+            'workout_title': row['workout_title'],
+            'workout_date': row['workout_date'].isoformat(),
+            'one_rep_max': float(row['one_rep_max']) if row['one_rep_max'] else None,
+        }
+        for row in queryset.values(
+            'workout_id', 'one_rep_max', workout_title=F('workout__title'), workout_date=F('workout__datetime')
+        )
+    ]
+
+
+def set_history_values(queryset):
+    """An ExerciseSet queryset's rows with the columns render_set_history needs (paginate these)."""
+    return queryset.values(
+        'id', 'weight', 'reps', 'is_warmup', 'set_number',
+        workout_id=F('workout_exercise__workout_id'),
+        workout_title=F('workout_exercise__workout__title'),
+        workout_date=F('workout_exercise__workout__datetime'),
+    )
+
+
+def render_set_history(rows):
+    """The set-history entries of set_history_values() rows."""
+    return [
+        {
+            'id': row['id'],
+            'weight': float(row['weight']),
+            'reps': row['reps'],
+            'is_warmup': row['is_warmup'],
+            'set_number': row['set_number'],
+            'workout_id': row['workout_id'],
+            'workout_title': row['workout_title'],
+            'workout_date': row['workout_date'].isoformat(),
+        }
+        for row in rows
+    ]
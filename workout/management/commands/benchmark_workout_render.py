@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.synthetic import catalogs, seed_user_data
+from user.models import CustomUser
+from workout.fast_render import load_related, render_loaded, workout_values
+from workout.models import Workout
+from workout.serializers import GetWorkoutSerializer, workout_prefetches
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark rendering a page of the workout list with GetWorkoutSerializer against the values() fast '
+        'path in workout/fast_render.py. Seeds a synthetic user inside a transaction that is rolled back, '
+        'checks both paths produce the same JSON bytes and reports CPU time per page.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=20,
+            help='Workouts per rendered page'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Timed renders per path'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=120,
+            help='Days of synthetic history to seed'
+        )
+
+    def handle(self, *args, **options):
+        catalog = catalogs()
+        if not catalog[0]:
+            raise CommandError('No exercises found; run populate_exercises first')
+
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(email='benchmark-workout-render@example.com', password=None)
+            seed_user_data(user, seed='benchmark-render', days=options['days'], catalog=catalog)
+            page = Workout.objects.filter(user=user, is_done=True).order_by('-created_at')[:options['page_size']]
+
+            workouts = list(page.prefetch_related(*workout_prefetches()))
+            rows = list(workout_values(page))
+            related = load_related(rows)
+            sets = sum(len(set_rows) for set_rows in related[1].values())
+
+            serializer_json = JSONRenderer().render(GetWorkoutSerializer(workouts, many=True).data)
+            fast_json = JSONRenderer().render(render_loaded(rows, related))
+            if serializer_json != fast_json:
+                raise CommandError('Fast path output differs from GetWorkoutSerializer')
+
+            results = {
+                'serializer': self._run(lambda: GetWorkoutSerializer(workouts, many=True).data, options['iterations']),
+                'fast_path': self._run(lambda: render_loaded(rows, related), options['iterations']),
+            }
+            transaction.set_rollback(True)
+
+        for label, (p50, p95) in results.items():
+            self.stdout.write(f'{label:>10}: p50 {p50:7.2f}ms  p95 {p95:7.2f}ms CPU per page')
+        self.stdout.write(self.style.SUCCESS(
+            f"\nCompleted! Speedup: {results['serializer'][0] / results['fast_path'][0]:.1f}x at p50 for "
+            f'{len(rows)} workouts / {sets} sets per page ({len(fast_json)} identical bytes)'
+        ))
+
+    def _run(self, render, iterations):
+        durations = []
+        for _ in range(iterations):
+            started = time.process_time()
+            JSONRenderer().render(render())
+            durations.append((time.process_time() - started) * 1000)
+        return float(np.percentile(durations, 50)), float(np.percentile(durations, 95))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from user.models import CustomUser
+from workout.models import Workout
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark Workout.save() throughput (rest-timer style update_fields saves) with and '
+        'without dirty-field tracking. Runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--saves',
+            type=int,
+            default=2000,
+            help='Number of saves per run'
+        )
+
+    def handle(self, *args, **options):
+        saves = options['saves']
+
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(email='benchmark-workout-saves@example.com', password=None)
+            workout = Workout.objects.create(user=user, title='Benchmark Workout')
+
+            # Before: an instance without a load snapshot, so the pre_save
+            # receiver has to SELECT the row to detect completion
+            untracked = Workout.objects.get(pk=workout.pk)
+            before = self._run(untracked, saves, reset_snapshot=True)
+
+            # After: the instance's snapshot answers has_changed('is_done')
+            tracked = Workout.objects.get(pk=workout.pk)
+            after = self._run(tracked, saves, reset_snapshot=False)
+
+            transaction.set_rollback(True)
+
+        for label, (writes_per_second, queries) in (('untracked', before), ('tracked', after)):
+            self.stdout.write(
+                f'{label:>9}: {writes_per_second:,.0f} saves/s, {queries / saves:.2f} queries per save'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'\nCompleted! Speedup: {after[0] / before[0]:.2f}x over {saves} saves')
+        )
+
+    def _run(self, workout, saves, reset_snapshot):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for i in range(saves):
+                if reset_snapshot:
+                    workout.__dict__.pop('_loaded_values', None)
+                workout.rest_timer_paused_at = None if i % 2 else timezone.now()
+                workout.save(update_fields=['rest_timer_paused_at'])
+            elapsed = time.perf_counter() - started
+        return saves / elapsed, len(queries)
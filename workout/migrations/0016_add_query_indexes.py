@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('exercise', '0002_alter_exercise_image'),
+        ('workout', '0015_cnsrecovery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='musclerecovery',
+            index=models.Index(fields=['user', 'muscle_group', '-recovery_until'], name='workout_mus_user_id_039a74_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='workout',
+            index=models.Index(fields=['user', '-datetime'], name='workout_wor_user_id_249920_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='workout',
+            index=models.Index(fields=['user', '-created_at'], name='workout_wor_user_id_0eb2aa_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='workout',
+            index=models.Index(condition=models.Q(('is_done', False)), fields=['user'], name='workout_active_user_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='workoutexercise',
+            index=models.Index(fields=['exercise', 'workout'], name='workout_wor_exercis_ef18a1_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_local_date(apps, schema_editor):
+    Workout = apps.get_model('workout', 'Workout')
+    Preferences = apps.get_model('user', 'Preferences')
+
+    zones = {}
+    for user_id, name in Preferences.objects.values_list('user_id', 'timezone'):
+        try:
+            zones[user_id] = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    default = ZoneInfo(settings.TIME_ZONE)
+
+    # Batches by primary key; SQLite cannot update a table it is still iterating
+    last_id = 0
+    while True:
+        batch = list(Workout.objects.filter(id__gt=last_id).order_by('id').only('id', 'user_id', 'datetime')[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        for workout in batch:
+            workout.local_date = timezone.localtime(workout.datetime, zones.get(workout.user_id, default)).date()
+        Workout.objects.bulk_update(batch, ['local_date'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0016_add_query_indexes'),
+        ('user', '0011_preferences_timezone_weighthistory_local_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workout',
+            name='local_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_local_date, migrations.RunPython.noop),
+    ]
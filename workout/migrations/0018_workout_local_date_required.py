@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('workout', '0017_workout_local_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workout',
+            name='local_date',
+            field=models.DateField(),
+        ),
+        AddIndexConcurrently(
+            model_name='workout',
+            index=models.Index(fields=['user', 'local_date'], name='workout_wor_user_id_993132_idx'),
+        ),
+    ]
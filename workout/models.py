@@ -2,12 +2,77 @@ from django.db import models
 from django.utils import timezone
 import json
 
-from core.models import TimestampedModel
+from core.models import DirtyFieldsMixin, TimestampedModel
 # Create your models here.
 
 from user.models import CustomUser
+from user.timezones import local_date as to_local_date
 from exercise.models import Exercise
-class Workout(TimestampedModel):
+from exercise.registry import get_exercise
+
+# CNS Coefficient mapping based on exercise type and axial loading
+# Tier S (1.5-2.0): High axial load, heavy systemic stress
+# Tier A (1.2-1.4): Moderate axial load, compound movements
+# Tier B (1.0): Standard compound movements
+# Tier C (0.5): Isolation movements
+
+# Map exercise names to CNS coefficients (case-insensitive)
+CNS_COEFFICIENTS = {
+    # Tier S - Highest CNS cost
+    'deadlift': 2.0,
+    'squat': 1.8,
+    'rack pull': 1.8,
+    'trap bar deadlift': 1.7,
+    'sumo deadlift': 1.7,
+    
+    # Tier A - High CNS cost
+    'bench press': 1.3,
+    'overhead press': 1.4,
+    'barbell row': 1.3,
+    'pendlay row': 1.3,
+    'leg press': 1.2,
+    'front squat': 1.5,
+    'overhead squat': 1.6,
+    
+    # Tier B - Standard compounds (default 1.0)
+    # These will use category-based default
+    
+    # Tier C - Isolation (low CNS cost)
+    # These will use category-based default
+}
+
+
+def exercise_cns_coefficient(exercise):
+    """CNS cost of one working set of the exercise at RPE 10, relative to a standard compound."""
+    cns_coefficient = CNS_COEFFICIENTS.get(exercise.name.lower(), None)
+    
+    # If not in map, use category-based default
+    if cns_coefficient is None:
+        if exercise.category == 'compound':
+            # Check if it's a heavy compound (barbell-based)
+            if exercise.equipment_type in ['barbell', 'ez_bar']:
+                cns_coefficient = 1.2  # Tier A
+            else:
+                cns_coefficient = 1.0  # Tier B
+        elif exercise.category == 'isolation':
+            cns_coefficient = 0.5  # Tier C
+        else:
+            cns_coefficient = 0.3  # Cardio/stability - minimal CNS cost
+    return cns_coefficient
+
+
+def set_cns_factor(reps_in_reserve):
+    """RPE factor of a working set."""
+    # Calculate RPE from RIR: RPE = 10 - RIR
+    rir = reps_in_reserve if reps_in_reserve is not None else 0
+    rpe = max(1.0, min(10.0, 10.0 - rir))  # Clamp between 1-10
+    
+    # RPE impact is non-linear (exponential curve)
+    # RPE 10 -> 100 points, RPE 9 -> 81 points, RPE 8 -> 64 points
+    return (rpe ** 2) / 10.0
+
+
+class Workout(DirtyFieldsMixin, TimestampedModel):
     title = models.CharField(max_length=255)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     datetime = models.DateTimeField(default=timezone.now)  # When the workout actually happened (defaults to created_at if not specified)
@@ -18,8 +83,66 @@ class Workout(TimestampedModel):
     is_rest_day = models.BooleanField(default=False) ## is_rest_day marks the workout as a rest day but it still counts as a workout
     calories_burned = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True) ## calories burned during the workout
     rest_timer_paused_at = models.DateTimeField(null=True, blank=True) ## timestamp when rest timer was paused/halted
+    local_date = models.DateField() ## datetime's date in the user's timezone, kept in step with datetime on save
 ##    body_parts_worked = models.JSONField(default=list, blank=True, null=True) ## body_parts_worked is a json field that contains the body parts worked in the workout
+
+    class Meta:
+        indexes = [
+            # is_done filters compile to a bare boolean, which SQLite can't match to an index
+            # column; the per-user ordering carries the index and is_done is checked per row
+            models.Index(fields=['user', '-datetime']),  # completed and last-workout history
+            models.Index(fields=['user', '-created_at']),  # paginated workout list
+            models.Index(fields=['user'], condition=models.Q(is_done=False), name='workout_active_user_idx'),
+            models.Index(fields=['user', 'local_date']),  # calendar, stats and same-day checks
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'datetime' in update_fields:
+            if self.local_date is None or self.has_changed('datetime'):
+                self.local_date = to_local_date(self.user, self.datetime)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'local_date'}
+        super().save(*args, **kwargs)
     
+    @staticmethod
+    def calories_from_volume(total_volume_kg, compound_count, isolation_count):
+        """
+        Convert a workout's working volume into calories burned.
+        Shared by calculate_calories and the bulk recalculation in achievements.utils.
+        """
+        # Calculate calories using simplified volume-based formula
+        # The 0.007 constant for compound exercises already factors in:
+        # - Work calories (2.5-3 kcal per 1000kg)
+        # - Metabolic cost multiplier (2.5-3x for isometric, eccentric, rest periods)
+        # - Average rest for compound lifts
+        compound_ratio = compound_count / (compound_count + isolation_count) if (compound_count + isolation_count) > 0 else 0.5
+        
+        # Determine multiplier based on exercise type
+        # Compound exercises: 0.007 (includes work + metabolic cost + rest)
+        # Isolation exercises: 0.004 (lower metabolic cost, less EPOC)
+        if compound_ratio >= 0.7:
+            # Mostly compound exercises
+            calories_per_kg = 0.007
+        elif compound_ratio >= 0.4:
+            # Mixed - use weighted average
+            calories_per_kg = (compound_ratio * 0.007) + ((1 - compound_ratio) * 0.004)
+        else:
+            # Mostly isolation exercises
+            calories_per_kg = 0.004
+        
+        # Simple formula: Total Volume × Calories per kg
+        calories = total_volume_kg * calories_per_kg
+        
+        # Cap calories at reasonable maximum (e.g., 1500 calories for extreme workouts)
+        max_calories = 1500.0
+        calories = min(calories, max_calories)
+        
+        # Ensure minimum calories for any workout (at least 30 calories)
+        calories = max(calories, 30.0)
+        
+        return round(calories, 2)
+
     def calculate_calories(self):
         """
         Calculate calories burned using simplified volume-based formula for strength training.
@@ -51,7 +174,7 @@ class Workout(TimestampedModel):
             body_weight_kg = 70.0  # Default average body weight
         
         # Get all workout exercises with their sets
-        workout_exercises = WorkoutExercise.objects.filter(workout=self).select_related('exercise').prefetch_related('sets')
+        workout_exercises = WorkoutExercise.objects.filter(workout=self).prefetch_related('sets')
         
         if not workout_exercises.exists():
             # No exercises, return 0
@@ -71,7 +194,7 @@ class Workout(TimestampedModel):
         high_difficulty_exercises = ['deadlift', 'squat', 'thruster']  # Exercises with 1.2x multiplier
         
         for workout_exercise in workout_exercises:
-            exercise = workout_exercise.exercise
+            exercise = get_exercise(workout_exercise.exercise_id)
             sets = workout_exercise.sets.all()
             
             # Check if exercise is high difficulty
@@ -100,37 +223,7 @@ class Workout(TimestampedModel):
                 if exercise_set.rest_time_before_set:
                     total_rest_seconds += exercise_set.rest_time_before_set
         
-        # Calculate calories using simplified volume-based formula
-        # The 0.007 constant for compound exercises already factors in:
-        # - Work calories (2.5-3 kcal per 1000kg)
-        # - Metabolic cost multiplier (2.5-3x for isometric, eccentric, rest periods)
-        # - Average rest for compound lifts
-        compound_ratio = compound_count / (compound_count + isolation_count) if (compound_count + isolation_count) > 0 else 0.5
-        
-        # Determine multiplier based on exercise type
-        # Compound exercises: 0.007 (includes work + metabolic cost + rest)
-        # Isolation exercises: 0.004 (lower metabolic cost, less EPOC)
-        if compound_ratio >= 0.7:
-            # Mostly compound exercises
-            calories_per_kg = 0.007
-        elif compound_ratio >= 0.4:
-            # Mixed - use weighted average
-            calories_per_kg = (compound_ratio * 0.007) + ((1 - compound_ratio) * 0.004)
-        else:
-            # Mostly isolation exercises
-            calories_per_kg = 0.004
-        
-        # Simple formula: Total Volume × Calories per kg
-        calories = total_volume_kg * calories_per_kg
-        
-        # Cap calories at reasonable maximum (e.g., 1500 calories for extreme workouts)
-        max_calories = 1500.0
-        calories = min(calories, max_calories)
-        
-        # Ensure minimum calories for any workout (at least 30 calories)
-        calories = max(calories, 30.0)
-        
-        calories = round(calories, 2)
+        calories = self.calories_from_volume(total_volume_kg, compound_count, isolation_count)
         self.calories_burned = calories
         self.save(update_fields=['calories_burned'])
         return calories
@@ -169,7 +262,7 @@ class Workout(TimestampedModel):
         SMALL_MUSCLES = ['biceps', 'calves', 'traps', 'forearms', 'abs', 'obliques']
         
         # Get all workout exercises with sets
-        workout_exercises = WorkoutExercise.objects.filter(workout=self).select_related('exercise').prefetch_related('sets')
+        workout_exercises = WorkoutExercise.objects.filter(workout=self).prefetch_related('sets')
         
         # Dictionary to accumulate fatigue per muscle
         # Track: fatigue_score, sets, has_short_rest_compound, has_eccentric_emphasis, is_novel_exercise
@@ -180,7 +273,7 @@ class Workout(TimestampedModel):
         four_weeks_ago = workout_datetime - timezone.timedelta(weeks=4)
         
         for workout_exercise in workout_exercises:
-            exercise = workout_exercise.exercise
+            exercise = get_exercise(workout_exercise.exercise_id)
             sets = workout_exercise.sets.all()
             
             # Skip if no sets
@@ -190,7 +283,7 @@ class Workout(TimestampedModel):
             # Check if this exercise is novel (not done in 4+ weeks)
             # Check if this specific exercise was done recently
             recent_workout_exercises = WorkoutExercise.objects.filter(
-                exercise=exercise,
+                exercise_id=workout_exercise.exercise_id,
                 workout__user=self.user,
                 workout__datetime__gte=four_weeks_ago,
                 workout__datetime__lt=workout_datetime
@@ -383,64 +476,22 @@ class Workout(TimestampedModel):
         - 150-300: Moderate CNS impact (Recovery: ~48h)
         - > 300: High CNS impact (Recovery: ~72h+)
         """
-        # CNS Coefficient mapping based on exercise type and axial loading
-        # Tier S (1.5-2.0): High axial load, heavy systemic stress
-        # Tier A (1.2-1.4): Moderate axial load, compound movements
-        # Tier B (1.0): Standard compound movements
-        # Tier C (0.5): Isolation movements
-        
-        # Map exercise names to CNS coefficients (case-insensitive)
-        cns_coefficients_map = {
-            # Tier S - Highest CNS cost
-            'deadlift': 2.0,
-            'squat': 1.8,
-            'rack pull': 1.8,
-            'trap bar deadlift': 1.7,
-            'sumo deadlift': 1.7,
-            
-            # Tier A - High CNS cost
-            'bench press': 1.3,
-            'overhead press': 1.4,
-            'barbell row': 1.3,
-            'pendlay row': 1.3,
-            'leg press': 1.2,
-            'front squat': 1.5,
-            'overhead squat': 1.6,
-            
-            # Tier B - Standard compounds (default 1.0)
-            # These will use category-based default
-            
-            # Tier C - Isolation (low CNS cost)
-            # These will use category-based default
-        }
-        
         cns_load = 0.0
-        workout_exercises = WorkoutExercise.objects.filter(workout=self).select_related('exercise').prefetch_related('sets')
+        # Serializers prefetch sets (exercises come from the registry); only query when they did not
+        if 'workoutexercise_set' in getattr(self, '_prefetched_objects_cache', {}):
+            workout_exercises = self.workoutexercise_set.all()
+        else:
+            workout_exercises = WorkoutExercise.objects.filter(workout=self).prefetch_related('sets')
         
         for workout_exercise in workout_exercises:
-            exercise = workout_exercise.exercise
+            exercise = get_exercise(workout_exercise.exercise_id)
             sets = workout_exercise.sets.all()
             
             # Skip if no sets
-            if not sets.exists():
+            if not sets:
                 continue
             
-            # Get CNS coefficient for this exercise
-            exercise_name_lower = exercise.name.lower()
-            cns_coefficient = cns_coefficients_map.get(exercise_name_lower, None)
-            
-            # If not in map, use category-based default
-            if cns_coefficient is None:
-                if exercise.category == 'compound':
-                    # Check if it's a heavy compound (barbell-based)
-                    if exercise.equipment_type in ['barbell', 'ez_bar']:
-                        cns_coefficient = 1.2  # Tier A
-                    else:
-                        cns_coefficient = 1.0  # Tier B
-                elif exercise.category == 'isolation':
-                    cns_coefficient = 0.5  # Tier C
-                else:
-                    cns_coefficient = 0.3  # Cardio/stability - minimal CNS cost
+            cns_coefficient = exercise_cns_coefficient(exercise)
             
             # Calculate CNS load from all sets
             for exercise_set in sets:
@@ -448,16 +499,8 @@ class Workout(TimestampedModel):
                 if exercise_set.is_warmup:
                     continue
                 
-                # Calculate RPE from RIR: RPE = 10 - RIR
-                rir = exercise_set.reps_in_reserve if exercise_set.reps_in_reserve is not None else 0
-                rpe = max(1.0, min(10.0, 10.0 - rir))  # Clamp between 1-10
-                
-                # RPE impact is non-linear (exponential curve)
-                # RPE 10 -> 100 points, RPE 9 -> 81 points, RPE 8 -> 64 points
-                rpe_factor = (rpe ** 2) / 10.0
-                
                 # Add to total CNS load
-                cns_load += (rpe_factor * cns_coefficient)
+                cns_load += set_cns_factor(exercise_set.reps_in_reserve) * cns_coefficient
         
         return round(cns_load, 2)
 
@@ -510,6 +553,9 @@ class WorkoutExercise(TimestampedModel):
     one_rep_max = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)  # Calculated 1RM from sets
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['exercise', 'workout']),  # per-exercise history across a user's workouts
+        ]
 
 # workout/models.py - ExerciseSet
 class ExerciseSet(TimestampedModel):
@@ -616,6 +662,9 @@ class MuscleRecovery(TimestampedModel):
     class Meta:
         ordering = ['-recovery_until']
         unique_together = [['user', 'muscle_group', 'source_workout']]  # One recovery record per muscle per workout
+        indexes = [
+            models.Index(fields=['user', 'muscle_group', '-recovery_until']),  # latest record per muscle
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.muscle_group} - {self.recovery_hours}h"
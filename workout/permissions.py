@@ -3,6 +3,7 @@ PRO subscription permission utilities
 """
 from rest_framework.response import Response
 from rest_framework import status
+from datetime import datetime, timezone as dt_timezone
 from django.utils import timezone
 
 
@@ -31,6 +32,45 @@ def require_pro(view_func):
     return wrapper
 
 
+class Entitlements:
+    """PRO and trial status of a user at the time it was resolved."""
+
+    def __init__(self, is_pro, pro_until, trial_until):
+        now = timezone.now()
+        self.source = (is_pro, pro_until, trial_until)
+        self.pro_until = pro_until
+        self.trial_until = trial_until
+        self.is_trial = trial_until is not None and now <= trial_until
+        self.is_paid_pro = bool(is_pro) and (pro_until is None or now <= pro_until)
+        self.is_pro = self.is_trial or self.is_paid_pro
+
+
+def get_entitlements(user):
+    """
+    Resolve a user's entitlements once per request.
+    Uses the claims embedded in the access token when the request was
+    authenticated with one (see user/tokens.py), the user's fields otherwise.
+    Lapsed subscriptions simply read as inactive; the expire_subscriptions
+    command clears is_pro in the database.
+    """
+    claims = getattr(user, 'entitlement_claims', None)
+    if claims is not None:
+        source = (
+            claims['is_pro'],
+            datetime.fromtimestamp(claims['pro_until'], tz=dt_timezone.utc) if claims['pro_until'] else None,
+            datetime.fromtimestamp(claims['trial_until'], tz=dt_timezone.utc) if claims['trial_until'] else None,
+        )
+    else:
+        source = (user.is_pro, user.pro_until, user.trial_until)
+
+    # Memoized on the user object; recomputed if the underlying values change
+    entitlements = getattr(user, '_entitlements', None)
+    if entitlements is None or entitlements.source != source:
+        entitlements = Entitlements(*source)
+        user._entitlements = entitlements
+    return entitlements
+
+
 def is_pro_user(user):
     """
     Check if user has active PRO subscription OR free trial.
@@ -38,23 +78,7 @@ def is_pro_user(user):
     """
     if not user.is_authenticated:
         return False
-    
-    # Check free trial first
-    if user.trial_until and timezone.now() <= user.trial_until:
-        return True
-    
-    # Check paid PRO subscription
-    if not user.is_pro:
-        return False
-    
-    # Check if PRO subscription has expired
-    if user.pro_until and timezone.now() > user.pro_until:
-        # Subscription expired, update user
-        user.is_pro = False
-        user.save(update_fields=['is_pro'])
-        return False
-    
-    return True
+    return get_entitlements(user).is_pro
 
 
 def is_paid_pro_user(user):
@@ -64,18 +88,7 @@ def is_paid_pro_user(user):
     """
     if not user.is_authenticated:
         return False
-    
-    if not user.is_pro:
-        return False
-    
-    # Check if PRO subscription has expired
-    if user.pro_until and timezone.now() > user.pro_until:
-        # Subscription expired, update user
-        user.is_pro = False
-        user.save(update_fields=['is_pro'])
-        return False
-    
-    return True
+    return get_entitlements(user).is_paid_pro
 
 
 def is_trial_user(user):
@@ -85,15 +98,7 @@ def is_trial_user(user):
     """
     if not user.is_authenticated:
         return False
-    
-    if not user.trial_until:
-        return False
-    
-    # Check if trial has expired
-    if timezone.now() > user.trial_until:
-        return False
-    
-    return True
+    return get_entitlements(user).is_trial
 
 
 def get_pro_response():
@@ -118,17 +123,18 @@ def get_pro_days_remaining(user):
     if not user.is_authenticated:
         return None
     
-    if not user.pro_until:
+    pro_until = get_entitlements(user).pro_until
+    if not pro_until:
         return None
     
     now = timezone.now()
     
     # If already expired, return 0
-    if now > user.pro_until:
+    if now > pro_until:
         return 0
     
     # Calculate days remaining
-    delta = user.pro_until - now
+    delta = pro_until - now
     days_remaining = delta.days
     
     # If less than 1 day but still in future, return 0 (will expire today)
@@ -148,17 +154,18 @@ def get_trial_days_remaining(user):
     if not user.is_authenticated:
         return None
     
-    if not user.trial_until:
+    trial_until = get_entitlements(user).trial_until
+    if not trial_until:
         return None
     
     now = timezone.now()
     
     # If already expired, return 0
-    if now > user.trial_until:
+    if now > trial_until:
         return 0
     
     # Calculate days remaining
-    delta = user.trial_until - now
+    delta = trial_until - now
     days_remaining = delta.days
     
     # If less than 1 day but still in future, return 0 (will expire today)
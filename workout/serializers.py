@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from django.db.models import Prefetch
 from .models import Workout, WorkoutExercise, ExerciseSet, TemplateWorkout, TemplateWorkoutExercise, TrainingResearch, MuscleRecovery, WorkoutMuscleRecovery, CNSRecovery
 from django.utils import timezone
 from datetime import datetime
-from exercise.serializers import ExerciseSerializer
 from exercise.models import Exercise
+from exercise.registry import get_exercise, serialized_exercise
+from user.timezones import local_date
 
 class CreateWorkoutSerializer(serializers.ModelSerializer):
     workout_date = serializers.DateTimeField(required=False, write_only=True)  # Accept datetime
@@ -37,12 +39,12 @@ class CreateWorkoutSerializer(serializers.ModelSerializer):
                 workout_datetime = timezone.make_aware(workout_datetime)
             # Set the datetime field
             validated_data['datetime'] = workout_datetime
-            workout_date = workout_datetime.date()
+            workout_date = local_date(user, workout_datetime)
         else:
             # If not provided, use current time (will be same as created_at)
             current_time = timezone.now()
             validated_data['datetime'] = current_time
-            workout_date = current_time.date()
+            workout_date = local_date(user, current_time)
         
         # Handle title logic
         if is_rest_day:
@@ -111,11 +113,14 @@ def calculate_set_insights(exercise_set, exercise, workout_exercise=None):
         # Junk volume check: Sets 3+ on compound exercises tax CNS without much benefit
         if workout_exercise:
             # Count non-warmup sets for this exercise
-            non_warmup_sets = workout_exercise.sets.filter(is_warmup=False).order_by('set_number')
-            total_non_warmup_sets = non_warmup_sets.count()
+            # (from the prefetched sets when the caller prefetched them)
+            non_warmup_set_ids = [
+                s.id for s in sorted(workout_exercise.sets.all(), key=lambda s: s.set_number) if not s.is_warmup
+            ]
+            total_non_warmup_sets = len(non_warmup_set_ids)
             
             # Get the position of this set among non-warmup sets (1-indexed)
-            set_position = list(non_warmup_sets.values_list('id', flat=True)).index(exercise_set.id) + 1
+            set_position = non_warmup_set_ids.index(exercise_set.id) + 1
             
             # If more than 2 sets and this is set 3 or higher
             if total_non_warmup_sets > 2 and set_position > 2:
@@ -176,6 +181,14 @@ def calculate_set_insights(exercise_set, exercise, workout_exercise=None):
     
     return insights
 
+def format_weight(weight):
+    """Whole weights as int, others as float (100.00 -> 100, 102.50 -> 102.5)."""
+    weight_float = float(weight)
+    # If it's a whole number, return as int
+    if weight_float == int(weight_float):
+        return int(weight_float)
+    return weight_float
+
 class ExerciseSetSerializer(serializers.ModelSerializer):
     reps = serializers.IntegerField(min_value=0, max_value=100)
     reps_in_reserve = serializers.IntegerField(min_value=0, max_value=100)
@@ -196,12 +209,7 @@ class ExerciseSetSerializer(serializers.ModelSerializer):
         
         # Format weight field
         if 'weight' in representation and representation['weight'] is not None:
-            weight_float = float(representation['weight'])
-            # If it's a whole number, return as int
-            if weight_float == int(weight_float):
-                representation['weight'] = int(weight_float)
-            else:
-                representation['weight'] = weight_float
+            representation['weight'] = format_weight(representation['weight'])
         
         return representation
     
@@ -212,15 +220,30 @@ class ExerciseSetSerializer(serializers.ModelSerializer):
         
         # Get the exercise from the workout exercise
         workout_exercise = obj.workout_exercise
-        exercise = workout_exercise.exercise if workout_exercise else None
+        exercise = get_exercise(workout_exercise.exercise_id) if workout_exercise else None
         
         insights = calculate_set_insights(obj, exercise, workout_exercise)
         # Always return dict format (even if empty) when insights are enabled
         return insights if insights else {'good': {}, 'bad': {}}
 
+class ExerciseIdField(serializers.PrimaryKeyRelatedField):
+    """Checks exercise ids against the exercise registry instead of querying Exercise."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if get_exercise(pk) is None:
+            self.fail('does_not_exist', pk_value=data)
+        # Only the id is loaded; other fields are fetched if something reads them
+        return Exercise.from_db(Exercise.objects.db, ['id'], [pk])
+
 class WorkoutExerciseSerializer(serializers.ModelSerializer):
     # Accept exercise as ID when writing, return full object when reading
-    exercise = serializers.PrimaryKeyRelatedField(queryset=Exercise.objects.all())
+    exercise = ExerciseIdField(queryset=Exercise.objects.all())
     # Add this line to fetch related sets
     sets = serializers.SerializerMethodField() 
     
@@ -243,9 +266,9 @@ class WorkoutExerciseSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         # Override to return full exercise object instead of just ID
         representation = super().to_representation(instance)
-        # Replace exercise ID with full exercise object
-        if instance.exercise:
-            representation['exercise'] = ExerciseSerializer(instance.exercise).data
+        # Replace exercise ID with full exercise object (serialized once per process by the registry)
+        if instance.exercise_id:
+            representation['exercise'] = serialized_exercise(instance.exercise_id)
         return representation
 
 class UpdateWorkoutSerializer(serializers.ModelSerializer):
@@ -277,6 +300,18 @@ class WorkoutMuscleRecoverySerializer(serializers.ModelSerializer):
         fields = ['muscle_group', 'condition', 'recovery_progress', 'created_at']
         read_only_fields = ['created_at']
 
+def workout_prefetches():
+    """Everything GetWorkoutSerializer reads, so a page of workouts costs a fixed number of queries."""
+    # Exercises come from the exercise registry, not a join
+    return (
+        'workoutexercise_set__sets',
+        Prefetch(
+            'muscle_recovery_records',
+            queryset=WorkoutMuscleRecovery.objects.filter(condition='pre'),
+            to_attr='pre_workout_recovery'
+        ),
+    )
+
 class GetWorkoutSerializer(serializers.ModelSerializer):
     # Add this field to fetch related exercises
     # Note: 'workoutexercise_set' is the default related name. 
@@ -318,7 +353,7 @@ class GetWorkoutSerializer(serializers.ModelSerializer):
         # Use prefetched data instead of new query
         primary_muscles = set()
         for workout_exercise in obj.workoutexercise_set.all():
-            exercise = workout_exercise.exercise
+            exercise = get_exercise(workout_exercise.exercise_id)
             if exercise and exercise.primary_muscle:
                 primary_muscles.add(exercise.primary_muscle)
         return sorted(list(primary_muscles))
@@ -328,7 +363,7 @@ class GetWorkoutSerializer(serializers.ModelSerializer):
         # Use prefetched data instead of new query
         secondary_muscles = set()
         for workout_exercise in obj.workoutexercise_set.all():
-            exercise = workout_exercise.exercise
+            exercise = get_exercise(workout_exercise.exercise_id)
             if exercise and exercise.secondary_muscles:
                 for muscle in exercise.secondary_muscles:
                     if muscle:
@@ -337,17 +372,15 @@ class GetWorkoutSerializer(serializers.ModelSerializer):
     
     def get_muscle_recovery_pre_workout(self, obj):
         """Get pre-workout muscle recovery data for this workout"""
-        pre_recovery = WorkoutMuscleRecovery.objects.filter(
-            workout=obj,
-            condition='pre'
-        )
-        if pre_recovery.exists():
-            # Convert to dict format: {muscle_group: recovery_progress}
-            recovery_dict = {}
-            for record in pre_recovery:
-                recovery_dict[record.muscle_group] = float(record.recovery_progress)
-            return recovery_dict
-        return {}
+        # Views prefetch these into pre_workout_recovery (see workout_prefetches)
+        pre_recovery = getattr(obj, 'pre_workout_recovery', None)
+        if pre_recovery is None:
+            pre_recovery = WorkoutMuscleRecovery.objects.filter(
+                workout=obj,
+                condition='pre'
+            )
+        # Convert to dict format: {muscle_group: recovery_progress}
+        return {record.muscle_group: float(record.recovery_progress) for record in pre_recovery}
     
     def get_cns_load(self, obj):
         """Calculate and return CNS (Central Nervous System) load for this workout"""
@@ -356,13 +389,16 @@ class GetWorkoutSerializer(serializers.ModelSerializer):
         return obj.calculate_cns_load()
 
 class TemplateWorkoutExerciseSerializer(serializers.ModelSerializer):
-    exercise = ExerciseSerializer(read_only=True)
+    exercise = serializers.SerializerMethodField()
     
     class Meta:
         model = TemplateWorkoutExercise
         fields = ['id', 'exercise', 'order']
         read_only_fields = ['id']
 
+    def get_exercise(self, obj):
+        return serialized_exercise(obj.exercise_id)
+
 class CreateTemplateWorkoutSerializer(serializers.ModelSerializer):
     exercises = serializers.ListField(
         child=serializers.IntegerField(),
@@ -387,16 +423,13 @@ class CreateTemplateWorkoutSerializer(serializers.ModelSerializer):
         
         # Add exercises with order
         for order, exercise_id in enumerate(exercise_ids, start=1):
-            from exercise.models import Exercise
-            try:
-                exercise = Exercise.objects.get(id=exercise_id)
-                TemplateWorkoutExercise.objects.create(
-                    template_workout=template_workout,
-                    exercise=exercise,
-                    order=order
-                )
-            except Exercise.DoesNotExist:
+            if get_exercise(exercise_id) is None:
                 continue  # Skip invalid exercise IDs
+            TemplateWorkoutExercise.objects.create(
+                template_workout=template_workout,
+                exercise_id=exercise_id,
+                order=order
+            )
         
         return template_workout
 
@@ -412,20 +445,20 @@ class GetTemplateWorkoutSerializer(serializers.ModelSerializer):
     
     def get_primary_muscle_groups(self, obj):
         """Get unique primary muscle groups from all exercises"""
-        template_exercises = TemplateWorkoutExercise.objects.filter(template_workout=obj).select_related('exercise')
+        template_exercises = obj.templateworkoutexercise_set.all()
         primary_muscles = set()
         for template_exercise in template_exercises:
-            exercise = template_exercise.exercise
+            exercise = get_exercise(template_exercise.exercise_id)
             if exercise.primary_muscle:
                 primary_muscles.add(exercise.primary_muscle)
         return sorted(list(primary_muscles))
     
     def get_secondary_muscle_groups(self, obj):
         """Get unique secondary muscle groups from all exercises"""
-        template_exercises = TemplateWorkoutExercise.objects.filter(template_workout=obj).select_related('exercise')
+        template_exercises = obj.templateworkoutexercise_set.all()
         secondary_muscles = set()
         for template_exercise in template_exercises:
-            exercise = template_exercise.exercise
+            exercise = get_exercise(template_exercise.exercise_id)
             if exercise.secondary_muscles:
                 for muscle in exercise.secondary_muscles:
                     if muscle:
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.conditional import touch_user_data, touch_user_data_of
+
+from .models import ExerciseSet, Workout, WorkoutExercise, WorkoutMuscleRecovery
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def workout_changed(sender, instance, **kwargs):
+    """New data version (and so new ETags) for the owner whenever their workouts change."""
+    touch_user_data(instance.user_id)
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+@receiver(post_save, sender=WorkoutMuscleRecovery)
+@receiver(post_delete, sender=WorkoutMuscleRecovery)
+def workout_part_changed(sender, instance, **kwargs):
+    touch_user_data_of(Workout, instance.workout_id, 'user_id')
+
+
+@receiver(post_save, sender=ExerciseSet)
+@receiver(post_delete, sender=ExerciseSet)
+def exercise_set_changed(sender, instance, **kwargs):
+    touch_user_data_of(WorkoutExercise, instance.workout_exercise_id, 'workout__user_id')
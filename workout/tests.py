@@ -66,3 +66,182 @@ class WorkoutTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         workout.refresh_from_db()
         self.assertTrue(workout.is_done)
+
+    def test_workout_dirty_field_tracking(self):
+        """Test that loaded workouts track changes and save without a pre-save SELECT"""
+        from achievements.models import OutboxEvent
+
+        Workout.objects.create(user=self.user, title='Test Workout')
+        workout = Workout.objects.get(user=self.user)
+        self.assertFalse(workout.has_changed('is_done'))
+
+        workout.rest_timer_paused_at = timezone.now()
+        self.assertEqual(workout.changed_fields(), ['rest_timer_paused_at'])
+        with self.assertNumQueries(1):
+            workout.save(update_fields=['rest_timer_paused_at'])
+        self.assertFalse(workout.has_changed('rest_timer_paused_at'))
+
+        workout.is_done = True
+        self.assertTrue(workout.has_changed('is_done'))
+        self.assertFalse(workout.previous_value('is_done'))
+        workout.save()
+        self.assertTrue(OutboxEvent.objects.filter(idempotency_key=f'workout_completed:{workout.id}').exists())
+
+    def test_local_date_follows_user_timezone(self):
+        """Test workouts are dated and bucketed in the user's timezone, not the server's"""
+        from datetime import datetime, timezone as dt_timezone
+
+        response = self.client.post('/api/user/timezone/', {'timezone': 'Not/AZone'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/user/timezone/', {'timezone': 'Asia/Tokyo'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+
+        # 20:00 UTC on March 1st is already March 2nd in Tokyo
+        evening = datetime(2026, 3, 1, 20, 0, tzinfo=dt_timezone.utc)
+        workout = Workout.objects.create(user=self.user, title='Late', datetime=evening, is_done=True)
+        self.assertEqual(workout.local_date.isoformat(), '2026-03-02')
+
+        response = self.client.get('/api/workout/calendar/', {'year': 2026, 'month': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        worked = [day['date'] for day in response.data['calendar'] if day['has_workout']]
+        self.assertEqual(worked, ['2026-03-02'])
+
+        # Moving the workout moves its local date; saves that leave datetime alone don't recompute it
+        workout = Workout.objects.get(pk=workout.pk)
+        workout.datetime = evening.replace(hour=10)
+        workout.save(update_fields=['datetime'])
+        workout.refresh_from_db()
+        self.assertEqual(workout.local_date.isoformat(), '2026-03-01')
+        with self.assertNumQueries(1):
+            workout.save(update_fields=['notes'])
+
+        # A rest day cannot be created on the local date that already has the workout
+        response = self.client.post('/api/workout/create/', {
+            'is_rest_day': True, 'date': '2026-03-01T14:00:00Z'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'WORKOUT_EXISTS_FOR_DATE')
+
+
+class WorkoutFastRenderTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        import io
+        from decimal import Decimal
+        from django.core.management import call_command
+        from core.synthetic import seed_user_data
+        from .models import WorkoutMuscleRecovery
+
+        call_command('populate_exercises', stdout=io.StringIO())
+        cls.user = User.objects.create_user(email='lifter@example.com', password='testpass123')
+        seed_user_data(cls.user, seed='fast-render', days=60)
+
+        # Shapes the synthetic history may not cover
+        Workout.objects.create(user=cls.user, title='Rest Day', is_done=True, is_rest_day=True)
+        Workout.objects.create(user=cls.user, title='Empty', is_done=True, notes='no exercises')
+        workout = Workout.objects.create(
+            user=cls.user, title='Odd weights', is_done=True, calories_burned=Decimal('312.50'), intensity='high'
+        )
+        workout_exercise = WorkoutExercise.objects.create(
+            workout=workout, exercise=Exercise.objects.filter(category='compound').first(), order=1,
+            one_rep_max=Decimal('143.33')
+        )
+        for number, weight, warmup, rir in [(1, '60.00', True, 5), (2, '102.50', False, 2), (3, '100.25', False, None)]:
+            ExerciseSet.objects.create(
+                workout_exercise=workout_exercise, set_number=number, reps=5, weight=Decimal(weight),
+                is_warmup=warmup, reps_in_reserve=rir or 0, total_tut=None if warmup else 20,
+            )
+        for muscle, progress in [('quads', '87.50'), ('glutes', '100.00')]:
+            WorkoutMuscleRecovery.objects.create(
+                user=cls.user, workout=workout, muscle_group=muscle, condition='pre', recovery_progress=Decimal(progress)
+            )
+
+    def test_fast_path_matches_serializer_bytes(self):
+        """Test the values() fast path renders byte-identical JSON to GetWorkoutSerializer"""
+        from rest_framework.renderers import JSONRenderer
+        from .fast_render import render_workouts, workout_values
+        from .serializers import GetWorkoutSerializer, workout_prefetches
+
+        workouts = Workout.objects.filter(user=self.user, is_done=True).order_by('-created_at')
+        self.assertGreater(workouts.count(), 10)
+        golden = JSONRenderer().render(GetWorkoutSerializer(workouts.prefetch_related(*workout_prefetches()), many=True).data)
+        with self.assertNumQueries(4):
+            fast = JSONRenderer().render(render_workouts(workout_values(workouts)))
+        self.assertEqual(fast, golden)
+
+        # The list endpoint serves the fast path
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get('/api/workout/list/', {'page_size': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page = GetWorkoutSerializer(workouts[:5].prefetch_related(*workout_prefetches()), many=True).data
+        self.assertEqual(JSONRenderer().render(response.data['results']), JSONRenderer().render(page))
+
+    def test_history_endpoints_match_instance_rendering(self):
+        """Test 1rm-history and set-history render the same JSON from values() rows as from model instances"""
+        from rest_framework.renderers import JSONRenderer
+
+        from decimal import Decimal
+        from django.db.models import Count
+
+        exercise_id = WorkoutExercise.objects.filter(workout__user=self.user).values('exercise_id').annotate(
+            workouts=Count('id')
+        ).order_by('-workouts').values_list('exercise_id', flat=True).first()
+        # The importer leaves one_rep_max to the workout metrics; give the history something to show
+        WorkoutExercise.objects.filter(exercise_id=exercise_id).update(one_rep_max=Decimal('121.67'))
+        # PRO, so the synthetic history is not cut to the FREE 30-day window
+        from datetime import timedelta
+        User.objects.filter(pk=self.user.pk).update(is_pro=True, pro_until=timezone.now() + timedelta(days=30))
+        self.user.refresh_from_db()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        workout_exercises = WorkoutExercise.objects.filter(
+            exercise_id=exercise_id, workout__user=self.user, workout__is_done=True, one_rep_max__isnull=False
+        ).select_related('workout').order_by('-workout__datetime')
+        golden = [
+            {
+                'workout_id': workout_exercise.workout.id,
+                'workout_title': workout_exercise.workout.title,
+                'workout_date': workout_exercise.workout.datetime.isoformat(),
+                'one_rep_max': float(workout_exercise.one_rep_max) if workout_exercise.one_rep_max else None,
+            }
+            for workout_exercise in workout_exercises
+        ]
+        response = client.get(f'/api/workout/exercise/{exercise_id}/1rm-history/')
+        self.assertTrue(response.data['is_pro'])
+        self.assertGreater(len(golden), 1)
+        self.assertEqual(JSONRenderer().render(response.data['history']), JSONRenderer().render(golden))
+
+        sets = ExerciseSet.objects.filter(
+            workout_exercise__exercise_id=exercise_id, workout_exercise__workout__user=self.user,
+            workout_exercise__workout__is_done=True
+        ).select_related('workout_exercise__workout').order_by('-workout_exercise__workout__datetime', '-set_number')
+        golden = [
+            {
+                'id': exercise_set.id,
+                'weight': float(exercise_set.weight),
+                'reps': exercise_set.reps,
+                'is_warmup': exercise_set.is_warmup,
+                'set_number': exercise_set.set_number,
+                'workout_id': exercise_set.workout_exercise.workout.id,
+                'workout_title': exercise_set.workout_exercise.workout.title,
+                'workout_date': exercise_set.workout_exercise.workout.datetime.isoformat(),
+            }
+            for exercise_set in sets[:20]
+        ]
+        self.assertGreater(len(golden), 5)
+        response = client.get(f'/api/workout/exercise/{exercise_id}/set-history/')
+        self.assertEqual(response.data['count'], sets.count())
+        self.assertEqual(JSONRenderer().render(response.data['results']), JSONRenderer().render(golden))
+
+    def test_benchmark_command(self):
+        """Test the render benchmark checks parity and reports both paths"""
+        import io
+        from django.core.management import call_command
+
+        output = io.StringIO()
+        call_command('benchmark_workout_render', iterations=2, days=14, stdout=output)
+        self.assertIn('fast_path', output.getvalue())
+        self.assertIn('Speedup', output.getvalue())
@@ -5,10 +5,11 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils import timezone
 from datetime import datetime, timedelta
 from collections import defaultdict
 from exercise.models import Exercise
+from exercise.registry import get_exercise
+from user.timezones import local_today
 from ..models import Workout, WorkoutExercise, WorkoutMuscleRecovery
 from ..permissions import is_pro_user
 
@@ -54,7 +55,7 @@ class VolumeAnalysisView(APIView):
             except ValueError:
                 return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         else:
-            end_date = timezone.now().date()
+            end_date = local_today(request.user)
             days_since_monday = end_date.weekday()
             current_monday = end_date - timedelta(days=days_since_monday)
             start_date = current_monday - timedelta(weeks=weeks_back)
@@ -63,10 +64,9 @@ class VolumeAnalysisView(APIView):
             user=request.user,
             is_done=True,
             is_rest_day=False,
-            datetime__date__gte=start_date,
-            datetime__date__lte=end_date
-        ).select_related().prefetch_related(
-            'workoutexercise_set__exercise',
+            local_date__gte=start_date,
+            local_date__lte=end_date
+        ).prefetch_related(
             'workoutexercise_set__sets'
         ).order_by('datetime')
         
@@ -75,14 +75,14 @@ class VolumeAnalysisView(APIView):
         all_muscle_groups = [choice[0] for choice in Exercise.MUSCLE_GROUPS]
         
         for workout in workouts:
-            workout_date = workout.datetime.date() if workout.datetime else workout.created_at.date()
+            workout_date = workout.local_date
             
             days_since_monday = workout_date.weekday()
             week_monday = workout_date - timedelta(days=days_since_monday)
             week_key = week_monday.isoformat()
             
             for workout_exercise in workout.workoutexercise_set.all():
-                exercise = workout_exercise.exercise
+                exercise = get_exercise(workout_exercise.exercise_id)
                 sets = workout_exercise.sets.all()
                 
                 for exercise_set in sets:
@@ -208,13 +208,13 @@ class WorkoutSummaryView(APIView):
         for record in pre_recovery:
             pre_recovery_dict[record.muscle_group] = float(record.recovery_progress)
         
-        workout_exercises = WorkoutExercise.objects.filter(workout=workout).select_related('exercise')
+        workout_exercises = WorkoutExercise.objects.filter(workout=workout)
         
         muscles_worked = set()
         exercise_1rm_data = {}
         
         for workout_exercise in workout_exercises:
-            exercise = workout_exercise.exercise
+            exercise = get_exercise(workout_exercise.exercise_id)
             if exercise.primary_muscle:
                 muscles_worked.add(exercise.primary_muscle)
             if exercise.secondary_muscles:
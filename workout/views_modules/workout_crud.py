@@ -9,9 +9,14 @@ from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from datetime import datetime, time
 from django.core.cache import cache
+from django.db import transaction
 import logging
+from core.conditional import ConditionalGetMixin, user_data_version
+from exercise.registry import get_registry
+from user.timezones import local_date, local_today, user_timezone
 from ..models import Workout, WorkoutExercise
-from ..serializers import CreateWorkoutSerializer, GetWorkoutSerializer, UpdateWorkoutSerializer
+from ..serializers import CreateWorkoutSerializer, GetWorkoutSerializer, UpdateWorkoutSerializer, workout_prefetches
+from ..fast_render import render_workouts, workout_values
 from ..utils import (
     get_current_recovery_progress,
     create_workout_muscle_recovery,
@@ -32,7 +37,9 @@ class CreateWorkoutView(APIView):
     permission_classes = [IsAuthenticated]
    
     def post(self, request):
-        active_workout = Workout.objects.filter(user=request.user, is_done=False).first()
+        active_workout = Workout.objects.filter(user=request.user, is_done=False).prefetch_related(
+            *workout_prefetches()
+        ).first()
         
         is_rest_day = request.data.get('is_rest_day', False)
         new_workout_is_done = request.data.get('is_done', False)
@@ -50,20 +57,20 @@ class CreateWorkoutView(APIView):
                     
                     if timezone.is_naive(workout_datetime):
                         workout_datetime = timezone.make_aware(workout_datetime)
-                    workout_date = workout_datetime.date()
+                    workout_date = local_date(request.user, workout_datetime)
                 else:
                     from django.utils.dateparse import parse_date
                     workout_date = parse_date(workout_datetime_str)
             except (ValueError, TypeError):
                 pass
         else:
-            workout_date = timezone.now().date()
+            workout_date = local_today(request.user)
         
         if workout_date:
             if is_rest_day:
                 existing_workout = Workout.objects.filter(
                     user=request.user,
-                    datetime__date=workout_date
+                    local_date=workout_date
                 ).first()
                 
                 if existing_workout:
@@ -74,7 +81,7 @@ class CreateWorkoutView(APIView):
             else:
                 existing_rest_day = Workout.objects.filter(
                     user=request.user,
-                    datetime__date=workout_date,
+                    local_date=workout_date,
                     is_rest_day=True
                 ).first()
                 
@@ -94,7 +101,7 @@ class CreateWorkoutView(APIView):
         if active_workout and new_workout_is_done and not is_rest_day:
             if workout_date:
                 try:
-                    workout_datetime = timezone.make_aware(datetime.combine(workout_date, time.min))
+                    workout_datetime = timezone.make_aware(datetime.combine(workout_date, time.min), user_timezone(request.user))
                     active_workout_datetime = getattr(active_workout, 'datetime', active_workout.created_at)
                     
                     if workout_datetime and workout_datetime > active_workout_datetime:
@@ -118,16 +125,18 @@ class CreateWorkoutView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class GetWorkoutView(APIView):
+class GetWorkoutView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = WorkoutPagination
+
+    def get_etag_parts(self, request, workout_id=None):
+        return user_data_version(request.user.id), get_registry().digest
     
     def get(self, request, workout_id=None):
         if workout_id:
             try:
                 workout = Workout.objects.select_related('user').prefetch_related(
-                    'workoutexercise_set__exercise',
-                    'workoutexercise_set__sets'
+                    *workout_prefetches()
                 ).get(id=workout_id, user=request.user)
                 serializer = GetWorkoutSerializer(workout, context={'include_insights': True})
                 logger.info(f"User {request.user.email} retrieved workout {workout_id}")
@@ -145,23 +154,21 @@ class GetWorkoutView(APIView):
             should_cache = page == 1
             
             if should_cache:
-                cache_key = f'workouts_list_user_{request.user.id}_page_1_size_{page_size}'
+                version = user_data_version(request.user.id)
+                cache_key = f'workouts_list_user_{request.user.id}_{version}_page_1_size_{page_size}'
                 cached_response = cache.get(cache_key)
                 if cached_response is not None:
                     return Response(cached_response)
             
-            workouts = Workout.objects.filter(
+            # Rendered from values() rows instead of GetWorkoutSerializer (see workout/fast_render.py)
+            workouts = workout_values(Workout.objects.filter(
                 user=request.user, 
                 is_done=True
-            ).select_related('user').prefetch_related(
-                'workoutexercise_set__exercise',
-                'workoutexercise_set__sets'
-            ).order_by('-created_at')
+            ).order_by('-created_at'))
             
             paginator = self.pagination_class()
             paginated_workouts = paginator.paginate_queryset(workouts, request)
-            serializer = GetWorkoutSerializer(paginated_workouts, many=True)
-            paginated_response = paginator.get_paginated_response(serializer.data)
+            paginated_response = paginator.get_paginated_response(render_workouts(paginated_workouts))
             
             if should_cache:
                 cache.set(cache_key, paginated_response.data, 300)
@@ -173,7 +180,9 @@ class GetActiveWorkoutView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        active_workout = Workout.objects.filter(user=request.user, is_done=False).first()
+        active_workout = Workout.objects.filter(user=request.user, is_done=False).prefetch_related(
+            *workout_prefetches()
+        ).first()
         if active_workout:
             serializer = GetWorkoutSerializer(active_workout, context={'include_insights': True})
             return Response(serializer.data)
@@ -202,14 +211,14 @@ class UpdateWorkoutView(APIView):
                             from django.utils.dateparse import parse_date
                             workout_date = parse_date(workout_datetime_str)
                             if workout_date:
-                                new_datetime = timezone.make_aware(datetime.combine(workout_date, time.min))
+                                new_datetime = timezone.make_aware(datetime.combine(workout_date, time.min), user_timezone(request.user))
                             else:
                                 raise ValueError("Invalid date format")
                         
-                        new_date = new_datetime.date()
+                        new_date = local_date(request.user, new_datetime)
                         existing_rest_day = Workout.objects.filter(
                             user=request.user,
-                            datetime__date=new_date,
+                            local_date=new_date,
                             is_rest_day=True
                         ).exclude(id=workout_id).first()
                         
@@ -269,17 +278,19 @@ class CompleteWorkoutView(APIView):
                 workout.notes = request.data['notes']
                 update_fields.append('notes')
 
-            workout.is_done = True
-            workout.save(update_fields=update_fields)
-            
-            workout_exercises = WorkoutExercise.objects.filter(workout=workout)
-            for workout_exercise in workout_exercises:
-                one_rm = calculate_workout_exercise_1rm(workout_exercise)
-                if one_rm is not None:
-                    workout_exercise.one_rep_max = one_rm
-                    workout_exercise.save()
-            
-            recalculate_workout_metrics(workout)
+            # The completion and its queued achievement event commit together
+            with transaction.atomic():
+                workout.is_done = True
+                workout.save(update_fields=update_fields)
+
+                workout_exercises = WorkoutExercise.objects.filter(workout=workout)
+                for workout_exercise in workout_exercises:
+                    one_rm = calculate_workout_exercise_1rm(workout_exercise)
+                    if one_rm is not None:
+                        workout_exercise.one_rep_max = one_rm
+                        workout_exercise.save()
+
+                recalculate_workout_metrics(workout)
             
             recovery_progress = get_current_recovery_progress(request.user)
             create_workout_muscle_recovery(request.user, workout, 'post', recovery_progress)
@@ -304,11 +315,11 @@ class CheckWorkoutPerformedTodayView(APIView):
                 'active_workout': True
             }, status=status.HTTP_200_OK)
         
-        today = timezone.now().date()
+        today = local_today(request.user)
         
         today_workouts = Workout.objects.filter(
             user=request.user,
-            datetime__date=today
+            local_date=today
         ).order_by('-datetime')
         
         if not today_workouts.exists():
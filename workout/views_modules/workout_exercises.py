@@ -5,7 +5,8 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from exercise.models import Exercise
+from django.db import transaction
+from exercise.registry import get_exercise
 from ..models import Workout, WorkoutExercise, ExerciseSet
 from ..serializers import WorkoutExerciseSerializer, ExerciseSetSerializer
 from ..utils import recalculate_workout_metrics
@@ -24,9 +25,8 @@ class AddExerciseToWorkoutView(APIView):
         if not exercise_id:
             return Response({'error': 'exercise_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            exercise = Exercise.objects.get(id=exercise_id)
-        except Exercise.DoesNotExist:
+        exercise = get_exercise(exercise_id)
+        if exercise is None:
             return Response({'error': 'Exercise not found'}, status=status.HTTP_404_NOT_FOUND)
 
         current_count = workout.workoutexercise_set.count()
@@ -62,13 +62,15 @@ class AddExerciseSetToWorkoutExerciseView(APIView):
         
         serializer = ExerciseSetSerializer(data=data)
         if serializer.is_valid():
-            serializer.save()
-            
-            workout = workout_exercise.workout
-            if workout.rest_timer_paused_at:
+            # The set and its queued achievement event commit together
+            with transaction.atomic():
+                serializer.save()
+
+                workout = workout_exercise.workout
                 workout.rest_timer_paused_at = None
-                workout.save(update_fields=['rest_timer_paused_at'])
-            recalculate_workout_metrics(workout)
+                if workout.has_changed('rest_timer_paused_at'):
+                    workout.save(update_fields=['rest_timer_paused_at'])
+                recalculate_workout_metrics(workout)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
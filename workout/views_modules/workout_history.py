@@ -7,9 +7,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
+from django.db.models import Count, Q
 from datetime import datetime, timedelta
 from calendar import monthrange
-from exercise.models import Exercise
+from exercise.registry import get_exercise
+from user.timezones import local_today
+from ..fast_render import one_rep_max_history, render_set_history, set_history_values
 from ..models import Workout, WorkoutExercise, ExerciseSet
 from ..permissions import is_pro_user
 from ..utils import calculate_one_rep_max
@@ -31,9 +34,8 @@ class GetExercise1RMHistoryView(APIView):
         PRO: Full history
         FREE: Last 30 days only
         """
-        try:
-            exercise = Exercise.objects.get(id=exercise_id)
-        except Exercise.DoesNotExist:
+        exercise = get_exercise(exercise_id)
+        if exercise is None:
             return Response({'error': 'Exercise not found'}, status=status.HTTP_404_NOT_FOUND)
         
         is_pro = is_pro_user(request.user)
@@ -43,7 +45,7 @@ class GetExercise1RMHistoryView(APIView):
             workout__user=request.user,
             workout__is_done=True,
             one_rep_max__isnull=False
-        ).select_related('workout').order_by('-workout__datetime')
+        ).order_by('-workout__datetime')
         
         if not is_pro:
             thirty_days_ago = timezone.now() - timedelta(days=30)
@@ -51,14 +53,8 @@ class GetExercise1RMHistoryView(APIView):
                 workout__datetime__gte=thirty_days_ago
             )
         
-        history = []
-        for workout_exercise in workout_exercises:
-            history.append({
-                'workout_id': workout_exercise.workout.id,
-                'workout_title': workout_exercise.workout.title,
-                'workout_date': workout_exercise.workout.datetime.isoformat(),
-                'one_rep_max': float(workout_exercise.one_rep_max) if workout_exercise.one_rep_max else None
-            })
+        # Rendered from values() rows (see workout/fast_render.py)
+        history = one_rep_max_history(workout_exercises)
         
         return Response({
             'exercise_id': exercise_id,
@@ -78,37 +74,20 @@ class GetExerciseSetHistoryView(APIView):
         GET /api/workout/exercise/<exercise_id>/set-history/
         Returns paginated set history for a specific exercise across all workouts.
         """
-        try:
-            exercise = Exercise.objects.get(id=exercise_id)
-        except Exercise.DoesNotExist:
+        exercise = get_exercise(exercise_id)
+        if exercise is None:
             return Response({'error': 'Exercise not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        sets = ExerciseSet.objects.filter(
+        # Rendered from values() rows (see workout/fast_render.py)
+        sets = set_history_values(ExerciseSet.objects.filter(
             workout_exercise__exercise_id=exercise_id,
             workout_exercise__workout__user=request.user,
             workout_exercise__workout__is_done=True
-        ).select_related(
-            'workout_exercise__workout'
-        ).order_by('-workout_exercise__workout__datetime', '-set_number')
+        ).order_by('-workout_exercise__workout__datetime', '-set_number'))
         
         paginator = WorkoutPagination()
         paginated_sets = paginator.paginate_queryset(sets, request)
-        
-        history = []
-        for exercise_set in paginated_sets:
-            workout = exercise_set.workout_exercise.workout
-            history.append({
-                'id': exercise_set.id,
-                'weight': float(exercise_set.weight),
-                'reps': exercise_set.reps,
-                'is_warmup': exercise_set.is_warmup,
-                'set_number': exercise_set.set_number,
-                'workout_id': workout.id,
-                'workout_title': workout.title,
-                'workout_date': workout.datetime.isoformat(),
-            })
-        
-        return paginator.get_paginated_response(history)
+        return paginator.get_paginated_response(render_set_history(paginated_sets))
 
 
 class GetExerciseLastWorkoutView(APIView):
@@ -119,9 +98,8 @@ class GetExerciseLastWorkoutView(APIView):
         GET /api/workout/exercise/<exercise_id>/last-workout/
         Returns the last workout where this exercise was performed.
         """
-        try:
-            exercise = Exercise.objects.get(id=exercise_id)
-        except Exercise.DoesNotExist:
+        exercise = get_exercise(exercise_id)
+        if exercise is None:
             return Response(
                 {'error': 'Exercise not found'}, 
                 status=status.HTTP_404_NOT_FOUND
@@ -131,7 +109,7 @@ class GetExerciseLastWorkoutView(APIView):
             exercise_id=exercise_id,
             workout__user=request.user,
             workout__is_done=True
-        ).select_related('workout', 'exercise').order_by('-workout__datetime').first()
+        ).select_related('workout').order_by('-workout__datetime').first()
         
         if not last_workout_exercise:
             return Response({
@@ -170,7 +148,7 @@ class GetExerciseLastWorkoutView(APIView):
                 'one_rep_max': float(last_workout_exercise.one_rep_max) if last_workout_exercise.one_rep_max else None,
                 'sets': sets_data,
                 'total_sets': len(sets_data),
-                'days_ago': (timezone.now().date() - workout.datetime.date()).days
+                'days_ago': (local_today(request.user) - workout.local_date).days
             }
         })
 
@@ -219,29 +197,34 @@ class CalendarView(APIView):
         else:
             return Response({'error': 'Invalid parameters'}, status=status.HTTP_400_BAD_REQUEST)
         
-        workouts = Workout.objects.filter(
-            user=request.user,
-            datetime__date__gte=date_range[0],
-            datetime__date__lte=date_range[1]
-        ).order_by('datetime')
+        # One grouped query for the whole range instead of four per day
+        day_counts = {
+            row['local_date']: row
+            for row in Workout.objects.filter(
+                user=request.user,
+                local_date__gte=date_range[0],
+                local_date__lte=date_range[1]
+            ).values('local_date').annotate(
+                workout_count=Count('id', filter=Q(is_rest_day=False, is_done=True)),
+                rest_day_count=Count('id', filter=Q(is_rest_day=True)),
+            ).order_by()
+        }
         
         calendar_data = []
         current_date = date_range[0]
         while current_date <= date_range[1]:
-            date_str = current_date.isoformat()
-            day_workouts = workouts.filter(datetime__date=current_date)
-            
-            has_workout = day_workouts.filter(is_rest_day=False, is_done=True).exists()
-            is_rest_day = day_workouts.filter(is_rest_day=True).exists()
+            counts = day_counts.get(current_date, {})
+            workout_count = counts.get('workout_count', 0)
+            rest_day_count = counts.get('rest_day_count', 0)
             
             calendar_data.append({
-                'date': date_str,
+                'date': current_date.isoformat(),
                 'day': current_date.day,
                 'weekday': current_date.weekday(),
-                'has_workout': has_workout,
-                'is_rest_day': is_rest_day,
-                'workout_count': day_workouts.filter(is_rest_day=False, is_done=True).count(),
-                'rest_day_count': day_workouts.filter(is_rest_day=True).count()
+                'has_workout': workout_count > 0,
+                'is_rest_day': rest_day_count > 0,
+                'workout_count': workout_count,
+                'rest_day_count': rest_day_count
             })
             current_date += timedelta(days=1)
         
@@ -267,7 +250,7 @@ class GetAvailableYearsView(APIView):
         """
         years = Workout.objects.filter(
             user=request.user
-        ).values_list('datetime__year', flat=True).distinct().order_by('-datetime__year')
+        ).values_list('local_date__year', flat=True).distinct().order_by('-local_date__year')
         
         return Response({'years': list(years)})
 
@@ -317,8 +300,8 @@ class CalendarStatsView(APIView):
         
         workouts = Workout.objects.filter(
             user=request.user,
-            datetime__date__gte=date_range[0],
-            datetime__date__lte=date_range[1]
+            local_date__gte=date_range[0],
+            local_date__lte=date_range[1]
         )
         
         total_workouts = workouts.filter(is_rest_day=False, is_done=True).count()
@@ -326,7 +309,7 @@ class CalendarStatsView(APIView):
         days_with_workouts = workouts.filter(
             is_rest_day=False,
             is_done=True
-        ).values_list('datetime__date', flat=True).distinct().count()
+        ).values_list('local_date', flat=True).distinct().count()
         
         days_not_worked = total_days - days_with_workouts - total_rest_days
         
@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from django.db import models
+from exercise.registry import get_exercise
 from ..models import Workout, WorkoutExercise, TrainingResearch, MuscleRecovery, CNSRecovery
 from ..serializers import TrainingResearchSerializer, MuscleRecoverySerializer, CNSRecoverySerializer
 from ..permissions import is_pro_user, get_pro_response
@@ -36,15 +37,15 @@ class GetRecoveryRecommendationsView(APIView):
                 'recommendations': []
             })
         
-        workout_exercises = WorkoutExercise.objects.filter(workout=last_workout).select_related('exercise')
+        exercise_ids = WorkoutExercise.objects.filter(workout=last_workout).values_list('exercise_id', flat=True)
         muscle_groups = set()
         exercise_types = set()
         
-        for we in workout_exercises:
-            if we.exercise.primary_muscle:
-                muscle_groups.add(we.exercise.primary_muscle)
-            if we.exercise.category:
-                exercise_types.add(we.exercise.category)
+        for exercise in map(get_exercise, exercise_ids):
+            if exercise.primary_muscle:
+                muscle_groups.add(exercise.primary_muscle)
+            if exercise.category:
+                exercise_types.add(exercise.category)
         
         research_items = TrainingResearch.objects.filter(
             is_active=True,
@@ -108,7 +109,7 @@ class GetRestPeriodRecommendationsView(APIView):
         except WorkoutExercise.DoesNotExist:
             return Response({'error': 'Workout exercise not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        exercise = workout_exercise.exercise
+        exercise = get_exercise(workout_exercise.exercise_id)
         is_compound = exercise.category == 'compound'
         
         research = TrainingResearch.objects.filter(
@@ -25,7 +25,9 @@ class GetTemplateWorkoutsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        template_workouts = TemplateWorkout.objects.filter(user=request.user).order_by('-created_at')
+        template_workouts = TemplateWorkout.objects.filter(user=request.user).prefetch_related(
+            'templateworkoutexercise_set'
+        ).order_by('-created_at')
         serializer = GetTemplateWorkoutSerializer(template_workouts, many=True)
         return Response(serializer.data)
 
@@ -78,7 +80,7 @@ class StartTemplateWorkoutView(APIView):
         for template_exercise in template_exercises:
             WorkoutExercise.objects.create(
                 workout=workout,
-                exercise=template_exercise.exercise,
+                exercise_id=template_exercise.exercise_id,
                 order=template_exercise.order
             )
         
@@ -63,6 +63,7 @@ class StopRestTimerView(APIView):
             
             if not workout.rest_timer_paused_at:
                 workout.rest_timer_paused_at = timezone.now()
+            if workout.has_changed('rest_timer_paused_at'):
                 workout.save(update_fields=['rest_timer_paused_at'])
             
             state = get_rest_timer_state(workout)
@@ -97,8 +98,8 @@ class ResumeRestTimerView(APIView):
                     'error': 'No active workout found'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            if workout.rest_timer_paused_at:
-                workout.rest_timer_paused_at = None
+            workout.rest_timer_paused_at = None
+            if workout.has_changed('rest_timer_paused_at'):
                 workout.save(update_fields=['rest_timer_paused_at'])
             
             state = get_rest_timer_state(workout)